@@ -0,0 +1,93 @@
+# aliases.py
+"""Name normalization and spelling aliases shared by the map, parser and cleaners."""
+import re
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+def normalize_name(name):
+    """Lowercase, drop punctuation and collapse whitespace: ' Kolhapur ' -> 'kolhapur'"""
+    return _NON_ALNUM.sub(" ", str(name or "").lower()).strip()
+
+# Normalized Area spellings seen in govdata -> normalized DTNAME in maharashtradist.geojson
+DISTRICT_ALIASES = {
+    "ahmednagar": "ahmadnagar",
+    "ahilyanagar": "ahmadnagar",
+    "beed": "bid",
+    "bhandra": "bhandara",
+    "buldhana": "buldana",
+    "chhatrapati": "aurangabad",
+    "chhatrapati sambhajinagar": "aurangabad",
+    "dharashiv": "osmanabad",
+    "gondia": "gondiya",
+    "karad": "satara",
+    "palaghar": "palghar",
+    "raigad": "raigarh",
+    "sholapur": "solapur",
+    "sindhudurgspirosis": "sindhudurg",
+    "yavatma": "yavatmal",
+}
+
+
+class DistrictIndex:
+    """Resolve Area values to GeoJSON feature positions by normalized DTNAME."""
+
+    def __init__(self, features):
+        self.size = len(features)
+        self._by_name = {}
+        for position, feature in enumerate(features):
+            name = normalize_name(feature.get("properties", {}).get("DTNAME"))
+            self._by_name.setdefault(name, position)
+
+    def feature_for(self, area):
+        """Feature position for an Area value, or -1 when it is not a mapped district"""
+        name = normalize_name(area)
+        name = DISTRICT_ALIASES.get(name, name)
+        return self._by_name.get(name, -1)
+
+# Spelling variants of single disease-name tokens (govdata and users spell them
+# several ways) -> one canonical token, applied to names and queries alike
+DISEASE_TOKEN_VARIANTS = {
+    "diarrhoeal": "diarrheal",
+    "diarrhoea": "diarrhea",
+    "chickungunya": "chikungunya",
+    "chikunguniya": "chikungunya",
+    "chikungun": "chikungunya",
+    "chikungunia": "chikungunya",
+    "gastroenter": "gastroenteritis",
+    "gastroenterit": "gastroenteritis",
+    "gastroenteriti": "gastroenteritis",
+    "encephalitic": "encephalitis",
+    "lepto": "leptospirosis",
+    "viralhepatitis": "hepatitis",
+    "typhiod": "typhoid",
+    "maleria": "malaria",
+    "dengu": "dengue",
+}
+
+# Whole-phrase aliases a user may type -> the normalized phrase govdata uses
+DISEASE_ALIASES = {
+    "acute encephalitis syndrome": "aes",
+    "japanese encephalitis": "je",
+    "brain fever": "aes",
+    "chicken pox": "chickenpox",
+    "enteric fever": "typhoid",
+    "loose motions": "diarrhea",
+}
+
+_WORD = re.compile(r"[A-Za-z0-9]+")
+
+def canonical_area(name):
+    """One display spelling per district: 'Beed', ' beed ' and 'BEED' -> 'Bid'"""
+    key = normalize_name(name)
+    return DISTRICT_ALIASES.get(key, key).title()
+
+def canonical_disease(name):
+    """Collapse disease spelling variants, keeping short acronyms: 'AES/JE' -> 'AES JE'"""
+    words = []
+    for word in _WORD.findall(str(name or "")):
+        if word.isupper() and len(word) <= 4:
+            words.append(word)
+        else:
+            lower = word.lower()
+            words.append(DISEASE_TOKEN_VARIANTS.get(lower, lower).capitalize())
+    return " ".join(words)
@@ -0,0 +1,146 @@
+# analytics.py
+"""Indexed, memoized engine behind the chatbot.py insight functions.
+
+Disease and Area names are trimmed, lowercased and categorized once per
+dataset version, and the row positions of every disease and area are kept
+as group indices. Each insight then runs the original chatbot.py function
+on just the matching rows, and its JSON-ready result is memoized, so a
+repeated view is a dictionary lookup rather than a rescan of the frame.
+"""
+import numpy as np
+import pandas as pd
+
+import chatbot
+from answer_cache import AnswerCache
+
+_NO_ROWS = np.zeros(0, dtype=np.intp)
+
+def _key(name):
+    return str(name or "").strip().lower()
+
+def series_payload(series):
+    """pandas Series -> {"labels": [...], "data": [...]} like the dashboard endpoints"""
+    return {"labels": [str(label) for label in series.index],
+            "data": [None if pd.isna(value) else value for value in series.tolist()]}
+
+def frame_payload(frame, index_name):
+    """pandas DataFrame -> list of row dicts including its index"""
+    records = frame.reset_index().rename(columns={"index": index_name})
+    return records.to_dict(orient="records")
+
+
+class InsightEngine:
+    """chatbot.py insights over one dataset version; build a new engine per version."""
+
+    def __init__(self, df, version=None, cache_size=1024, store=None):
+        self.df = df.reset_index(drop=True)
+        self.version = version
+        self.store = store
+        self._disease_rows = self._group_index(self.df['Disease'])
+        self._area_rows = self._group_index(self.df['Area'])
+        # Results never expire: the engine is replaced when the data changes
+        self._results = AnswerCache(maxsize=cache_size, ttl=float("inf"))
+
+    @classmethod
+    def from_store(cls, store):
+        return cls(chatbot.preprocess_store(store), version=store.version, store=store)
+
+    @staticmethod
+    def _group_index(names):
+        """{lowercased name: row positions}, computed with one categorical groupby"""
+        keys = names.astype(str).str.strip().str.lower().astype("category")
+        return {key: np.asarray(rows) for key, rows in keys.groupby(keys, observed=True).indices.items()}
+
+    def _rows(self, index, name):
+        return index.get(_key(name), _NO_ROWS)
+
+    def _subset(self, rows):
+        return self.df.iloc[rows]
+
+    def _memo(self, key, compute):
+        return self._results.get_or_compute(key, compute)[0]
+
+    @property
+    def stats(self):
+        """Lookup counters of the result cache (hit, miss, coalesced, ...)"""
+        return self._results.stats
+
+    @property
+    def diseases(self):
+        return sorted(self._disease_rows)
+
+    @property
+    def areas(self):
+        return sorted(self._area_rows)
+
+    # --- 1. Disease-Specific ---
+    def seasonality(self, disease):
+        def compute():
+            rows = self._subset(self._rows(self._disease_rows, disease))
+            return series_payload(chatbot.get_disease_seasonality(rows, _key(disease)))
+        return self._memo(("seasonality", _key(disease)), compute)
+
+    def hotspots(self, disease):
+        def compute():
+            rows = self._subset(self._rows(self._disease_rows, disease))
+            return series_payload(chatbot.get_geographic_hotspots(rows, _key(disease)))
+        return self._memo(("hotspots", _key(disease)), compute)
+
+    def fatality_rate(self, disease):
+        def compute():
+            rows = self._subset(self._rows(self._disease_rows, disease))
+            return {"disease": disease, "fatality_rate": chatbot.get_fatality_rate(rows, _key(disease))}
+        return self._memo(("fatality_rate", _key(disease)), compute)
+
+    def yearly_trends(self, disease):
+        def compute():
+            rows = self._subset(self._rows(self._disease_rows, disease))
+            return frame_payload(chatbot.get_yearly_trends(rows, _key(disease)), "Year")
+        return self._memo(("yearly_trends", _key(disease)), compute)
+
+    # --- 2. Location-Based ---
+    def district_profile(self, area):
+        def compute():
+            rows = self._subset(self._rows(self._area_rows, area))
+            return series_payload(chatbot.get_district_profile(rows, _key(area)))
+        return self._memo(("district_profile", _key(area)), compute)
+
+    def monthly_risk(self, area, month):
+        def compute():
+            rows = self._subset(self._rows(self._area_rows, area))
+            risk = chatbot.get_monthly_risk_for_district(rows, _key(area), month)
+            return frame_payload(risk, "Disease")
+        return self._memo(("monthly_risk", _key(area), _key(month)), compute)
+
+    def compare_districts(self, disease, district1, district2):
+        def compute():
+            in_areas = np.union1d(self._rows(self._area_rows, district1),
+                                  self._rows(self._area_rows, district2))
+            rows = self._subset(np.intersect1d(self._rows(self._disease_rows, disease), in_areas))
+            return series_payload(chatbot.compare_districts(rows, _key(disease), _key(district1), _key(district2)))
+        pair = tuple(sorted((_key(district1), _key(district2))))
+        return self._memo(("compare_districts", _key(disease)) + pair, compute)
+
+    # --- 3. Time-Based ---
+    def average_response_time(self, by="disease"):
+        """Mean reporting delay; read from the store's running totals when there is one"""
+        def compute():
+            if self.store is not None:
+                return self._response_from_timeline(_key(by))
+            result = chatbot.get_average_response_time(self.df, by=by)
+            if isinstance(result, pd.Series):
+                return series_payload(result)
+            return {"average_response_time": None if pd.isna(result) else float(result)}
+        return self._memo(("response_time", _key(by)), compute)
+
+    def _response_from_timeline(self, by):
+        sums, counts = self.store.timeline.response["area" if by == "area" else "disease"]
+        if by not in ("disease", "area"):
+            total = int(counts.sum())
+            return {"average_response_time": float(sums.sum() / total) if total else None}
+        vocabulary = self.store.areas if by == "area" else self.store.diseases
+        # Spellings that only differ by surrounding whitespace are one group, as in chatbot.py
+        names = pd.Series([name.strip() for name in vocabulary])
+        grouped = pd.DataFrame({"sum": sums, "count": counts}).groupby(names).sum()
+        grouped = grouped[grouped["count"] > 0]
+        return series_payload((grouped["sum"] / grouped["count"]).sort_values(ascending=False))
@@ -0,0 +1,203 @@
+# anomalies.py
+"""Weekly outbreak anomalies per (area, disease) from exponentially weighted baselines.
+
+Each (area, disease) pair has a weekly case series read from the aggregate
+cube. An EWMA mean and variance per pair is committed week by week up to,
+but not including, the latest reported week. The latest week may still
+receive reports, so it is scored against those baselines without being
+committed. A refresh only advances the weeks that are new since the last
+one, so its cost follows the new data rather than the whole history.
+Committed weeks that a sync rewrote are found from the cube's per-week
+digests and replayed from a checkpoint taken just before them.
+"""
+import datetime as dt
+import threading
+from collections import deque
+
+import numpy as np
+
+from aliases import normalize_name
+from entities import STOP_TERMS
+
+def weeks_in_year(year):
+    """52 or 53 ISO weeks"""
+    return dt.date(year, 12, 28).isocalendar()[1]
+
+def _reportable(name):
+    """False for blanks, numbers and stop terms ("Acute", "Unknown") that name nothing specific"""
+    text = normalize_name(name)
+    return bool(text) and not text.isdigit() and text not in STOP_TERMS
+
+
+class AnomalyDetector:
+    """EWMA baselines for every (area, disease) weekly series of the served store.
+
+    ``alpha`` is the EWMA weight of the newest week; a week is anomalous when
+    it has at least ``min_cases`` cases and sits ``threshold`` standard
+    deviations above a baseline built from at least ``warmup`` weeks, of
+    which at least ``min_active_weeks`` had cases. Most weekly series are
+    almost all zeros, so the variance is floored at the Poisson variance of
+    the expected count (and at ``min_std`` squared) rather than trusted
+    near zero. Pairs whose area or disease is a stop term are never scored.
+    """
+
+    def __init__(self, alpha=0.2, threshold=3.0, min_cases=5, warmup=8, min_std=1.0,
+                 min_active_weeks=4, rewind_weeks=8):
+        self.alpha = alpha
+        self.threshold = threshold
+        self.min_cases = min_cases
+        self.warmup = warmup
+        self.min_std = min_std
+        self.min_active_weeks = min_active_weeks
+        self.rewind_weeks = rewind_weeks
+        self._lock = threading.Lock()
+        self._reset()
+        self.current = {"version": None, "week": None, "anomalies": []}
+
+    def _reset(self):
+        self.mean = self.var = self.weeks = None
+        self.active = None            # committed weeks with any cases, per pair
+        self.committed = None         # last committed (year, week)
+        self.committed_digest = {}    # (year, week) -> cube digest when committed, in order
+        self._checkpoints = deque(maxlen=self.rewind_weeks)  # (slot, state before committing it)
+        self._areas = self._diseases = ()
+
+    # ---------- timeline of weekly slots ----------
+    @staticmethod
+    def _slots(store, after=None, until=None):
+        """(year, week) slots with after < slot < until, in order, over the cube's years"""
+        for year in (int(y) for y in store.cube.years):
+            if year <= 0 or (after and year < after[0]) or (until and year > until[0]):
+                continue
+            for week in range(1, weeks_in_year(year) + 1):
+                slot = (year, week)
+                if (after and slot <= after) or (until and slot >= until):
+                    continue
+                yield slot
+
+    @staticmethod
+    def _week_cases(store, slot):
+        index = store.cube.year_index(slot[0])
+        return store.cube.cases[index, slot[1]].astype(np.float64)
+
+    @staticmethod
+    def _week_digest(store, slot):
+        index = store.cube.year_index(slot[0])
+        return 0 if index is None else int(store.cube.digest[index, slot[1]])
+
+    # ---------- refresh ----------
+    def _compatible(self, store):
+        """True when the committed state's area/disease codes still hold in ``store``"""
+        if self.committed is None:
+            return False
+        n_areas, n_diseases = len(self._areas), len(self._diseases)
+        # False when codes were reassigned (full reload with a new vocabulary order)
+        return list(store.areas[:n_areas]) == list(self._areas) and \
+            list(store.diseases[:n_diseases]) == list(self._diseases)
+
+    def _first_changed(self, store, latest):
+        """Earliest committed week whose cases differ in ``store``, or None.
+
+        One digest per committed week is compared, so the cost follows the
+        number of weeks rather than the size of the cube.
+        """
+        for slot, digest in self.committed_digest.items():
+            if slot >= latest or self._week_digest(store, slot) != digest:
+                return slot
+        return None
+
+    def _rewind(self, slot):
+        """Restore the state from before ``slot`` was committed; False when it is too far back"""
+        while self._checkpoints:
+            checkpoint, state = self._checkpoints.pop()
+            if checkpoint == slot:
+                self.mean, self.var, self.weeks, self.active, self.committed = state
+                for later in [s for s in self.committed_digest if s >= slot]:
+                    del self.committed_digest[later]
+                return True
+        return False
+
+    def _grow(self, shape):
+        """Pad state for areas/diseases that appeared since the last refresh.
+
+        A new pair had no cases in any committed week, which leaves an EWMA
+        at mean 0 and variance 0 after that many weeks.
+        """
+        def pad(values, fill=0):
+            grown = np.full(shape, fill, dtype=values.dtype)
+            grown[:values.shape[0], :values.shape[1]] = values
+            return grown
+        self.mean, self.var = pad(self.mean), pad(self.var)
+        self.weeks = pad(self.weeks, fill=self.weeks.max(initial=0))
+        self.active = pad(self.active)
+
+    def _commit(self, cases):
+        """Fold one week into every pair's EWMA mean and variance"""
+        first = self.weeks == 0
+        diff = cases - self.mean
+        step = self.alpha * diff
+        self.mean = np.where(first, cases, self.mean + step)
+        self.var = np.where(first, 0.0, (1 - self.alpha) * (self.var + diff * step))
+        self.weeks += 1
+        self.active += cases > 0
+
+    def update(self, store):
+        """Advance baselines to ``store``'s latest week and re-rank its anomalies.
+
+        Returns the number of weeks committed by this call.
+        """
+        with self._lock:
+            latest = store.watermark() if len(store) else None
+            if latest is None or latest[0] <= 0:
+                self._reset()
+                self.current = {"version": store.version, "week": None, "anomalies": []}
+                return 0
+
+            shape = store.cube.cases.shape[2:]
+            compatible = self._compatible(store)
+            if compatible:
+                changed = self._first_changed(store, latest)
+                compatible = changed is None or self._rewind(changed)
+            if not compatible:
+                self._reset()
+                self.mean = np.zeros(shape)
+                self.var = np.zeros(shape)
+                self.weeks = np.zeros(shape, dtype=np.int64)
+                self.active = np.zeros(shape, dtype=np.int64)
+            elif self.mean.shape != shape:
+                self._grow(shape)
+
+            advanced = 0
+            for slot in self._slots(store, after=self.committed, until=latest):
+                self._checkpoints.append((slot, (self.mean, self.var, self.weeks.copy(),
+                                                 self.active.copy(), self.committed)))
+                self._commit(self._week_cases(store, slot))
+                self.committed_digest[slot] = self._week_digest(store, slot)
+                self.committed = slot
+                advanced += 1
+            self._areas, self._diseases = tuple(store.areas), tuple(store.diseases)
+
+            self.current = {"version": store.version, "week": latest,
+                            "anomalies": self._score(store, latest)}
+            return advanced
+
+    def _score(self, store, slot):
+        """Pairs whose latest-week cases spike above their baseline, highest z first"""
+        cases = self._week_cases(store, slot)
+        std = np.sqrt(np.maximum(self.var, np.maximum(self.mean, self.min_std ** 2)))
+        z = (cases - self.mean) / std
+        flagged = (self.weeks >= self.warmup) & (self.active >= self.min_active_weeks) & \
+            (cases >= self.min_cases) & (z >= self.threshold)
+        flagged &= np.array([_reportable(name) for name in store.areas], dtype=bool)[:, None]
+        flagged &= np.array([_reportable(name) for name in store.diseases], dtype=bool)[None, :]
+        areas, diseases = np.nonzero(flagged)
+        ranked = np.argsort(-z[areas, diseases], kind="stable")
+        return [
+            {
+                "area": store.areas[a].strip(), "disease": store.diseases[d].strip(),
+                "cases": int(cases[a, d]), "expected": round(float(self.mean[a, d]), 2),
+                "std": round(float(std[a, d]), 2), "z": round(float(z[a, d]), 2),
+                "weeks_of_history": int(self.weeks[a, d]), "weeks_with_cases": int(self.active[a, d]),
+            }
+            for a, d in zip(areas[ranked], diseases[ranked])
+        ]
@@ -0,0 +1,134 @@
+# answer_cache.py
+"""Bounded LRU + TTL cache for chatbot answers with in-flight request coalescing."""
+import threading
+import time
+from collections import OrderedDict
+
+
+class _Flight:
+    """A computation in progress that other callers can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class WaitTimeout(TimeoutError):
+    """Raised in a caller that waited longer than ``wait_timeout`` for another caller's answer"""
+
+
+class AnswerCache:
+    """Cache answers by key; concurrent misses for one key share a single call.
+
+    ``get_or_compute`` returns ``(value, status)`` where status is ``"hit"``,
+    ``"miss"`` (this caller computed it) or ``"coalesced"`` (waited for another
+    caller's computation). Failed computations are not cached; the error is
+    raised in every caller that was waiting on it. A caller waits at most
+    ``wait_timeout`` seconds (None: no limit) and then gets WaitTimeout, so
+    a hung computation cannot pin every identical request's thread.
+    """
+
+    def __init__(self, maxsize=256, ttl=300.0, wait_timeout=60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.wait_timeout = wait_timeout
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.stats = {"hit": 0, "miss": 0, "coalesced": 0, "wait_timeout": 0, "evicted": 0}
+
+    def get_or_compute(self, key, compute):
+        value, status = self.begin(key)
+        if status != "miss":
+            return value, status
+        try:
+            value = compute()
+        except BaseException as e:
+            self.fail(key, e)
+            raise
+        self.finish(key, value)
+        return value, "miss"
+
+    def begin(self, key):
+        """Look ``key`` up and, on a miss, become the one caller computing it.
+
+        Returns ``(value, "hit")``, ``(value, "coalesced")`` after waiting for
+        the caller already computing it (WaitTimeout if that takes longer
+        than ``wait_timeout``), or ``(None, "miss")``: this caller
+        now leads and must call ``finish`` or ``fail`` for the key (used where
+        the value is produced piecemeal, like a streamed answer).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.stats["hit"] += 1
+                    return entry[1], "hit"
+                del self._entries[key]
+
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                self.stats["miss"] += 1
+            else:
+                self.stats["coalesced"] += 1
+
+        if leader:
+            return None, "miss"
+        if not flight.done.wait(self.wait_timeout):
+            with self._lock:
+                self.stats["wait_timeout"] += 1
+            raise WaitTimeout(f"no answer after waiting {self.wait_timeout:g}s for an identical request")
+        if flight.error is not None:
+            raise flight.error
+        return flight.value, "coalesced"
+
+    def finish(self, key, value, cache=True):
+        """Hand the leader's value to every waiting caller (and cache it unless ``cache`` is False)"""
+        if cache:
+            self._store(key, value)
+        self._land(key, value=value)
+
+    def fail(self, key, error):
+        """Raise ``error`` in every caller waiting on ``key``; nothing is cached"""
+        self._land(key, error=error)
+
+    def _land(self, key, value=None, error=None):
+        with self._lock:
+            flight = self._inflight.pop(key, None)
+        if flight is not None:
+            flight.value, flight.error = value, error
+            flight.done.set()
+
+    def get(self, key):
+        """Cached value or None, without starting a computation"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                self.stats["miss"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hit"] += 1
+            return entry[1]
+
+    def put(self, key, value):
+        """Store a value computed outside get_or_compute (e.g. a finished stream)"""
+        self._store(key, value)
+
+    def _store(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.stats["evicted"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,66 @@
+# answers.py
+"""Templated answers for chat questions that the structured summary fully covers."""
+import re
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# Words that only frame a lookup ("how many dengue deaths in pune in 2024?").
+# Anything left over after removing these, the year and the matched entities
+# makes the question open-ended and it goes to the LLM.
+LOOKUP_WORDS = {
+    "a", "all", "and", "any", "are", "by", "count", "data", "did", "district",
+    "disease", "diseases", "during", "for", "from", "get", "give", "had", "has",
+    "have", "how", "in", "is", "many", "me", "much", "number", "numbers", "of",
+    "overall", "please", "reported", "show", "sum", "summary", "tell", "the",
+    "there", "total", "totals", "was", "were", "what", "whats", "year",
+    "maharashtra", "state",  # the whole dataset, never a filter
+    # metric words, mirrored from parse_intent
+    "case", "cases", "death", "deaths", "fatalities", "fatality", "mortality",
+    "outbreak", "outbreaks", "incident", "incidents", "died", "people",
+    "s",  # possessive left over by tokenizing "pune's"
+}
+
+def is_fully_structured(query, intent):
+    """True when every word of the query is accounted for by the parsed intent"""
+    if not (intent["year"] or intent["diseases"] or intent["areas"]):
+        return False
+
+    entity_words = set()
+    for term in intent["diseases"] + intent["areas"]:
+        entity_words.update(_TOKEN.findall(term.lower()))
+
+    for token in _TOKEN.findall(query.lower()):
+        if token in LOOKUP_WORDS or token in entity_words:
+            continue
+        if intent["year"] and token == str(intent["year"]):
+            continue
+        # Plurals of matched entities ("fevers") are still the same entity
+        if any(token.startswith(word) for word in entity_words):
+            continue
+        return False
+    return True
+
+def _scope(intent):
+    parts = []
+    if intent["diseases"]:
+        parts.append(" from " + " and ".join(d.title() for d in intent["diseases"]))
+    if intent["areas"]:
+        parts.append(" in " + " and ".join(a.title() for a in intent["areas"]))
+    if intent["year"]:
+        parts.append(f" in {intent['year']}")
+    return "".join(parts)
+
+def render_answer(intent, totals, summary_lines):
+    """Plain-language answer built only from the cube totals and summary lines"""
+    scope = _scope(intent)
+    if intent["metric"] == "deaths":
+        headline = f"{totals['deaths']:,} deaths were reported{scope}."
+    elif intent["metric"] == "cases":
+        headline = f"{totals['cases']:,} cases were reported{scope}."
+    else:
+        headline = f"{totals['cases']:,} cases and {totals['deaths']:,} deaths were reported{scope}."
+
+    breakdown = summary_lines[1:]
+    if len(breakdown) > 1:
+        headline += " Top diseases: " + "; ".join(breakdown) + "."
+    return headline
@@ -1,12 +1,33 @@
 # app.py
-from flask import Flask, jsonify, render_template, request
+from flask import (Flask, Response, g, jsonify, redirect, render_template, request,
+                   stream_with_context, url_for)
+import base64
 import json
 import os
 import re
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+import numpy as np
 from dotenv import load_dotenv
 import google.generativeai as genai
 from supabase import create_client, Client
 
+import httpcache
+import metrics
+import snapshot
+from aliases import DistrictIndex
+from answer_cache import AnswerCache
+from answers import is_fully_structured, render_answer
+from datastore import COLUMNS, MISSING_DAY, HealthStore, format_day, parse_day
+from entities import EntityMatcher
+from geometry import DEFAULT_RESOLUTION, MapGeometry
+from analytics import InsightEngine
+from anomalies import AnomalyDetector
+from retrieval import InsightRetriever, merge_context
+from supabase_loader import GOVDATA_ORDER, SupabaseRestLoader
+
 # --------------------- CONFIG ---------------------
 load_dotenv()  # Load .env file
 APP_ROOT = os.path.dirname(os.path.abspath(__file__))
@@ -25,128 +46,435 @@ if not GEMINI_API_KEY:
 if not SUPABASE_URL or not SUPABASE_KEY:
     raise RuntimeError("ERROR: SUPABASE_URL or SUPABASE_KEY not found. Add them to .env")
 
-# Initialize clients
+# Initialize clients (configure() is local; the Supabase client is only needed for debugging)
 genai.configure(api_key=GEMINI_API_KEY)
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 print("Gemini client initialized ✅")
-print("Supabase client initialized ✅")
+
+_SUPABASE_CLIENT = None
+
+def get_supabase() -> Client:
+    global _SUPABASE_CLIENT
+    if _SUPABASE_CLIENT is None:
+        _SUPABASE_CLIENT = create_client(SUPABASE_URL, SUPABASE_KEY)
+        print("Supabase client initialized ✅")
+    return _SUPABASE_CLIENT
+
+# --------------------- METRICS ---------------------
+# Per-worker metrics served on /metrics; see metrics.py
+REQUEST_LATENCY = metrics.REGISTRY.histogram(
+    "http_request_duration_seconds", "Time to build each response (streams: until headers)",
+    labels=("route", "method", "status"))
+CHAT_STAGE_LATENCY = metrics.REGISTRY.histogram(
+    "chat_stage_duration_seconds", "Time spent in each stage of a chat reply", labels=("stage",))
+CHAT_REPLIES = metrics.REGISTRY.counter(
+    "chat_replies_total", "Chat replies by how they were answered", labels=("source",))
+DATA_LOAD_LATENCY = metrics.REGISTRY.histogram(
+    "data_load_duration_seconds", "Supabase load duration", labels=("mode",))
+DATA_LOADS = metrics.REGISTRY.counter(
+    "data_loads_total", "Supabase loads by outcome", labels=("mode", "outcome"))
+ROWS_FETCHED = metrics.REGISTRY.counter(
+    "data_rows_fetched_total", "Rows fetched from Supabase", labels=("mode",))
+SNAPSHOT_WRITE_LATENCY = metrics.REGISTRY.histogram(
+    "snapshot_write_duration_seconds", "Time to publish a snapshot")
+DATASET_ROWS = metrics.REGISTRY.gauge("dataset_rows", "Rows in the served dataset")
+DATASET_VOCABULARY = metrics.REGISTRY.gauge(
+    "dataset_vocabulary_size", "Distinct names in the served dataset", labels=("kind",))
+CACHE_LOOKUPS = metrics.REGISTRY.counter(
+    "cache_lookups_total", "Cache lookups by cache and result", labels=("cache", "result"))
+
+# One structured line for a sample of chat requests instead of prints on every one
+CHAT_LOG = metrics.EventLog(sample_rate=float(os.environ.get("CHAT_LOG_SAMPLE_RATE", 0.01)))
 
 # --------------------- DATA LOADING ---------------------
-HEALTH_DATA_CACHE = []
+HEALTH_STORE = HealthStore.empty()
 GEO_DATA_CACHE = None
+GEO_DISTRICT_INDEX = None
+MAP_GEOMETRY = None  # reduced, immutable geometry bodies served from /map_geometry
+MAP_GEOMETRY_BODIES = {}
+
+# Rendered bodies of the dataset-versioned GET routes, keyed by (dataset version,
+# path, query) and gzip-compressed at most once each; emptied on every load
+RESPONSE_CACHE = AnswerCache(maxsize=int(os.environ.get("RESPONSE_CACHE_SIZE", 512)), ttl=float("inf"))
+RESPONSE_CACHE_MAX_BODY = int(os.environ.get("RESPONSE_CACHE_MAX_BODY", 2 * 1024 * 1024))
+
+def make_govdata_loader():
+    """Concurrent, retrying page fetcher for the govdata table"""
+    return SupabaseRestLoader(
+        SUPABASE_URL, SUPABASE_KEY,
+        page_size=int(os.environ.get("SUPABASE_PAGE_SIZE", 1000)),
+        workers=int(os.environ.get("SUPABASE_FETCH_WORKERS", 4)),
+        retries=int(os.environ.get("SUPABASE_FETCH_RETRIES", 3)),
+        order_by=os.environ.get("SUPABASE_ORDER_BY") or GOVDATA_ORDER,
+    )
+
+govdata_loader = make_govdata_loader()
+
+# Outbreak spikes per (area, disease), advanced by the new weeks of each load
+ANOMALY_DETECTOR = AnomalyDetector(
+    alpha=float(os.environ.get("ANOMALY_ALPHA", 0.2)),
+    threshold=float(os.environ.get("ANOMALY_THRESHOLD", 3.0)),
+    min_cases=int(os.environ.get("ANOMALY_MIN_CASES", 5)),
+    min_active_weeks=int(os.environ.get("ANOMALY_MIN_ACTIVE_WEEKS", 4)),
+)
+
+# Serializes swaps of the served store (a sync and a snapshot adoption may race)
+_PUBLISH_LOCK = threading.Lock()
+
+def publish_store(store):
+    """Serve ``store``: incremental views first, then the swap, then drop per-version caches.
+
+    Views are brought up to date before the store is visible, so a request
+    that sees the new version never reads the old anomalies (and caches
+    them under the new version). The cache is cleared after the swap, so
+    whatever was stored under the previous version cannot be served again.
+    """
+    global HEALTH_STORE
+    with _PUBLISH_LOCK:
+        try:
+            started = time.perf_counter()
+            advanced = ANOMALY_DETECTOR.update(store)
+            print(f"📈 Anomalies: {len(ANOMALY_DETECTOR.current['anomalies'])} flagged, "
+                  f"{advanced} weeks folded in ({(time.perf_counter() - started) * 1000:.1f}ms)")
+        except Exception as e:
+            print(f"⚠️ Anomaly update failed: {e}")
+        HEALTH_STORE = store
+        RESPONSE_CACHE.clear()
+
+# Serializes loaders (startup, /refresh-data, background sync); readers never block
+_LOAD_LOCK = threading.Lock()
+SNAPSHOT_DIR = os.environ.get("SNAPSHOT_DIR", os.path.join(APP_ROOT, "snapshot"))
+SNAPSHOT_WRITE_ATTEMPTS = int(os.environ.get("SNAPSHOT_WRITE_ATTEMPTS", 3))
+SNAPSHOT_RETRY_DELAY = float(os.environ.get("SNAPSHOT_RETRY_DELAY", 0.5))
+
+# Workers poll the snapshot's CURRENT stamp at most this often (seconds)
+SNAPSHOT_CHECK_INTERVAL = float(os.environ.get("SNAPSHOT_CHECK_INTERVAL", 2))
+_ADOPT_LOCK = threading.Lock()
+_last_snapshot_check = 0.0
+PROCESS_STARTED_AT = time.time()
+
+# Incremental syncs re-read this many weeks before the latest one held, so late
+# and corrected rows for recent weeks are picked up; older ones need a full load
+INCREMENTAL_LOOKBACK_WEEKS = int(os.environ.get("INCREMENTAL_LOOKBACK_WEEKS", 4))
+
+# What is being served and how fresh it is; reported by /ready
+DATA_STATUS = {
+    "source": "empty",      # empty | snapshot | supabase
+    "current": False,       # True once a Supabase sync has completed in this process
+    "mode": None, "at": None, "fetched": 0, "watermark": None,
+    "full_at": None,        # when the whole table was last re-read (by any process)
+    "snapshot_version": None, "error": None,
+}
+
+def sync_coverage(store):
+    """What the next incremental sync re-reads, and what only a full reload refreshes"""
+    window = store.sync_window(INCREMENTAL_LOOKBACK_WEEKS)
+    return {
+        "last_full_sync": DATA_STATUS["full_at"],
+        "incremental_window": {"year": window[0], "week": window[1]} if window else None,
+        "note": "Incremental syncs re-read only the incremental window; late or corrected rows "
+                "for earlier weeks appear after a full reload (/refresh-data?mode=full).",
+    }
+
+def load_health_data(mode="full"):
+    """Load govdata from Supabase into the columnar store.
+
+    ``full`` re-reads the whole table. ``incremental`` re-reads only rows from
+    INCREMENTAL_LOOKBACK_WEEKS before the latest (Year, Week) already held
+    onwards and replaces that window with them, so its cost follows the new
+    reports. govdata has no updated-at column (and its dates are text), so
+    changes to rows before the window are only picked up by a full load;
+    /ready and /refresh-data report when that last happened. The new store is
+    built completely before being swapped in with a single assignment, so
+    requests see old or new, never a mix.
+    Pages are fetched concurrently; if any page fails after its retries the
+    whole load fails and the previous store stays in place. The result is
+    published as the shared snapshot, which other workers then adopt; a
+    snapshot that cannot be written fails the load the same way.
+    Returns True when the load completed.
+    """
+    with _LOAD_LOCK:
+        # Build on whatever another worker last published, not a stale local copy
+        adopt_current_snapshot(force=True)
+        current = HEALTH_STORE
+        since = current.sync_window(INCREMENTAL_LOOKBACK_WEEKS) if mode == "incremental" else None
+        mode = "full" if since is None else "incremental"
+        started = time.perf_counter()
+        try:
+            if since is None:
+                print("🔍 Attempting to load ALL data from Supabase...")
+                all_data = govdata_loader.fetch_all()
+                print(f"📊 Total rows loaded from Supabase: {len(all_data)}")
+                new_store = HealthStore.from_records(all_data) if all_data else None
+                fetched = len(all_data)
+            else:
+                year, week = since
+                print(f"🔍 Syncing Supabase rows from {year} week {week} onwards...")
+                delta = govdata_loader.fetch_since(year, week)
+                new_store = current.merge(HealthStore.from_records(delta), since=since) \
+                    if delta else current
+                fetched = len(delta)
+
+            if new_store is not None:
+                # Other workers only see what reaches the snapshot, so publish it
+                # first; if that fails the sync fails and the old store stays
+                synced_at = time.time()
+                full_at = synced_at if mode == "full" else DATA_STATUS["full_at"]
+                save_snapshot(new_store, synced_at, full_at)
+                if new_store is not current:
+                    publish_store(new_store)
+                DATA_STATUS.update(source="supabase", current=True, error=None, mode=mode,
+                                   at=synced_at, full_at=full_at, fetched=fetched,
+                                   watermark=new_store.watermark())
+                print(f"✅ Supabase data ready: {len(HEALTH_STORE)} rows "
+                      f"({len(HEALTH_STORE.areas)} areas, {len(HEALTH_STORE.diseases)} diseases)")
+            else:
+                print("❌ No data found in Supabase")
+            DATA_LOADS.inc(mode=mode, outcome="ok" if new_store is not None else "empty")
+            ROWS_FETCHED.inc(fetched, mode=mode)
+            DATA_LOAD_LATENCY.observe(time.perf_counter() - started, mode=mode)
+            return True
+
+        except Exception as e:
+            # Whole-load failure: keep serving the previous good store
+            DATA_STATUS["error"] = str(e)
+            DATA_LOADS.inc(mode=mode, outcome="error")
+            print(f"❌ Failed to load data from Supabase, keeping {len(current)} cached rows: {e}")
+            return False
+
+def save_snapshot(store, synced_at, full_synced_at=None):
+    """Publish the store to every worker and the next boot.
 
-def load_health_data():
-    """Load ALL data from Supabase with pagination"""
-    global HEALTH_DATA_CACHE
+    Retried SNAPSHOT_WRITE_ATTEMPTS times with a doubling delay; the last
+    OSError is raised, failing the sync that produced the store.
+    """
+    delay = SNAPSHOT_RETRY_DELAY
+    for attempt in range(1, SNAPSHOT_WRITE_ATTEMPTS + 1):
+        try:
+            started = time.perf_counter()
+            DATA_STATUS["snapshot_version"] = snapshot.write(store, SNAPSHOT_DIR, synced_at=synced_at,
+                                                             full_synced_at=full_synced_at)
+            SNAPSHOT_WRITE_LATENCY.observe(time.perf_counter() - started)
+            print(f"💾 Snapshot {store.version} published in {time.perf_counter() - started:.2f}s")
+            return
+        except OSError as e:
+            print(f"⚠️ Could not write snapshot to {SNAPSHOT_DIR} "
+                  f"(attempt {attempt}/{SNAPSHOT_WRITE_ATTEMPTS}): {e}")
+            if attempt == SNAPSHOT_WRITE_ATTEMPTS:
+                raise
+            time.sleep(delay)
+            delay *= 2
+
+def adopt_current_snapshot(force=False):
+    """Switch to the snapshot named in CURRENT if another process published a newer one.
+
+    Checked at most every SNAPSHOT_CHECK_INTERVAL seconds unless ``force``. The
+    columns are memory-mapped, so every worker shares the same page-cache copy.
+    Returns True when the served store changed.
+    """
+    global _last_snapshot_check
+    now = time.monotonic()
+    if not force and now - _last_snapshot_check < SNAPSHOT_CHECK_INTERVAL:
+        return False
+    if not _ADOPT_LOCK.acquire(blocking=False):
+        return False  # another thread of this worker is already checking
     try:
-        print("🔍 Attempting to load ALL data from Supabase...")
-        
-        # Get all data with pagination (Supabase default limit is 1000)
-        all_data = []
-        page_size = 1000
-        offset = 0
-        
+        _last_snapshot_check = now
+        version, synced_at, full_at = snapshot.read_current(SNAPSHOT_DIR)
+        if version is None:
+            return False
+        if full_at is not None:
+            DATA_STATUS["full_at"] = full_at
+        if synced_at is not None and synced_at >= PROCESS_STARTED_AT:
+            DATA_STATUS.update(current=True, at=synced_at, error=None)
+        if version == HEALTH_STORE.version:
+            DATA_STATUS["snapshot_version"] = version
+            return False
+
+        started = time.perf_counter()
+        store = snapshot.load_current(SNAPSHOT_DIR)
+        if store is None:
+            return False
+        publish_store(store)
+        DATA_STATUS.update(source="snapshot", snapshot_version=store.version,
+                           watermark=store.watermark())
+        print(f"💾 Snapshot {store.version} mapped: {len(store)} rows "
+              f"in {(time.perf_counter() - started) * 1000:.1f}ms")
+        return True
+    finally:
+        _ADOPT_LOCK.release()
+
+def restore_snapshot():
+    """Memory-map the last snapshot so requests can be served before Supabase answers"""
+    if adopt_current_snapshot(force=True):
+        return True
+    print("💾 No snapshot found; waiting for the first Supabase load")
+    return False
+
+def after_fork():
+    """Per-worker reset after gunicorn forks the preloaded app.
+
+    Locks held by a master thread at fork time would stay locked forever in
+    the child, and pooled sockets or gRPC channels must not be shared, so
+    they are recreated. The dataset itself is inherited copy-on-write.
+    """
+    global _LOAD_LOCK, _ADOPT_LOCK, _PUBLISH_LOCK, _CHAT_MODEL, _CHAT_MODEL_LOCK, _DERIVED_LOCK
+    global govdata_loader
+    _LOAD_LOCK = threading.Lock()
+    _PUBLISH_LOCK = threading.Lock()
+    _DERIVED_LOCK = threading.Lock()
+    _ADOPT_LOCK = threading.Lock()
+    _CHAT_MODEL = None
+    _CHAT_MODEL_LOCK = threading.Lock()
+    govdata_loader = make_govdata_loader()
+    snapshot.forget_sync_leader()
+    metrics.reset_process_start()
+    # The embedding model is loaded per worker, never in the master before fork
+    if RETRIEVER is not None:
+        RETRIEVER.warm_in_background()
+
+def reconcile_in_background(mode):
+    """Sync with Supabase off the import path; /ready flips to current when done"""
+    def run():
+        if not snapshot.claim_sync_leader(SNAPSHOT_DIR):
+            print("🔁 Another process syncs Supabase; following its snapshots")
+            return
+        load_health_data(mode=mode)
+
+    thread = threading.Thread(target=run, name="supabase-reconcile", daemon=True)
+    thread.start()
+    return thread
+
+def start_sync_scheduler(interval_seconds):
+    """Run incremental syncs every ``interval_seconds`` on a daemon thread.
+
+    Started at import, so under gunicorn's ``preload_app`` it runs in the
+    master only: threads are not copied into forked workers, which just
+    follow CURRENT. The master also claims the sync lock during its startup
+    reconcile, so it is the one process that syncs. The lock matters across
+    independent processes sharing SNAPSHOT_DIR (several ``python app.py`` or
+    unpreloaded servers): those that lose it keep checking each interval and
+    take over if the leader exits.
+    """
+    def run():
         while True:
-            response = supabase.table('govdata').select("*").range(offset, offset + page_size - 1).execute()
-            
-            if not response.data:
-                break
-                
-            all_data.extend(response.data)
-            print(f"📊 Loaded {len(response.data)} rows (total so far: {len(all_data)})")
-            
-            # If we got less than page_size, we're done
-            if len(response.data) < page_size:
-                break
-                
-            offset += page_size
-        
-        print(f"📊 Total rows loaded from Supabase: {len(all_data)}")
-        
-        if all_data:
-            HEALTH_DATA_CACHE = all_data
-            print(f"✅ Complete Supabase data loaded: {len(HEALTH_DATA_CACHE)} rows")
-        else:
-            print("❌ No data found in Supabase")
-            
-    except Exception as e:
-        print(f"❌ Failed to load data from Supabase: {e}")
-        HEALTH_DATA_CACHE = []
+            time.sleep(interval_seconds)
+            if snapshot.claim_sync_leader(SNAPSHOT_DIR):
+                load_health_data(mode="incremental")
+
+    thread = threading.Thread(target=run, name="supabase-sync", daemon=True)
+    thread.start()
+    print(f"⏱️ Background Supabase sync every {interval_seconds}s")
+    return thread
+
+# Serve the snapshot immediately, then catch up with Supabase in the background.
+# With no snapshot the first load is a full one (STARTUP_SYNC_MODE=full forces that).
+STARTUP_SYNC_MODE = os.environ.get("STARTUP_SYNC_MODE", "incremental")
+restore_snapshot()
+reconcile_in_background(STARTUP_SYNC_MODE if len(HEALTH_STORE) else "full")
 
-# Load data on startup
-load_health_data()
+# Optional periodic delta sync (SYNC_INTERVAL_SECONDS=0 disables it)
+SYNC_INTERVAL_SECONDS = int(os.environ.get("SYNC_INTERVAL_SECONDS", 0))
+if SYNC_INTERVAL_SECONDS > 0:
+    start_sync_scheduler(SYNC_INTERVAL_SECONDS)
 
 # Load GeoJSON (unchanged)
 try:
     geojson_path = os.path.join(APP_ROOT, "static", "data", "maharashtradist.geojson")
     with open(geojson_path, "r") as f:
         GEO_DATA_CACHE = json.load(f)
+    GEO_DISTRICT_INDEX = DistrictIndex(GEO_DATA_CACHE.get("features", []))
+    MAP_GEOMETRY = MapGeometry(GEO_DATA_CACHE)
+    MAP_GEOMETRY_BODIES = {resolution: httpcache.Body(body, "application/geo+json")
+                           for resolution, body in MAP_GEOMETRY.bodies.items()}
     print("GeoJSON loaded ✅")
 except:
     print("WARNING: GeoJSON not found")
 
 # --------------------- INTENT PARSER ---------------------
-def parse_intent(query: str):
-    """Extract year, metric, diseases, and areas from the query"""
+# Structures derived from the served store (entity matcher, analytics engine),
+# rebuilt on first use after a refresh changes the dataset version
+_DERIVED = {}  # name -> (dataset version, object)
+_DERIVED_LOCK = threading.Lock()
+
+def derived(store, name, build):
+    """``build(store)``, cached until the dataset version changes"""
+    version, value = _DERIVED.get(name, (None, None))
+    if version != store.version:
+        with _DERIVED_LOCK:
+            version, value = _DERIVED.get(name, (None, None))
+            if version != store.version:
+                started = time.perf_counter()
+                value = build(store)
+                _DERIVED[name] = (store.version, value)
+                print(f"🔧 Built {name} for {store.version} "
+                      f"in {(time.perf_counter() - started) * 1000:.1f}ms")
+    return value
+
+def insight_cache_stats():
+    """Result-cache counters of the current insight engine; empty until one is built"""
+    _, engine = _DERIVED.get("insight engine", (None, None))
+    return engine.stats if engine is not None else {}
+
+def get_entity_matcher(store):
+    return derived(store, "entity matcher", EntityMatcher.from_store)
+
+def parse_intent(query: str, store=None):
+    """Extract year, metric, diseases, and areas from the query.
+
+    Areas and diseases are whatever names from the dataset (or their aliases)
+    the query mentions; ``area_codes``/``disease_codes`` are their vocabulary
+    codes in ``store`` (None when the query names none).
+    """
+    store = HEALTH_STORE if store is None else store
     query_lower = query.lower()
 
     year_match = re.search(r"(20\d{2})", query)
-    diseases = ['malaria', 'dengue', 'chikungunya', 'fever', 'diarrheal', 'poisoning']
-    areas = ['mumbai', 'pune', 'nagpur', 'nashik', 'aurangabad']
+    entities = get_entity_matcher(store).match(query)
 
     intent = {
         "year": int(year_match.group(1)) if year_match else None,
         "metric": "both",  # default to both
-        "diseases": [d for d in diseases if d in query_lower],
-        "areas": [a for a in areas if a in query_lower]
+        **entities,
     }
 
-    if any(word in query_lower for word in ["death", "fatalities", "mortality"]):
+    # Asking about both ("cases and deaths") keeps the default
+    wants_deaths = any(word in query_lower for word in ["death", "fatalities", "mortality"])
+    wants_cases = any(word in query_lower for word in ["case", "outbreak", "incident"])
+    if wants_deaths and not wants_cases:
         intent["metric"] = "deaths"
-    elif any(word in query_lower for word in ["case", "outbreak", "incident"]):
+    elif wants_cases and not wants_deaths:
         intent["metric"] = "cases"
 
     return intent
 
-# --------------------- DATA FILTERING (Native Python) ---------------------
-def filter_data(intent):
-    if not HEALTH_DATA_CACHE:
-        return []
+# --------------------- DATA FILTERING (Vectorized) ---------------------
+def intent_codes(intent, store):
+    """Vocabulary codes for the intent's areas/diseases (None = all)"""
+    area_codes, disease_codes = intent.get("area_codes"), intent.get("disease_codes")
+    if area_codes is None and intent["areas"]:
+        area_codes = store.codes_matching(store.areas, intent["areas"])
+    if disease_codes is None and intent["diseases"]:
+        disease_codes = store.codes_matching(store.diseases, intent["diseases"])
+    return area_codes, disease_codes
 
-    filtered_data = []
-    
-    for row in HEALTH_DATA_CACHE:
-        # Filter by year
-        if intent["year"] and int(row.get("Year", 0)) != intent["year"]:
-            continue
-            
-        # Filter by diseases
-        if intent["diseases"]:
-            disease = str(row.get("Disease", "")).lower()
-            if not any(d in disease for d in intent["diseases"]):
-                continue
-                
-        # Filter by areas
-        if intent["areas"]:
-            area = str(row.get("Area", "")).lower()
-            if not any(a in area for a in intent["areas"]):
-                continue
-        
-        # Convert numeric fields
-        row_copy = row.copy()
-        row_copy["deaths_numeric"] = int(row.get("No of deaths", 0) or 0)
-        row_copy["cases_numeric"] = int(row.get("No of cases", 0) or 0)
-        
-        filtered_data.append(row_copy)
+def filter_data(intent, store):
+    """Return a boolean row mask over ``store`` for the parsed intent"""
+    if not len(store):
+        return np.zeros(0, dtype=bool)
 
-    return filtered_data
+    area_codes, disease_codes = intent_codes(intent, store)
+    return store.mask(year=intent["year"], area_codes=area_codes, disease_codes=disease_codes)
 
-def summarize_data(filtered_data, intent):
-    if not filtered_data:
+def summarize_data(intent, store):
+    """Build summary lines for the intent from the pre-aggregated cube"""
+    area_codes, disease_codes = intent_codes(intent, store)
+    by_disease = store.cube.rollup(keep=("disease",), year=intent["year"],
+                                   areas=area_codes, diseases=disease_codes)
+    if not by_disease["rows"].any():
         return ["No matching data found."]
 
-    total_deaths = sum(row["deaths_numeric"] for row in filtered_data)
-    total_cases = sum(row["cases_numeric"] for row in filtered_data)
+    total_deaths = int(by_disease["deaths"].sum())
+    total_cases = int(by_disease["cases"].sum())
 
     result = []
     year_txt = f" in {intent['year']}" if intent['year'] else ""
@@ -158,40 +486,656 @@ def summarize_data(filtered_data, intent):
     else:
         result.append(f"Summary{year_txt}: {total_cases} cases and {total_deaths} deaths")
 
-    # Group by disease
-    disease_summary = {}
-    for row in filtered_data:
-        disease = row.get("Disease", "Unknown")
-        if disease not in disease_summary:
-            disease_summary[disease] = {"cases": 0, "deaths": 0}
-        disease_summary[disease]["cases"] += row["cases_numeric"]
-        disease_summary[disease]["deaths"] += row["deaths_numeric"]
+    # Rolled-up axis is the disease selection (or every disease code)
+    codes = np.arange(len(store.diseases)) if disease_codes is None else disease_codes
+    present = np.flatnonzero(by_disease["rows"])
 
     # Sort by cases and take top 5
-    sorted_diseases = sorted(disease_summary.items(), 
-                           key=lambda x: x[1]["cases"], 
-                           reverse=True)[:5]
+    top = present[np.argsort(-by_disease["cases"][present], kind="stable")][:5]
 
-    for disease, data in sorted_diseases:
-        result.append(f"{disease}: {data['cases']} cases, {data['deaths']} deaths")
+    for i in top:
+        disease = store.diseases[codes[i]] or "Unknown"
+        result.append(f"{disease}: {by_disease['cases'][i]} cases, {by_disease['deaths'][i]} deaths")
 
     return result
 
+# --------------------- DASHBOARD AGGREGATES ---------------------
+MONTH_LABELS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+# Week slot -> month index, same approximation the dashboard used (1-4=Jan, 5-8=Feb, ...)
+WEEK_TO_MONTH = np.array([-1] + [min(11, (w - 1) // 4) for w in range(1, 54)])
+
+def label_groups(vocabulary):
+    """Group vocabulary codes by trimmed display name, skipping blanks/'Unknown'.
+
+    Returns (labels, group) where group[code] is the label index or -1.
+    """
+    labels, lookup = [], {}
+    group = np.full(len(vocabulary), -1, dtype=np.intp)
+    for code, name in enumerate(vocabulary):
+        label = name.strip()
+        if not label or label == "Unknown":
+            continue
+        if label not in lookup:
+            lookup[label] = len(labels)
+            labels.append(label)
+        group[code] = lookup[label]
+    return labels, group
+
+def grouped_totals(values, vocabulary):
+    """Sum a per-code vector into per-display-name totals"""
+    labels, group = label_groups(vocabulary)
+    valid = group >= 0
+    totals = np.bincount(group[valid], weights=values[valid], minlength=len(labels))
+    return labels, totals.astype(np.int64)
+
+def top_labels(labels, totals, top):
+    order = np.argsort(-totals, kind="stable")[:top]
+    return [(labels[i], int(totals[i])) for i in order if totals[i] > 0]
+
+def region_codes(store, region):
+    """Area codes whose trimmed name equals the region ('all' -> None)"""
+    if not region or region == "all":
+        return None
+    return np.array([code for code, name in enumerate(store.areas) if name.strip() == region],
+                    dtype=np.int32)
+
+# --------------------- CHAT ANSWERS ---------------------
+# Gemini answers keyed on what the answer depends on, so repeated briefing
+# questions (and identical ones arriving together) cost one LLM call
+ANSWER_CACHE = AnswerCache(
+    maxsize=int(os.environ.get("ANSWER_CACHE_SIZE", 256)),
+    ttl=float(os.environ.get("ANSWER_CACHE_TTL", 300)),
+    wait_timeout=float(os.environ.get("ANSWER_WAIT_TIMEOUT", 60)),
+)
+
+def answer_key(intent, context_text, version):
+    """Normalized intent + summary + dataset version.
+
+    Entities are keyed by their codes, so spelling variants share an answer.
+    """
+    def codes(values):
+        return None if values is None else tuple(int(code) for code in values)
+
+    return (
+        intent["year"], intent["metric"],
+        codes(intent.get("disease_codes")), codes(intent.get("area_codes")),
+        context_text, version,
+    )
+
+# Related insights from the Chroma collection built by vectordb.py, merged
+# after the structured summary within CONTEXT_TOKEN_BUDGET
+RETRIEVER = InsightRetriever(
+    persist_directory=os.path.join(APP_ROOT, "db"),
+    top_k=int(os.environ.get("RETRIEVAL_TOP_K", 4)),
+    cache_size=int(os.environ.get("EMBEDDING_CACHE_SIZE", 512)),
+)
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", 600))
+if os.environ.get("RETRIEVAL_ENABLED", "1") == "0":
+    RETRIEVER = None
+
+@contextmanager
+def stage(timings, name):
+    """Record the milliseconds spent in a block under ``timings[name]``"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = round((time.perf_counter() - started) * 1000, 2)
+
+def build_prompt(context_text, user_message):
+    return f"""Based on this Maharashtra health data, answer the user's question:
+
+DATA:
+{context_text}
+
+USER QUESTION: {user_message}
+
+Provide a clear, factual answer using only the data above:"""
+
+GEMINI_MODEL = os.environ.get("GEMINI_MODEL", "gemini-1.5-flash")
+_CHAT_MODEL = None
+_CHAT_MODEL_LOCK = threading.Lock()
+
+def get_chat_model():
+    """One GenerativeModel per process, created on first use"""
+    global _CHAT_MODEL
+    if _CHAT_MODEL is None:
+        with _CHAT_MODEL_LOCK:
+            if _CHAT_MODEL is None:
+                _CHAT_MODEL = genai.GenerativeModel(GEMINI_MODEL)
+    return _CHAT_MODEL
+
+def ask_gemini(prompt, fallback):
+    response = get_chat_model().generate_content(prompt)
+    return response.text if response and response.text else fallback
+
+def stream_gemini(prompt):
+    """Yield answer text chunks as Gemini generates them"""
+    for chunk in get_chat_model().generate_content(prompt, stream=True):
+        try:
+            text = chunk.text
+        except ValueError:
+            # Chunks without text parts (e.g. safety metadata) carry nothing to show
+            continue
+        if text:
+            yield text
+
+def plan_chat_reply(user_message):
+    """Parse, summarize and decide how to answer a chat question.
+
+    Returns a dict with either a finished ``reply`` (template, no data) or,
+    for open-ended questions, the ``prompt``/``key``/``fallback`` needed to
+    ask Gemini. Shared by the buffered and the streaming chat routes.
+    ``timings`` holds the milliseconds spent in each stage and ``log`` the
+    fields of the sampled chat event.
+    """
+    timings = {}
+
+    # Pin the store for this request so a concurrent refresh can't swap it mid-way
+    store = HEALTH_STORE
+
+    with stage(timings, "parse"):
+        intent = parse_intent(user_message, store)
+
+    # Matching rows and totals for the intent straight from the cube
+    with stage(timings, "filter"):
+        area_codes, disease_codes = intent_codes(intent, store)
+        totals = store.cube.totals(year=intent["year"], areas=area_codes, diseases=disease_codes)
+
+    with stage(timings, "summarize"):
+        structured_summary = summarize_data(intent, store)
+
+    log = {
+        "query": user_message,
+        "intent": {key: intent[key] for key in ("year", "metric", "areas", "diseases")},
+        "rows": totals["rows"], "cases": totals["cases"], "deaths": totals["deaths"],
+    }
+    if not structured_summary or "No matching data" in structured_summary[0]:
+        return {"reply": structured_summary[0], "source": "no_data", "timings": timings, "log": log}
+
+    if is_fully_structured(user_message, intent):
+        # Fully answered by the summary: no LLM round trip
+        bot_reply = render_answer(intent, totals, structured_summary)
+        return {"reply": bot_reply, "source": "template", "timings": timings, "log": log}
+
+    # Open-ended: add the nearest knowledge-base insights to the context
+    passages = []
+    if RETRIEVER is not None:
+        try:
+            passages = RETRIEVER.search(user_message, timings=timings)
+        except Exception as e:
+            CHAT_LOG.log("retrieval_error", always=True, query=user_message, error=str(e))
+    context_text = "\n".join(merge_context(structured_summary, passages, CONTEXT_TOKEN_BUDGET))
+    log["passages"] = len(passages)
+
+    return {
+        "reply": None,
+        "source": "llm",
+        "prompt": build_prompt(context_text, user_message),
+        "key": answer_key(intent, context_text, store.version),
+        "fallback": structured_summary[0],
+        "timings": timings,
+        "log": log,
+    }
+
+def record_chat(plan, source, reply):
+    """Stage histograms and reply counter for one answered chat, plus the sampled event"""
+    timings = plan["timings"]
+    for name, ms in timings.items():
+        CHAT_STAGE_LATENCY.observe(ms / 1000, stage=name)
+    CHAT_REPLIES.inc(source=source)
+    if CHAT_LOG.sampled():
+        CHAT_LOG.write("chat", **plan["log"], source=source, reply_chars=len(reply or ""),
+                       timings_ms=timings)
+
+# Values other objects already count, read at scrape time
+DATASET_ROWS.track(lambda: len(HEALTH_STORE))
+DATASET_VOCABULARY.track(lambda: len(HEALTH_STORE.areas), kind="areas")
+DATASET_VOCABULARY.track(lambda: len(HEALTH_STORE.diseases), kind="diseases")
+for _result in ("hit", "miss", "coalesced"):
+    CACHE_LOOKUPS.track(lambda result=_result: ANSWER_CACHE.stats[result], cache="answer", result=_result)
+    CACHE_LOOKUPS.track(lambda result=_result: insight_cache_stats().get(result, 0),
+                        cache="insights", result=_result)
+CACHE_LOOKUPS.track(lambda: ANSWER_CACHE.stats["wait_timeout"], cache="answer", result="wait_timeout")
+if RETRIEVER is not None:
+    CACHE_LOOKUPS.track(lambda: RETRIEVER.stats["embed_hit"], cache="embedding", result="hit")
+    CACHE_LOOKUPS.track(lambda: RETRIEVER.stats["embed_miss"], cache="embedding", result="miss")
+
 # --------------------- ROUTES ---------------------
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.before_request
+def follow_shared_snapshot():
+    """Pick up a refresh published by any worker before serving this request"""
+    adopt_current_snapshot()
+
+@app.after_request
+def record_request_latency(response):
+    """Latency per route template (not per URL, so years and views don't multiply series)"""
+    started = g.pop("request_started", None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        REQUEST_LATENCY.observe(time.perf_counter() - started, route=route,
+                                method=request.method, status=response.status_code)
+    return response
+
+@app.route("/metrics")
+def metrics_endpoint():
+    """Prometheus scrape target for this worker's metrics"""
+    return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
+
+def dataset_versioned(view):
+    """Validators and a shared, pre-compressed body for a GET route that only depends on the data.
+
+    The strong ETag is derived from the dataset version and the URL, so a
+    matching If-None-Match gets a 304 without running the view. Otherwise
+    the body rendered for this version and URL is reused (and gzipped at
+    most once). Error responses, and responses that raced a refresh, are
+    passed through without a validator; streamed ones get the ETag only.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        version = HEALTH_STORE.version
+        query = tuple(sorted(request.args.items(multi=True)))
+        etag = httpcache.etag_for(version, request.path, query)
+        headers = {"X-Dataset-Version": version}
+        unchanged = httpcache.not_modified_response(request, etag, headers=headers)
+        if unchanged is not None:
+            CACHE_LOOKUPS.inc(cache="response", result="not_modified")
+            return unchanged
+
+        key = (version, request.path, query)
+        body = RESPONSE_CACHE.get(key)
+        CACHE_LOOKUPS.inc(cache="response", result="miss" if body is None else "hit")
+        if body is None:
+            response = app.make_response(view(*args, **kwargs))
+            if response.status_code != 200 or HEALTH_STORE.version != version:
+                return response
+            if response.is_streamed:
+                response.set_etag(etag)
+                response.headers.update({"Cache-Control": httpcache.REVALIDATE, **headers})
+                return response
+            body = httpcache.Body(response.get_data(), response.mimetype)
+            if len(body) <= RESPONSE_CACHE_MAX_BODY:
+                RESPONSE_CACHE.put(key, body)
+        return httpcache.respond(request, body, etag, headers=headers)
+    return wrapper
+
+# Static files with content-digest ETags and gzip; asset_url() links carry the
+# digest as ?v=, and those URLs may be cached for good
+STATIC_ASSETS = httpcache.StaticAssets(app.static_folder)
+
+def static_asset(filename):
+    asset = STATIC_ASSETS.get(filename)
+    if asset is None:
+        return app.send_static_file(filename)  # binary, large or missing: Flask's own handling
+    body, digest = asset
+    fingerprinted = request.args.get("v") == digest
+    return httpcache.respond(request, body, digest,
+                             cache_control=httpcache.IMMUTABLE if fingerprinted else httpcache.REVALIDATE)
+
+app.view_functions["static"] = static_asset
+
+@app.template_global()
+def asset_url(filename):
+    """URL of a static file fingerprinted with its content digest"""
+    return url_for("static", filename=filename, v=STATIC_ASSETS.digest(filename))
+
 @app.route("/")
 def index():
     return render_template("index.html")
 
+# --------------------- /data EXPORT ---------------------
+MAX_PAGE_SIZE = 5000
+STREAM_BATCH_ROWS = 1000
+
+class BadArgument(ValueError):
+    """A query parameter that is present but unusable; answered with a 400"""
+
+@app.errorhandler(BadArgument)
+def bad_argument(e):
+    return jsonify({"error": str(e)}), 400
+
+def int_arg(name, default=None):
+    """``?name=`` as an int; absent or empty gives ``default``, anything unparseable a 400"""
+    raw = request.args.get(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return int(raw)
+    except ValueError:
+        raise BadArgument(f"{name} must be an integer, got {raw!r}")
+
+def _arg_list(name):
+    """Collect ?name=a,b&name=c into ['a', 'b', 'c']"""
+    values = []
+    for raw in request.args.getlist(name):
+        values.extend(v for v in raw.split(",") if v.strip())
+    return values
+
+def encode_cursor(next_row, version):
+    """Opaque cursor: the next row position in the dataset version it was issued for"""
+    return base64.urlsafe_b64encode(json.dumps({"row": next_row, "v": version}).encode()).decode()
+
+def decode_cursor(cursor):
+    """``(row, version)`` from a cursor; ValueError if it is malformed"""
+    try:
+        fields = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        row, version = int(fields["row"]), str(fields["v"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("invalid cursor")
+    if row < 0:
+        raise ValueError("invalid cursor")
+    return row, version
+
+def export_mask(store):
+    """Row mask for the /data query-string filters"""
+    areas, diseases = _arg_list("area"), _arg_list("disease")
+    return store.mask(
+        year=int_arg("year"),
+        week=int_arg("week"),
+        area_codes=store.codes_named(store.areas, areas) if areas else None,
+        disease_codes=store.codes_named(store.diseases, diseases) if diseases else None,
+    )
+
+def stream_records(store, index, fields):
+    """Yield a JSON array of row objects in batches instead of one big dump"""
+    yield "["
+    for start in range(0, len(index), STREAM_BATCH_ROWS):
+        batch = store.to_records(index[start:start + STREAM_BATCH_ROWS], fields)
+        body = ",".join(json.dumps(row) for row in batch)
+        yield ("," if start else "") + body
+    yield "]"
+
 @app.route("/data")
+@dataset_versioned
 def get_health_data():
-    """Return data for frontend"""
-    return jsonify(HEALTH_DATA_CACHE)
+    """Return rows for export.
+
+    Query parameters (all optional):
+      year, week, area, disease  filters (area/disease accept comma lists)
+      fields                     comma list of columns to include
+      format                     'rows' (default) or 'columnar'
+      limit, cursor              page size and the opaque cursor from the previous page
+                                 (409 once the dataset has changed under the cursor)
+    Without ``limit`` and with the default format the response is the plain
+    list of rows, streamed.
+    """
+    store = HEALTH_STORE
+
+    fields = _arg_list("fields") or COLUMNS
+    unknown = [f for f in fields if f not in COLUMNS]
+    if unknown:
+        return jsonify({"error": f"Unknown fields: {unknown}", "columns": COLUMNS}), 400
+
+    output_format = request.args.get("format", "rows")
+    if output_format not in ("rows", "columnar"):
+        return jsonify({"error": "format must be 'rows' or 'columnar'"}), 400
+
+    limit = int_arg("limit")
+    start_row = 0
+    if "cursor" in request.args:
+        try:
+            start_row, cursor_version = decode_cursor(request.args["cursor"])
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        # Positions only mean something in the version that issued them: a refresh reorders rows
+        if cursor_version != store.version:
+            return jsonify({"error": "dataset changed since this cursor was issued; start again",
+                            "version": store.version}), 409
+
+    mask = export_mask(store)
+    mask[:start_row] = False
+    index = np.flatnonzero(mask)
+
+    if limit is None and output_format == "rows":
+        return Response(stream_with_context(stream_records(store, index, fields)),
+                        mimetype="application/json")
+
+    next_cursor = None
+    if limit is not None:
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        if len(index) > limit:
+            next_cursor = encode_cursor(int(index[limit - 1]) + 1, store.version)
+        index = index[:limit]
+
+    payload = {"count": len(index), "next_cursor": next_cursor}
+    if output_format == "columnar":
+        payload["columns"], payload["lookup"] = store.columnar(index, fields)
+    else:
+        payload["data"] = store.to_records(index, fields)
+    return jsonify(payload)
+
+@app.route("/api/filters")
+@dataset_versioned
+def dashboard_filters():
+    """Year, week and region options for the dashboard dropdowns"""
+    store = HEALTH_STORE
+    years = sorted((int(y) for y in store.cube.years if y > 0), reverse=True)
+    week_rows = store.cube.rollup(keep=("week",))["rows"]
+    weeks = [int(w) for w in np.flatnonzero(week_rows) if w > 0]
+    regions = sorted(label_groups(store.areas)[0])
+    return jsonify({"years": years, "weeks": weeks, "regions": regions})
+
+@app.route("/api/indicators")
+@dataset_versioned
+def dashboard_indicators():
+    """Key indicators (cases, deaths, top district) for a year/week/region"""
+    store = HEALTH_STORE
+    year = int_arg("year")
+    week = int_arg("week")
+    region = request.args.get("region", "all")
+    if year is None:
+        return jsonify({"error": "year is required"}), 400
+
+    area_codes = region_codes(store, region)
+    by_area = store.cube.rollup(keep=("area",), year=year, week=week, areas=area_codes)
+    area_vocab = store.areas if area_codes is None else [store.areas[c] for c in area_codes]
+    top = top_labels(*grouped_totals(by_area["cases"], area_vocab), top=1)
+
+    return jsonify({
+        "year": year,
+        "week": week,
+        "region": region,
+        "total_cases": int(by_area["cases"].sum()),
+        "total_deaths": int(by_area["deaths"].sum()),
+        "rows": int(by_area["rows"].sum()),
+        "top_city": {"name": top[0][0], "cases": top[0][1]} if top else None,
+    })
+
+@app.route("/api/disease-trend")
+@dataset_versioned
+def dashboard_disease_trend():
+    """Monthly cases for the year's top-N diseases"""
+    store = HEALTH_STORE
+    year = int_arg("year")
+    top = int_arg("top", default=5)
+    if year is None:
+        return jsonify({"error": "year is required"}), 400
+
+    by_week = store.cube.rollup(keep=("week", "disease"), year=year)["cases"]
+    labels, group = label_groups(store.diseases)
+
+    # (week, code) -> (month, disease label)
+    monthly = np.zeros((12, len(labels)), dtype=np.int64)
+    weeks, codes = np.nonzero(by_week)
+    keep = (WEEK_TO_MONTH[weeks] >= 0) & (group[codes] >= 0)
+    np.add.at(monthly, (WEEK_TO_MONTH[weeks[keep]], group[codes[keep]]), by_week[weeks[keep], codes[keep]])
+
+    leaders = top_labels(*grouped_totals(by_week.sum(axis=0), store.diseases), top=top)
+    index = {label: i for i, label in enumerate(labels)}
+    return jsonify({
+        "year": year,
+        "labels": MONTH_LABELS,
+        "datasets": [{"label": name, "data": monthly[:, index[name]].tolist()} for name, _ in leaders],
+    })
+
+@app.route("/api/regional")
+@dataset_versioned
+def dashboard_regional():
+    """Top-N districts by total cases for a year"""
+    store = HEALTH_STORE
+    year = int_arg("year")
+    top = int_arg("top", default=5)
+    if year is None:
+        return jsonify({"error": "year is required"}), 400
+
+    by_area = store.cube.rollup(keep=("area",), year=year)["cases"]
+    leaders = top_labels(*grouped_totals(by_area, store.areas), top=top)
+    return jsonify({
+        "year": year,
+        "labels": [name for name, _ in leaders],
+        "data": [cases for _, cases in leaders],
+    })
+
+# --------------------- /api/insights (chatbot.py analytics) ---------------------
+# view -> (InsightEngine method, required query parameters, optional ones)
+INSIGHT_VIEWS = {
+    "seasonality": ("seasonality", ["disease"], []),
+    "hotspots": ("hotspots", ["disease"], []),
+    "fatality-rate": ("fatality_rate", ["disease"], []),
+    "yearly-trends": ("yearly_trends", ["disease"], []),
+    "district-profile": ("district_profile", ["area"], []),
+    "monthly-risk": ("monthly_risk", ["area", "month"], []),
+    "compare-districts": ("compare_districts", ["disease", "district1", "district2"], []),
+    "response-time": ("average_response_time", [], ["by"]),
+}
+
+def get_insight_engine(store):
+    return derived(store, "insight engine", InsightEngine.from_store)
+
+@app.route("/api/insights")
+@dataset_versioned
+def insight_index():
+    """Available insight views and the names they accept"""
+    engine = get_insight_engine(HEALTH_STORE)
+    return jsonify({
+        "views": {view: {"required": required, "optional": optional}
+                  for view, (_, required, optional) in INSIGHT_VIEWS.items()},
+        "diseases": engine.diseases,
+        "areas": engine.areas,
+    })
+
+@app.route("/api/insights/<view>")
+@dataset_versioned
+def insight_view(view):
+    """One chatbot.py insight, e.g. /api/insights/seasonality?disease=Dengue"""
+    if view not in INSIGHT_VIEWS:
+        return jsonify({"error": f"unknown view '{view}'", "views": sorted(INSIGHT_VIEWS)}), 404
+    method, required, optional = INSIGHT_VIEWS[view]
+    args = {}
+    for name in required:
+        value = request.args.get(name, "").strip()
+        if not value:
+            return jsonify({"error": f"{name} is required"}), 400
+        args[name] = value
+    for name in optional:
+        if request.args.get(name):
+            args[name] = request.args[name].strip()
+
+    store = HEALTH_STORE
+    result = getattr(get_insight_engine(store), method)(**args)
+    return jsonify({"view": view, **args, "version": store.version, "result": result})
+
+# --------------------- /api/recent-outbreaks ---------------------
+RECENT_FIELDS = ["Date of reporting", "Area", "Disease", "No of cases", "No of deaths"]
+
+@app.route("/api/recent-outbreaks")
+@dataset_versioned
+def recent_outbreaks():
+    """Reports in a reporting-date window, newest first.
+
+    ``?days=30`` (default) counts back from the latest reporting date;
+    ``?start=&end=`` (dd-mm-yyyy) or ``?year=&week=`` (ISO week) pick a
+    window instead. Only the rows inside the window are read.
+    """
+    store = HEALTH_STORE
+    timeline = store.timeline
+    limit = max(0, min(int_arg("limit", default=100), MAX_PAGE_SIZE))
+    start, end = request.args.get("start"), request.args.get("end")
+    year, week = int_arg("year"), int_arg("week")
+
+    if start or end:
+        start_day = parse_day(start) if start else None
+        end_day = parse_day(end) if end else None
+        if MISSING_DAY in (start_day, end_day):
+            return jsonify({"error": "start/end must be dates like 31-12-2024"}), 400
+        rows = timeline.window(start_day, end_day)
+    elif year is not None and week is not None:
+        try:
+            rows = timeline.iso_week(year, week)
+        except ValueError:
+            return jsonify({"error": f"{year} has no ISO week {week}"}), 400
+    else:
+        days = int_arg("days", default=30)
+        rows = timeline.last_days(max(0, days))
+
+    newest = rows[::-1][:limit]
+    return jsonify({
+        "latest": format_day(timeline.latest_day) if timeline.latest_day else None,
+        "count": len(rows),
+        "data": store.to_records(newest, RECENT_FIELDS),
+    })
+
+@app.route("/api/anomalies")
+@dataset_versioned
+def current_anomalies():
+    """Ranked case spikes in the latest reported week (?area=, ?disease=, ?limit=)"""
+    current = ANOMALY_DETECTOR.current
+    area = request.args.get("area", "").strip().lower()
+    disease = request.args.get("disease", "").strip().lower()
+    limit = max(0, int_arg("limit", default=50))
+    anomalies = [
+        a for a in current["anomalies"]
+        if (not area or a["area"].lower() == area) and (not disease or a["disease"].lower() == disease)
+    ]
+    week = current["week"]
+    return jsonify({
+        "version": current["version"],
+        "week": {"year": week[0], "week": week[1]} if week else None,
+        "count": len(anomalies),
+        "anomalies": anomalies[:limit],
+    })
 
 @app.route('/refresh-data')
 def refresh_data():
-    """Manually refresh data from Supabase"""
-    load_health_data()
-    return jsonify({"status": "success", "rows": len(HEALTH_DATA_CACHE)})
+    """Manually refresh data from Supabase (?mode=incremental for a delta sync)"""
+    mode = request.args.get("mode", "full")
+    if mode not in ("full", "incremental"):
+        return jsonify({"status": "error", "error": "mode must be 'full' or 'incremental'"}), 400
+    if not load_health_data(mode=mode):
+        return jsonify({"status": "error", "error": "Load failed; previous data kept",
+                        "rows": len(HEALTH_STORE)}), 502
+    return jsonify({"status": "success", "rows": len(HEALTH_STORE),
+                    "mode": DATA_STATUS["mode"], "fetched": DATA_STATUS["fetched"],
+                    **sync_coverage(HEALTH_STORE)})
+
+@app.route('/ready')
+def readiness():
+    """Readiness probe: 200 once there is data to serve (?require_current=1: once synced).
+
+    Data counts only once it is in a published snapshot: preloaded workers
+    get it from there, so a leader whose writes fail is not ready either.
+    """
+    store = HEALTH_STORE
+    status = {
+        "ready": len(store) > 0 and DATA_STATUS["snapshot_version"] is not None,
+        "snapshot_version": DATA_STATUS["snapshot_version"],
+        "current": DATA_STATUS["current"],
+        "source": DATA_STATUS["source"],
+        "rows": len(store),
+        "version": store.version if len(store) else None,
+        "last_sync": DATA_STATUS["at"],
+        "last_sync_mode": DATA_STATUS["mode"],
+        **sync_coverage(store),
+        "error": DATA_STATUS["error"],
+    }
+    require_current = request.args.get("require_current", "").lower() in ("1", "true", "yes")
+    ok = status["current"] if require_current else status["ready"]
+    return jsonify(status), 200 if ok else 503
 
 @app.route('/chat', methods=['POST'])
 def chat():
@@ -199,87 +1143,178 @@ def chat():
     user_message = data.get("message", "")
 
     if not user_message:
-        return jsonify({"response": "Please enter a question."})
+        return jsonify({"response": "Please enter a question.", "source": "no_data"})
 
     try:
-        print(f"\n🔍 USER QUERY: {user_message}")
-        
-        # Parse intent
-        intent = parse_intent(user_message)
-        print(f"🎯 INTENT: {intent}")
+        plan = plan_chat_reply(user_message)
+        timings = plan["timings"]
+        if plan["reply"] is not None:
+            bot_reply, source = plan["reply"], plan["source"]
+        else:
+            with stage(timings, "llm"):
+                bot_reply, cache_status = ANSWER_CACHE.get_or_compute(
+                    plan["key"], lambda: ask_gemini(plan["prompt"], plan["fallback"]))
+            source = "llm" if cache_status == "miss" else "cache"
 
-        # Filter data
-        filtered_data = filter_data(intent)
-        print(f"📊 FILTERED DATA: {len(filtered_data)} rows")
-        
-        if filtered_data:
-            total_cases = sum(row["cases_numeric"] for row in filtered_data)
-            total_deaths = sum(row["deaths_numeric"] for row in filtered_data)
-            print(f"💯 ACTUAL TOTALS: {total_cases} cases, {total_deaths} deaths")
-        
-        # Get structured summary
-        structured_summary = summarize_data(filtered_data, intent)
-        print(f"📋 SUMMARY: {structured_summary}")
+        payload = {"response": bot_reply, "source": source, "timings_ms": dict(timings)}
+        with stage(timings, "serialize"):
+            response = jsonify(payload)
+        record_chat(plan, source, bot_reply)
+        return response
 
-        if structured_summary and "No matching data" not in structured_summary[0]:
-            context_text = "\n".join(structured_summary)
-            
-            prompt = f"""Based on this Maharashtra health data, answer the user's question:
+    except Exception as e:
+        CHAT_REPLIES.inc(source="error")
+        CHAT_LOG.log("chat_error", always=True, query=user_message, error=str(e))
+        return jsonify({"response": f"Error: {str(e)}", "source": "error"})
 
-DATA:
-{context_text}
+def sse_event(data, event=None):
+    """Format one server-sent event"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
 
-USER QUESTION: {user_message}
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """Same answers as /chat, sent as server-sent events while Gemini generates.
 
-Provide a clear, factual answer using only the data above:"""
+    Emits ``data: {"delta": ...}`` events followed by one ``event: done`` with
+    the full response and its source (or ``event: error``).
+    """
+    data = request.get_json(silent=True) or {}
+    user_message = data.get("message", "")
 
-            model = genai.GenerativeModel('gemini-1.5-flash')
-            response = model.generate_content(prompt)
-            
-            bot_reply = response.text if response and response.text else structured_summary[0]
-            print(f"🤖 FINAL REPLY: {bot_reply}")
-        else:
-            bot_reply = structured_summary[0]
-            print(f"🤖 FALLBACK REPLY: {bot_reply}")
+    def generate():
+        if not user_message:
+            yield sse_event({"delta": "Please enter a question."})
+            yield sse_event({"response": "Please enter a question.", "source": "no_data"}, "done")
+            return
+        try:
+            plan = plan_chat_reply(user_message)
+            timings = plan["timings"]
+            if plan["reply"] is not None:
+                yield sse_event({"delta": plan["reply"]})
+                yield sse_event({"response": plan["reply"], "source": plan["source"],
+                                 "timings_ms": timings}, "done")
+                record_chat(plan, plan["source"], plan["reply"])
+                return
 
-        return jsonify({"response": bot_reply})
+            # Identical questions in flight wait for the first stream and replay its answer
+            with stage(timings, "llm_wait"):
+                cached, cache_status = ANSWER_CACHE.begin(plan["key"])
+            if cache_status != "miss":
+                yield sse_event({"delta": cached})
+                yield sse_event({"response": cached, "source": "cache", "timings_ms": timings}, "done")
+                record_chat(plan, "cache", cached)
+                return
 
-    except Exception as e:
-        print("❌ CHAT ERROR:", str(e))
-        return jsonify({"response": f"Error: {str(e)}"})
+            parts = []
+            started = time.perf_counter()
+            try:
+                for text in stream_gemini(plan["prompt"]):
+                    if not parts:
+                        timings["llm_first_token"] = round((time.perf_counter() - started) * 1000, 2)
+                    parts.append(text)
+                    yield sse_event({"delta": text})
+            except BaseException as e:
+                # Waiting streams get the error; a client hanging up is not theirs to report
+                ANSWER_CACHE.fail(plan["key"], e if isinstance(e, Exception)
+                                  else RuntimeError("the answer stream was interrupted"))
+                raise
+            timings["llm"] = round((time.perf_counter() - started) * 1000, 2)
+
+            bot_reply = "".join(parts) or plan["fallback"]
+            ANSWER_CACHE.finish(plan["key"], bot_reply, cache=bool(parts))
+            if not parts:
+                yield sse_event({"delta": bot_reply})
+            yield sse_event({"response": bot_reply, "source": "llm", "timings_ms": timings}, "done")
+            record_chat(plan, "llm", bot_reply)
+
+        except Exception as e:
+            CHAT_REPLIES.inc(source="error")
+            CHAT_LOG.log("chat_error", always=True, query=user_message, error=str(e), stream=True)
+            yield sse_event({"response": f"Error: {str(e)}", "source": "error"}, "error")
+
+    return Response(stream_with_context(generate()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def area_feature_positions(store):
+    """GeoJSON feature position for every area code (-1 = not on the map)"""
+    return np.array([GEO_DISTRICT_INDEX.feature_for(area) for area in store.areas], dtype=np.intp)
+
+def feature_cases(store, year):
+    """The year's cases per GeoJSON feature position"""
+    by_area = store.cube.rollup(keep=("area",), year=year)["cases"]
+    positions = area_feature_positions(store)
+    mapped = positions >= 0
+    return np.bincount(positions[mapped], weights=by_area[mapped],
+                       minlength=GEO_DISTRICT_INDEX.size).astype(np.int64)
+
+def render_map_counts(store, year):
+    """Serialize the compact per-year map: district name -> cases, plus the geometry URLs.
+
+    Districts without cases are left out; the browser joins the counts to
+    the cached geometry by name.
+    """
+    cases = {}
+    for name, count in zip(MAP_GEOMETRY.names, feature_cases(store, year).tolist()):
+        if count:
+            cases[name] = cases.get(name, 0) + count
+    payload = {"year": year, "version": store.version, "cases": cases,
+               "geometry": MAP_GEOMETRY.paths()}
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+def render_map_payload(store, year):
+    """Serialize the full district GeoJSON with the year's case counts attached (?format=geojson)"""
+    counts = feature_cases(store, year)
+
+    # Geometry is shared with GEO_DATA_CACHE; only the properties dicts are new
+    features = []
+    for feature, cases in zip(GEO_DATA_CACHE.get("features", []), counts.tolist()):
+        props = feature.get("properties", {})
+        district_name = str(props.get("DTNAME", "")).strip().lower()
+        features.append({**feature, "properties": {
+            **props, "cases": cases, "district_display": district_name.title(),
+        }})
+    return json.dumps({**GEO_DATA_CACHE, "features": features}).encode("utf-8")
+
+MAP_FORMATS = {"compact": render_map_counts, "geojson": render_map_payload}
 
 @app.route("/map_data/<int:year>")
+@dataset_versioned
 def get_map_data(year):
-    if GEO_DATA_CACHE is None or not HEALTH_DATA_CACHE:
+    """The year's cases per district.
+
+    By default a compact ``{"cases": {district: n}, "geometry": {resolution: url}}``
+    to join with /map_geometry; ``?format=geojson`` returns the full GeoJSON
+    with ``cases`` on every feature, as before.
+    """
+    store = HEALTH_STORE
+    if GEO_DATA_CACHE is None or not len(store):
         return jsonify({"error": "Data not available"}), 500
+    output_format = request.args.get("format", "compact")
+    if output_format not in MAP_FORMATS:
+        return jsonify({"error": f"format must be one of {sorted(MAP_FORMATS)}"}), 400
 
-    # Filter data for the year
-    year_data = [row for row in HEALTH_DATA_CACHE if int(row.get("Year", 0)) == year]
-    
-    # Group by area and sum cases
-    case_counts = {}
-    for row in year_data:
-        area = row.get("Area", "")
-        cases = int(row.get("No of cases", 0) or 0)
-        if area:
-            case_counts[area] = case_counts.get(area, 0) + cases
-
-    map_data_copy = json.loads(json.dumps(GEO_DATA_CACHE))
-    for feature in map_data_copy.get("features", []):
-        props = feature.get("properties", {})
-        district_name = str(props.get("DTNAME", "")).strip().lower()
-        
-        # Check for matches (case insensitive)
-        cases = 0
-        for area_name, count in case_counts.items():
-            if str(area_name).strip().lower() == district_name:
-                cases = count
-                break
-        
-        props["cases"] = cases
-        props["district_display"] = district_name.title()
+    return Response(MAP_FORMATS[output_format](store, year), mimetype="application/json")
+
+@app.route("/map_geometry/<resolution>.<digest>.json")
+def map_geometry(resolution, digest):
+    """District geometry at one resolution; fetched once, then served from the browser cache"""
+    if MAP_GEOMETRY is None:
+        return jsonify({"error": "Geometry not available"}), 500
+    if resolution not in MAP_GEOMETRY.bodies:
+        return jsonify({"error": f"resolution must be one of {sorted(MAP_GEOMETRY.bodies)}"}), 404
+    if digest != MAP_GEOMETRY.digests[resolution]:
+        # A page from before the geometry changed: send it to the current body
+        return redirect(MAP_GEOMETRY.path(resolution))
+    return httpcache.respond(request, MAP_GEOMETRY_BODIES[resolution], digest,
+                             cache_control=httpcache.IMMUTABLE)
 
-    return jsonify(map_data_copy)
+@app.route("/map_geometry")
+def map_geometry_index():
+    """Current geometry URLs per resolution"""
+    if MAP_GEOMETRY is None:
+        return jsonify({"error": "Geometry not available"}), 500
+    return jsonify({"default": DEFAULT_RESOLUTION, "geometry": MAP_GEOMETRY.paths()})
 
 @app.route('/approve-doctors')
 def approve_doctors():
@@ -289,6 +1324,7 @@ def approve_doctors():
 def debug_supabase():
     """Debug Supabase connection and table access"""
     try:
+        supabase = get_supabase()
         response = supabase.table('govdata').select("count", count="exact").execute()
         response2 = supabase.table('govdata').select("*").limit(3).execute()
             
@@ -309,5 +1345,7 @@ def debug_supabase():
 
 # --------------------- RUN ---------------------
 if __name__ == "__main__":
+    if RETRIEVER is not None:
+        RETRIEVER.warm_in_background()
     port = int(os.environ.get("PORT", 5000))
     app.run(host="0.0.0.0", port=port, debug=False)
\ No newline at end of file
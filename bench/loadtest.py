@@ -0,0 +1,316 @@
+# bench/loadtest.py
+"""Replay dashboard, map and chat traffic against the app and report per-route latency.
+
+    python -m bench.loadtest --rows 100k --workers 4 --concurrency 32 --duration 30
+    python -m bench.loadtest --url http://127.0.0.1:5000 --replay access.log
+
+Without ``--url`` the app is started under gunicorn (gunicorn.conf.py, with
+``--workers``/``--threads``) against the local Supabase and Gemini
+stand-ins (bench/serve.py) and stopped afterwards.
+
+Each virtual user loops over sessions drawn from the mix:
+
+  dashboard  a page load: /, its static assets and the dashboard API calls
+  map        the year slider: /map_data/<year> for a few years
+  data       an export page from /data
+  chat       one question to /chat, template- or LLM-answered
+
+``--mix dashboard=2,map=5,data=1,chat=2`` sets the weights. ``--replay``
+instead cycles through recorded requests: JSON lines with ``method``,
+``path`` and an optional ``body``, or an access log in the common/combined
+format (gunicorn's ``accesslog``). POST /chat lines in an access log have
+no body, so they get questions from the chat pool.
+
+``--concurrency`` users are spread over ``--processes`` client processes,
+so the client's own GIL does not cap the measured throughput. Results
+(throughput and p50/p95/p99 per route) are printed and appended to
+``--out`` like bench/run.py results.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import requests
+
+from bench.run import QUERIES, run_info
+from bench.synth import REPO_ROOT
+
+DEFAULT_OUT = os.path.join(REPO_ROOT, "bench", "loadtest.jsonl")
+DEFAULT_MIX = {"dashboard": 2, "map": 5, "data": 1, "chat": 2}
+ACCESS_LOG_REQUEST = re.compile(r'"(GET|POST|HEAD) (\S+) HTTP/[\d.]+"')
+# Concrete paths are reported under their route, like the app's own metrics
+ROUTE_PATTERNS = [
+    (re.compile(r"^/map_data/\d+"), "/map_data/<year>"),
+    (re.compile(r"^/api/insights/[^/?]+"), "/api/insights/<view>"),
+    (re.compile(r"^/static/"), "/static/<asset>"),
+]
+
+
+def route_of(path):
+    path = path.split("?", 1)[0]
+    for pattern, route in ROUTE_PATTERNS:
+        if pattern.match(path):
+            return route
+    return path
+
+
+# ---------- traffic ----------
+class Traffic:
+    """Sessions of (method, path, json body) requests, synthetic or replayed"""
+
+    def __init__(self, years, mix=None, replay=None, seed=None):
+        self.years = years or [2024]
+        self.rng = random.Random(seed)
+        self.replay = replay
+        self._next = 0
+        mix = mix or DEFAULT_MIX
+        self.kinds = [kind for kind, weight in mix.items() if weight > 0]
+        self.weights = [mix[kind] for kind in self.kinds]
+
+    def session(self):
+        if self.replay:
+            request = self.replay[self._next % len(self.replay)]
+            self._next += 1
+            if request[0] == "POST" and route_of(request[1]) in ("/chat", "/chat/stream") and request[2] is None:
+                request = (request[0], request[1], {"message": self.rng.choice(QUERIES)})
+            return [request]
+        kind = self.rng.choices(self.kinds, self.weights)[0]
+        return getattr(self, f"_{kind}")()
+
+    def _dashboard(self):
+        year = self.years[0]
+        return [("GET", path, None) for path in (
+            "/", "/static/script.js", "/static/styles.css", "/api/filters",
+            f"/api/indicators?year={year}&region=all", f"/api/disease-trend?year={year}&top=5",
+            f"/api/regional?year={year}&top=5", f"/map_data/{year}",
+        )]
+
+    def _map(self):
+        count = self.rng.randint(1, min(4, len(self.years)))
+        return [("GET", f"/map_data/{year}", None) for year in self.rng.sample(self.years, count)]
+
+    def _data(self):
+        return [("GET", f"/data?year={self.rng.choice(self.years)}&limit=1000", None)]
+
+    def _chat(self):
+        return [("POST", "/chat", {"message": self.rng.choice(QUERIES)})]
+
+def read_replay(path):
+    """Recorded requests from JSON lines or an access log"""
+    recorded = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = {}
+                if "path" in record:
+                    recorded.append((record.get("method", "GET").upper(), record["path"], record.get("body")))
+                continue  # other JSON lines (e.g. the app's sampled events) are not requests
+            match = ACCESS_LOG_REQUEST.search(line)
+            if match:
+                recorded.append((match.group(1), match.group(2), None))
+    if not recorded:
+        raise SystemExit(f"❌ No requests found in {path}")
+    return recorded
+
+
+# ---------- client ----------
+def user_loop(base_url, traffic, deadline, max_sessions, samples, lock):
+    """One virtual user: run sessions back to back until the deadline"""
+    session = requests.Session()
+    done = 0
+    while time.monotonic() < deadline and (max_sessions is None or done < max_sessions):
+        for method, path, body in traffic.session():
+            started = time.perf_counter()
+            try:
+                response = session.request(method, base_url + path, json=body, timeout=120)
+                response.content  # include the body transfer
+                ok = response.status_code < 400
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - started
+            with lock:
+                samples.append((route_of(path), elapsed, ok))
+        done += 1
+
+def client_process(base_url, users, duration, sessions_per_user, years, mix, replay, seed):
+    """Runs ``users`` threads; returns [(route, seconds, ok)] and the wall time"""
+    samples, lock = [], threading.Lock()
+    deadline = time.monotonic() + duration
+    threads = []
+    for i in range(users):
+        traffic = Traffic(years, mix, replay, seed=None if seed is None else seed * 1000 + i)
+        if replay:
+            traffic._next = i * len(replay) // max(users, 1)  # users start at different points
+        threads.append(threading.Thread(
+            target=user_loop, args=(base_url, traffic, deadline, sessions_per_user, samples, lock), daemon=True))
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - started
+
+def run_load(base_url, concurrency, processes, duration, sessions_per_user, years, mix, replay, seed):
+    processes = max(1, min(processes, concurrency))
+    shares = [concurrency // processes + (1 if i < concurrency % processes else 0) for i in range(processes)]
+    if processes == 1:
+        return client_process(base_url, shares[0], duration, sessions_per_user, years, mix, replay, seed)
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = [pool.submit(client_process, base_url, users, duration, sessions_per_user, years, mix,
+                               replay, None if seed is None else seed + i)
+                   for i, users in enumerate(shares)]
+        results = [future.result() for future in futures]
+    return [sample for samples, _ in results for sample in samples], max(wall for _, wall in results)
+
+
+# ---------- report ----------
+def summarize(samples, wall):
+    """Per-route (and overall) request count, errors, throughput and latency percentiles"""
+    by_route = {}
+    for route, elapsed, ok in samples:
+        by_route.setdefault(route, []).append((elapsed, ok))
+    by_route["ALL"] = [(elapsed, ok) for _, elapsed, ok in samples]
+
+    report = {}
+    for route, values in by_route.items():
+        if not values:
+            continue
+        ms = np.array([elapsed for elapsed, _ in values]) * 1000
+        report[route] = {
+            "requests": len(values), "errors": sum(1 for _, ok in values if not ok),
+            "rps": round(len(values) / wall, 2) if wall else None,
+            "p50": round(float(np.percentile(ms, 50)), 3), "p95": round(float(np.percentile(ms, 95)), 3),
+            "p99": round(float(np.percentile(ms, 99)), 3), "max": round(float(ms.max()), 3),
+        }
+    return report
+
+def print_report(report, wall):
+    print(f"\n{'route':<26}{'requests':>9}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for route, row in sorted(report.items(), key=lambda item: (item[0] == "ALL", item[0])):
+        print(f"{route:<26}{row['requests']:>9}{row['errors']:>8}{row['rps']:>10.1f}"
+              f"{row['p50']:>10.2f}{row['p95']:>10.2f}{row['p99']:>10.2f}")
+    print(f"\n⏱️ {wall:.1f}s wall")
+
+
+# ---------- server ----------
+def log_tail(path, lines=40):
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return "".join(f.readlines()[-lines:])
+
+def wait_ready(base_url, timeout, process=None, log_path=None):
+    """Poll /ready; give up early if the server ``process`` we started exits"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            print(f"❌ server exited with status {process.returncode} before it was ready")
+            if log_path:
+                print(f"--- last lines of {log_path} ---\n{log_tail(log_path)}", end="")
+            return False
+        try:
+            if requests.get(f"{base_url}/ready", timeout=2).status_code == 200:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    return False
+
+def start_server(args):
+    """gunicorn over bench/serve.py; returns (process, base url, log path)"""
+    port = args.port
+    env = {**os.environ, "PORT": str(port), "WEB_CONCURRENCY": str(args.workers),
+           "GUNICORN_THREADS": str(args.threads), "BENCH_ROWS": str(args.rows),
+           "BENCH_LLM_LATENCY": str(args.llm_latency), "PYTHONPATH": REPO_ROOT}
+    log = tempfile.NamedTemporaryFile(prefix="loadtest-server-", suffix=".log", delete=False)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--bind", f"127.0.0.1:{port}",
+         "bench.serve:app"],
+        cwd=REPO_ROOT, env=env, stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+    return process, f"http://127.0.0.1:{port}", log.name
+
+def stop_server(process):
+    if process.poll() is None:
+        os.killpg(process.pid, signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        if kind.strip() not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown session kind {kind!r}; use {sorted(DEFAULT_MIX)}")
+        mix[kind.strip()] = float(weight or 1)
+    return mix
+
+if __name__ == "__main__":
+    from bench.synth import parse_size
+
+    parser = argparse.ArgumentParser(description="Load-test the app's routes")
+    parser.add_argument("--url", help="test a running server instead of starting one")
+    parser.add_argument("--rows", type=parse_size, default=parse_size("100k"), help="synthetic dataset size")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers")
+    parser.add_argument("--threads", type=int, default=4, help="gunicorn threads per worker")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="seconds the Gemini stand-in takes")
+    parser.add_argument("--concurrency", type=int, default=16, help="virtual users")
+    parser.add_argument("--processes", type=int, default=max(1, min(4, (os.cpu_count() or 2) // 2)),
+                        help="client processes the users are spread over")
+    parser.add_argument("--duration", type=float, default=20, help="seconds to run")
+    parser.add_argument("--sessions", type=int, help="stop each user after this many sessions")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help="e.g. dashboard=2,map=5,data=1,chat=2")
+    parser.add_argument("--replay", help="JSON-lines requests or an access log to replay")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--out", default=DEFAULT_OUT, help="JSON-lines file the results are appended to")
+    parser.add_argument("--label", default="")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    server = log_path = None
+    base_url = args.url.rstrip("/") if args.url else None
+    try:
+        if base_url is None:
+            server, base_url, log_path = start_server(args)
+            print(f"🚀 gunicorn ({args.workers} workers x {args.threads} threads, {args.rows} rows) "
+                  f"on {base_url}; log in {log_path}")
+        if not wait_ready(base_url, timeout=300, process=server, log_path=log_path):
+            raise SystemExit(f"❌ {base_url} did not become ready")
+
+        years = requests.get(f"{base_url}/api/filters", timeout=30).json().get("years") or [2024]
+        replay = read_replay(args.replay) if args.replay else None
+        print(f"🔥 {args.concurrency} users over {args.processes} processes for {args.duration:.0f}s "
+              f"({'replay of ' + args.replay if replay else 'mix ' + json.dumps(args.mix)})")
+        samples, wall = run_load(base_url, args.concurrency, args.processes, args.duration, args.sessions,
+                                 years, args.mix, replay, args.seed)
+    finally:
+        if server is not None:
+            stop_server(server)
+
+    report = summarize(samples, wall)
+    print_report(report, wall)
+    if not args.no_save:
+        info = {**run_info(args.label), "url": args.url, "rows": None if args.url else args.rows,
+                "workers": None if args.url else args.workers, "threads": None if args.url else args.threads,
+                "concurrency": args.concurrency, "duration": args.duration,
+                "mix": None if args.replay else args.mix, "replay": args.replay}
+        with open(args.out, "a", encoding="utf-8") as f:
+            for route, row in report.items():
+                f.write(json.dumps({**info, "route": route, **row}) + "\n")
+        print(f"✅ {len(report)} route results appended to {args.out}")
@@ -0,0 +1,217 @@
+# bench/run.py
+"""Time app.py's hot paths over synthetic datasets of growing size.
+
+    python -m bench.run --sizes 10k,100k,1M --repeat 30
+    python -m bench.run --sizes 10M --load-limit 1M --label "after cube change"
+
+For every size the Supabase stand-in serves that many synthetic rows and
+the app loads them (above ``--load-limit`` the store is built directly, as
+paging millions of rows through JSON measures the stand-in more than the
+app). Then each hot path runs ``--repeat`` times: intent parsing,
+filtering, summarizing, /map_data cold and warm, /chat on its template, LLM
+and cached paths, and the dashboard and export endpoints. Gemini answers
+after ``--llm-latency`` seconds, 0 by default so /chat shows the app's own
+overhead.
+
+Every measurement is appended as one JSON line to ``--out`` together with
+the commit, host and Python version, and the table printed at the end shows
+the change against the previous run of the same benchmark and size.
+"""
+import argparse
+import contextlib
+import datetime as dt
+import json
+import os
+import platform
+import subprocess
+import time
+
+import numpy as np
+
+from bench.standins import SyntheticSupabase, import_app
+from bench.synth import REPO_ROOT, Profile, parse_size
+
+DEFAULT_OUT = os.path.join(REPO_ROOT, "bench", "results.jsonl")
+
+# A mix of the question shapes the chat box gets: fully structured ones
+# answered from templates and open-ended ones that go to the LLM
+QUERIES = [
+    "How many dengue cases in Pune in 2023?",
+    "Malaria deaths in Nagpur",
+    "Total cholera cases in 2024",
+    "How many cases of chikungunya were reported in Thane?",
+    "Why do dengue cases spike in Mumbai during the monsoon?",
+    "Compare food poisoning outbreaks in Kolhapur and Satara",
+    "What should Nashik prepare for in the coming weeks?",
+    "Show me the deaths from leptospirosis in 2022",
+]
+LLM_QUERY = "Why do dengue cases spike in Pune during the monsoon?"
+TEMPLATE_QUERY = "How many dengue cases in Pune in 2023?"
+
+
+def stats(samples):
+    """Milliseconds: count, min, p50, p95, max and mean"""
+    ms = np.asarray(samples) * 1000
+    return {
+        "n": len(ms), "min": round(float(ms.min()), 4),
+        "p50": round(float(np.percentile(ms, 50)), 4), "p95": round(float(np.percentile(ms, 95)), 4),
+        "max": round(float(ms.max()), 4), "mean": round(float(ms.mean()), 4),
+    }
+
+def measure(fn, repeat, setup=None, warmup=1):
+    """Time ``fn()`` ``repeat`` times; ``setup()`` runs untimed before each call"""
+    for _ in range(warmup):
+        if setup:
+            setup()
+        fn()
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return stats(samples)
+
+def cycle(items):
+    """Callable returning the items round-robin, so every call sees the next one"""
+    state = {"i": 0}
+
+    def next_item():
+        item = items[state["i"] % len(items)]
+        state["i"] += 1
+        return item
+    return next_item
+
+def run_info(label):
+    def git(*args):
+        try:
+            return subprocess.run(["git", *args], cwd=REPO_ROOT, capture_output=True,
+                                  text=True, timeout=10).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            return ""
+    return {
+        "run": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+        "commit": git("rev-parse", "--short", "HEAD") or None,
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "label": label,
+        "host": platform.node(), "python": platform.python_version(),
+        "numpy": np.__version__, "cpus": os.cpu_count(),
+    }
+
+def app_output(verbose):
+    """The app prints a line per stage; keep that out of the timings' output unless asked"""
+    return contextlib.nullcontext() if verbose else contextlib.redirect_stdout(open(os.devnull, "w"))
+
+def check(response, path):
+    if response.status_code != 200:
+        raise RuntimeError(f"{path} returned HTTP {response.status_code}")
+    return response
+
+
+def bench_size(app, supabase, rows, args):
+    """All measurements for one dataset size; returns {bench name: stats}"""
+    results = {}
+    supabase.resize(rows)
+    if rows <= args.load_limit:
+        results["load_full"] = measure(lambda: app.load_health_data("full"), 1, warmup=0)
+        results["sync_incremental"] = measure(lambda: app.load_health_data("incremental"),
+                                              max(1, args.repeat // 10), warmup=0)
+    else:
+        started = time.perf_counter()
+        store = supabase.profile.store(rows, supabase.seed)
+        results["build_store"] = stats([time.perf_counter() - started])
+        app.publish_store(store)
+    store = app.HEALTH_STORE
+    if len(store) != rows:
+        raise RuntimeError(f"expected {rows} rows, the app holds {len(store)}")
+
+    from entities import EntityMatcher
+    results["entity_matcher_build"] = measure(lambda: EntityMatcher.from_store(store), max(1, args.repeat // 10))
+
+    query = cycle(QUERIES)
+    results["parse_intent"] = measure(lambda: app.parse_intent(query(), store), args.repeat * len(QUERIES))
+    intents = [app.parse_intent(q, store) for q in QUERIES]
+    intent = cycle(intents)
+    results["filter_data"] = measure(lambda: app.filter_data(intent(), store), args.repeat * len(QUERIES))
+    results["summarize_data"] = measure(lambda: app.summarize_data(intent(), store), args.repeat * len(QUERIES))
+
+    client = app.app.test_client()
+    year = int(store.watermark()[0])
+    map_path = f"/map_data/{year}"
+    results["map_data_cold"] = measure(lambda: check(client.get(map_path), map_path), args.repeat,
+                                       setup=app.RESPONSE_CACHE.clear)
+    results["map_data_warm"] = measure(lambda: check(client.get(map_path), map_path), args.repeat)
+
+    def chat(message):
+        return lambda: check(client.post("/chat", json={"message": message}), "/chat")
+    results["chat_template"] = measure(chat(TEMPLATE_QUERY), args.repeat)
+    results["chat_llm"] = measure(chat(LLM_QUERY), args.repeat, setup=app.ANSWER_CACHE.clear)
+    results["chat_cached"] = measure(chat(LLM_QUERY), args.repeat)
+
+    for name, path in (("indicators", f"/api/indicators?year={year}"),
+                       ("data_page", f"/data?year={year}&limit=1000"),
+                       ("anomalies", "/api/anomalies")):
+        results[name] = measure(lambda path=path: check(client.get(path), path), args.repeat)
+    return results
+
+def previous_results(path):
+    """Latest earlier measurement per (rows, bench)"""
+    latest = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    latest[(record["rows"], record["bench"])] = record
+                except (ValueError, KeyError):
+                    continue
+    return latest
+
+def print_table(records, previous):
+    print(f"\n{'rows':>10}  {'bench':<22}{'p50 ms':>11}{'p95 ms':>11}   vs previous p50")
+    for record in records:
+        before = previous.get((record["rows"], record["bench"]))
+        change = ""
+        if before and before.get("p50"):
+            change = f"{(record['p50'] - before['p50']) / before['p50'] * 100:+.1f}% ({before['commit']})"
+        print(f"{record['rows']:>10}  {record['bench']:<22}{record['p50']:>11.3f}{record['p95']:>11.3f}   {change}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark app.py hot paths on synthetic data")
+    parser.add_argument("--sizes", default="10k,100k,1M", help="comma list, e.g. 10k,100k,1M,10M")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--load-limit", type=parse_size, default=parse_size("1M"),
+                        help="above this many rows the store is built directly instead of loaded over HTTP")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds the Gemini stand-in takes")
+    parser.add_argument("--supabase-latency", type=float, default=0.0, help="seconds added to each stand-in request")
+    parser.add_argument("--out", default=DEFAULT_OUT, help="JSON-lines file the results are appended to")
+    parser.add_argument("--label", default="", help="note stored with the results")
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument("--verbose", action="store_true", help="show the app's own log output")
+    args = parser.parse_args()
+
+    sizes = [parse_size(size) for size in args.sizes.split(",") if size.strip()]
+    supabase = SyntheticSupabase(Profile.from_csv(), seed=args.seed, latency=args.supabase_latency)
+
+    info = run_info(args.label)
+    previous = previous_results(args.out)
+    records = []
+    with app_output(args.verbose):
+        app, _ = import_app(supabase, llm_latency=args.llm_latency)
+    for rows in sizes:
+        print(f"⏱️ {rows} rows...", flush=True)
+        started = time.perf_counter()
+        with app_output(args.verbose):
+            results = bench_size(app, supabase, rows, args)
+        print(f"   done in {time.perf_counter() - started:.1f}s", flush=True)
+        records.extend({**info, "rows": rows, "bench": name, **result} for name, result in results.items())
+
+    print_table(records, previous)
+    if not args.no_save:
+        with open(args.out, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+        print(f"\n✅ {len(records)} results appended to {args.out}")
+    supabase.close()
@@ -0,0 +1,33 @@
+# bench/serve.py
+"""app.py served against the local stand-ins, for load tests.
+
+    gunicorn -c gunicorn.conf.py bench.serve:app
+    BENCH_ROWS=100k python -m bench.serve --port 5001
+
+The Supabase stand-in runs in this process (the gunicorn master, with
+``preload_app``) and the dataset is loaded from it before the app serves.
+BENCH_ROWS, BENCH_SEED and BENCH_LLM_LATENCY (seconds per Gemini answer)
+configure it under gunicorn.
+"""
+import os
+import sys
+
+from bench.standins import SyntheticSupabase, import_app
+from bench.synth import parse_size
+
+ROWS = parse_size(os.environ.get("BENCH_ROWS", "100k"))
+SUPABASE = SyntheticSupabase(rows=ROWS, seed=int(os.environ.get("BENCH_SEED", 0)))
+_app, GEMINI = import_app(SUPABASE, llm_latency=float(os.environ.get("BENCH_LLM_LATENCY", 0.0)))
+if not _app.load_health_data("full"):
+    sys.exit("❌ Could not load the synthetic dataset from the stand-in")
+print(f"🧪 Serving {len(_app.HEALTH_STORE)} synthetic rows behind local Supabase and Gemini stand-ins")
+
+app = _app.app
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve app.py against the bench stand-ins")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 5001)))
+    args = parser.parse_args()
+    app.run(host="127.0.0.1", port=args.port, threaded=True)
@@ -0,0 +1,190 @@
+# bench/standins.py
+"""Local stand-ins for Supabase and Gemini, so app.py runs without network or keys.
+
+``SyntheticSupabase`` is a PostgREST-shaped HTTP server for the govdata
+table: it honours ``Range``, ``Prefer: count=exact`` and the watermark
+``or=`` filter that supabase_loader.py sends, and serves pages generated on
+demand from a bench.synth profile, so a 10M-row table costs no memory.
+
+``install_fake_gemini`` replaces ``google.generativeai`` with a model that
+answers after a configurable latency, streaming a few chunks when asked.
+``import_app`` wires both in (plus dummy keys, which app.py requires at
+import time) and imports app.
+"""
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from bench.synth import REPO_ROOT, Profile
+
+WATERMARK_FILTER = re.compile(r"\(Year\.gt\.(\d+),and\(Year\.eq\.(\d+),Week\.gte\.(\d+)\)\)")
+
+
+class SyntheticSupabase:
+    """``/rest/v1/govdata`` over ``rows`` synthetic rows; ``resize`` changes the table"""
+
+    def __init__(self, profile=None, rows=0, seed=0, latency=0.0, port=0):
+        self.profile = profile or Profile.from_csv()
+        self.rows = rows
+        self.seed = seed
+        self.latency = latency  # seconds added to every request, like a network round trip
+        self.requests = 0
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True,
+                                        name="supabase-standin")
+        self._thread.start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def resize(self, rows):
+        self.rows = rows
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _range(self, query):
+        """Row range the filters select (rows are ordered by Year, Week)"""
+        match = WATERMARK_FILTER.fullmatch(query.get("or", [""])[0])
+        if not match:
+            return 0, self.rows
+        return self.profile.first_row_since(self.rows, int(match.group(1)), int(match.group(3))), self.rows
+
+    def _handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                standin.requests += 1
+                if standin.latency:
+                    time.sleep(standin.latency)
+                url = urlparse(self.path)
+                if url.path.rstrip("/") != "/rest/v1/govdata":
+                    self.send_error(404)
+                    return
+
+                first, end = standin._range(parse_qs(url.query))
+                total = end - first
+                lo, _, hi = self.headers.get("Range", f"0-{max(total - 1, 0)}").partition("-")
+                lo, hi = int(lo), min(int(hi or total - 1), total - 1)
+                page = standin.profile.records(standin.rows, first + lo, first + hi + 1, standin.seed) \
+                    if lo <= hi else []
+                body = json.dumps(page).encode("utf-8")
+
+                exact = "count=exact" in self.headers.get("Prefer", "")
+                self.send_response(206 if len(page) < total else 200)
+                self.send_header("Content-Range", f"{lo}-{lo + len(page) - 1}/{total if exact else '*'}")
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+class FakeGemini:
+    """Counts calls and sets the latency of the fake ``GenerativeModel``"""
+
+    def __init__(self, latency=0.0, chunks=4):
+        self.latency = latency
+        self.chunks = chunks
+        self.calls = 0
+
+    def answer(self, prompt):
+        question = prompt.rsplit("USER QUESTION:", 1)[-1].splitlines()[0].strip()
+        return f"Based on the surveillance data, here is what is known about: {question}"
+
+    def module(self):
+        fake = self
+
+        class GenerativeModel:
+            def __init__(self, model_name, **kwargs):
+                self.model_name = model_name
+
+            def generate_content(self, prompt, stream=False):
+                fake.calls += 1
+                text = fake.answer(prompt)
+                if not stream:
+                    time.sleep(fake.latency)
+                    return types.SimpleNamespace(text=text)
+                return self._stream(text)
+
+            def _stream(self, text):
+                words = text.split(" ")
+                size = max(1, -(-len(words) // fake.chunks))
+                for i in range(0, len(words), size):
+                    time.sleep(fake.latency / fake.chunks)
+                    yield types.SimpleNamespace(text=" ".join(words[i:i + size]) + " ")
+
+        genai = types.ModuleType("google.generativeai")
+        genai.configure = lambda **kwargs: None
+        genai.GenerativeModel = GenerativeModel
+        return genai
+
+def install_fake_gemini(latency=0.0):
+    """Route ``import google.generativeai`` to a FakeGemini; returns it"""
+    fake = FakeGemini(latency)
+    genai = fake.module()
+    google = sys.modules.get("google") or types.ModuleType("google")
+    google.generativeai = genai
+    sys.modules["google"] = google
+    sys.modules["google.generativeai"] = genai
+    return fake
+
+def ensure_supabase_client():
+    """app.py imports the supabase client for its debug routes only; stub it if not installed"""
+    try:
+        import supabase  # noqa: F401
+    except ImportError:
+        module = types.ModuleType("supabase")
+
+        class Client:
+            def __init__(self, *args, **kwargs):
+                raise RuntimeError("supabase client is not installed (bench stand-in)")
+
+        module.Client = Client
+        module.create_client = Client
+        sys.modules["supabase"] = module
+
+def import_app(supabase, llm_latency=0.0, env=None):
+    """Import app.py against the stand-ins; returns ``(app module, FakeGemini)``.
+
+    The startup sync runs against an empty table, and snapshots go to a
+    temporary directory, so nothing outside the run is read or written.
+    """
+    settings = {
+        "GEMINI_API_KEY": "bench", "SUPABASE_KEY": "bench-key", "SUPABASE_URL": supabase.url,
+        "SNAPSHOT_DIR": tempfile.mkdtemp(prefix="bench-snapshot-"),
+        "STARTUP_SYNC_MODE": "full", "SYNC_INTERVAL_SECONDS": "0",
+        "RETRIEVAL_ENABLED": "0", "SNAPSHOT_CHECK_INTERVAL": "3600",
+    }
+    settings.update(env or {})
+    os.environ.update(settings)
+
+    fake = install_fake_gemini(llm_latency)
+    ensure_supabase_client()
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+
+    rows, supabase.rows = supabase.rows, 0
+    import app
+    for thread in threading.enumerate():
+        if thread.name == "supabase-reconcile":
+            thread.join()  # the startup sync, which finds the empty table
+    supabase.rows = rows
+    return app, fake
@@ -0,0 +1,241 @@
+# bench/synth.py
+"""Synthetic govdata-shaped datasets, from thousands to millions of rows.
+
+The distributions are fitted to the bundled sample (static/data/govdata.csv):
+how often each district and disease is reported, which weeks of the year
+each disease peaks in, case counts per report, fatality rates and reporting
+delays. Rows are ordered by (Year, Week) like the real table, so a watermark
+filter is a suffix of the row range.
+
+Rows are produced in fixed blocks seeded by (seed, block number), so any
+range of any size of dataset is reproducible without generating what comes
+before it; the Supabase stand-in serves pages straight from here.
+
+    python -m bench.synth 1000000 --csv /tmp/govdata_1m.csv
+    python -m bench.synth 1000000 --snapshot-dir /tmp/snapshot_1m
+"""
+import argparse
+import csv
+import datetime as dt
+import os
+import sys
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from aliases import canonical_area, canonical_disease  # noqa: E402
+from datastore import COLUMNS, HealthStore, parse_day  # noqa: E402
+
+SAMPLE_CSV = os.path.join(REPO_ROOT, "static", "data", "govdata.csv")
+BLOCK_ROWS = 1000
+FIRST_YEAR, LAST_YEAR = 2016, 2025
+# Reports per year relative to the first, growing as surveillance coverage improves
+YEAR_GROWTH = 0.06
+WEEKS = 52
+
+
+class Profile:
+    """Reporting distributions fitted to a govdata extract"""
+
+    def __init__(self, areas, area_p, diseases, disease_p, week_p, case_samples,
+                 fatality, delays, years=(FIRST_YEAR, LAST_YEAR)):
+        self.areas = areas
+        self.area_p = area_p
+        self.diseases = diseases
+        self.disease_p = disease_p
+        self.week_p = week_p              # (disease, week 1..52) -> P(week | disease)
+        self.case_samples = case_samples  # disease -> observed cases per report
+        self.fatality = fatality          # disease -> deaths / cases
+        self.delays = delays              # observed reporting delays in days
+        self.years = list(range(years[0], years[1] + 1))
+
+        # P(disease | week) for drawing diseases once a row's week is known
+        joint = self.disease_p[:, None] * self.week_p
+        self.disease_cdf = np.cumsum(joint / joint.sum(axis=0), axis=0).T
+        self.slot_weights = np.concatenate([
+            joint.sum(axis=0) * (1 + YEAR_GROWTH) ** i for i in range(len(self.years))])
+        self._case_offsets = np.cumsum([0] + [len(s) for s in case_samples])[:-1]
+        self._case_counts = np.array([len(s) for s in case_samples])
+        self._case_pool = np.concatenate(case_samples)
+        self._area_cdf = np.cumsum(area_p)
+        self._area_tags = [area[:3].upper() for area in areas]
+        self._slot_monday = np.array([dt.date.fromisocalendar(year, week, 1).toordinal()
+                                      for year in self.years for week in range(1, WEEKS + 1)], dtype=np.int32)
+
+    @classmethod
+    def from_csv(cls, path=SAMPLE_CSV, smoothing=0.5):
+        """Fit the profile; ``smoothing`` spreads a little weight over weeks never seen"""
+        import pandas as pd
+
+        df = pd.read_csv(path, dtype=str)
+        df.columns = df.columns.str.strip()
+        df["Area"] = df["Area"].fillna("").map(lambda name: canonical_area(name) or name.strip())
+        df["Disease"] = df["Disease"].fillna("").map(lambda name: canonical_disease(name) or name.strip())
+        df = df[(df["Area"] != "") & (df["Disease"] != "")]
+        for column in ("Week", "No of cases", "No of deaths"):
+            df[column] = pd.to_numeric(df[column], errors="coerce")
+
+        areas = df["Area"].value_counts()
+        diseases = df["Disease"].value_counts()
+        names = list(diseases.index)
+
+        week_p = np.full((len(names), WEEKS), smoothing)
+        weeks = df.dropna(subset=["Week"])
+        weeks = weeks[(weeks["Week"] >= 1) & (weeks["Week"] <= WEEKS)]
+        np.add.at(week_p, (weeks["Disease"].map(names.index).to_numpy(),
+                           weeks["Week"].astype(int).to_numpy() - 1), 1)
+        week_p /= week_p.sum(axis=1, keepdims=True)
+
+        cases = df.dropna(subset=["No of cases"])
+        cases = cases[cases["No of cases"] > 0]
+        overall = cases["No of cases"].to_numpy(dtype=np.int64)
+        case_samples, fatality = [], []
+        for name in names:
+            rows = cases[cases["Disease"] == name]
+            samples = rows["No of cases"].to_numpy(dtype=np.int64)
+            case_samples.append(samples if len(samples) else overall)
+            deaths = rows["No of deaths"].fillna(0).sum()
+            fatality.append(min(0.5, deaths / max(1, samples.sum())))
+
+        start = df["Date of start"].map(parse_day)
+        reported = df["Date of reporting"].map(parse_day)
+        delays = (reported - start).to_numpy()
+        delays = delays[(delays >= 0) & (delays <= 60)]
+
+        return cls(list(areas.index), areas.to_numpy() / areas.sum(), names,
+                   diseases.to_numpy() / diseases.sum(), week_p, case_samples,
+                   np.array(fatality), delays.astype(np.int32) if len(delays) else np.zeros(1, np.int32))
+
+    # ---------- row layout ----------
+    def slot_bounds(self, n):
+        """First row of every (year, week) slot in an ``n``-row dataset, plus ``n``"""
+        cumulative = np.cumsum(self.slot_weights) / self.slot_weights.sum()
+        return np.concatenate([[0], np.round(cumulative * n).astype(np.int64)])
+
+    def first_row_since(self, n, year, week):
+        """Offset of the first row at or after (year, week)"""
+        if year < self.years[0]:
+            return 0
+        if year > self.years[-1]:
+            return n
+        slot = (year - self.years[0]) * WEEKS + min(max(week, 1), WEEKS + 1) - 1
+        return int(self.slot_bounds(n)[min(slot, len(self.slot_weights))])
+
+    # ---------- generation ----------
+    def block(self, n, number, seed=0, bounds=None):
+        """Columns for rows ``number * BLOCK_ROWS`` up to the next block (or ``n``)"""
+        lo = number * BLOCK_ROWS
+        hi = min(n, lo + BLOCK_ROWS)
+        bounds = self.slot_bounds(n) if bounds is None else bounds
+        rng = np.random.default_rng([seed, number])
+        index = np.arange(lo, hi)
+        m = len(index)
+
+        slot = np.searchsorted(bounds, index, side="right") - 1
+        year = np.array(self.years, dtype=np.int16)[slot // WEEKS]
+        week = (slot % WEEKS + 1).astype(np.int8)
+        disease = (rng.random(m)[:, None] > self.disease_cdf[week - 1]).sum(axis=1)
+        disease = np.minimum(disease, len(self.diseases) - 1).astype(np.int32)
+        area = np.minimum(np.searchsorted(self._area_cdf, rng.random(m) * self._area_cdf[-1]),
+                          len(self.areas) - 1).astype(np.int32)
+
+        picks = self._case_offsets[disease] + (rng.random(m) * self._case_counts[disease]).astype(np.int64)
+        cases = np.maximum(1, rng.poisson(self._case_pool[picks])).astype(np.int32)
+        deaths = rng.binomial(cases, self.fatality[disease]).astype(np.int32)
+
+        start_day = self._slot_monday[slot] + rng.integers(0, 7, m, dtype=np.int32)
+        report_day = start_day + self.delays[rng.integers(0, len(self.delays), m)]
+        return {
+            "index": index, "year": year, "week": week, "area_code": area, "disease_code": disease,
+            "cases": cases, "deaths": deaths, "start_day": start_day, "report_day": report_day,
+        }
+
+    def unique_ids(self, columns):
+        return [f"MH/{self._area_tags[a]}/{y}/{w:02d}/{i}" for a, y, w, i in zip(
+            columns["area_code"].tolist(), columns["year"].tolist(),
+            columns["week"].tolist(), columns["index"].tolist())]
+
+    def blocks(self, n, seed=0, lo=0, hi=None):
+        """Blocks covering rows ``lo``..``hi``"""
+        hi = n if hi is None else min(hi, n)
+        bounds = self.slot_bounds(n)
+        for number in range(lo // BLOCK_ROWS, (hi + BLOCK_ROWS - 1) // BLOCK_ROWS):
+            yield self.block(n, number, seed, bounds)
+
+    def records(self, n, lo, hi, seed=0):
+        """Rows ``lo``..``hi`` (exclusive) as Supabase row dicts"""
+        out = []
+        for columns in self.blocks(n, seed, lo, hi):
+            day = dt.date.fromordinal
+            for row, uid in zip(zip(*(columns[k].tolist() for k in (
+                    "index", "year", "week", "area_code", "disease_code", "cases", "deaths",
+                    "start_day", "report_day"))), self.unique_ids(columns)):
+                i, year, week, area, disease, cases, deaths, started, reported = row
+                if lo <= i < hi:
+                    out.append({
+                        "Year": year, "Week": week, "Unique id": uid, "State": "Maharashtra",
+                        "Area": self.areas[area], "Disease": self.diseases[disease],
+                        "No of cases": cases, "No of deaths": deaths,
+                        "Date of start": day(started).strftime("%d-%m-%Y"),
+                        "Date of reporting": day(reported).strftime("%d-%m-%Y"),
+                    })
+        return out
+
+    def store(self, n, seed=0):
+        """The same ``n`` rows built straight into a HealthStore, skipping JSON"""
+        parts = list(self.blocks(n, seed))
+
+        def joined(name, dtype):
+            if not parts:
+                return np.zeros(0, dtype=dtype)
+            return np.concatenate([part[name] for part in parts]).astype(dtype, copy=False)
+
+        ids = [uid.encode("utf-8") for part in parts for uid in self.unique_ids(part)]
+        return HealthStore(
+            year=joined("year", np.int16), week=joined("week", np.int8),
+            cases=joined("cases", np.int32), deaths=joined("deaths", np.int32),
+            area_code=joined("area_code", np.int32), disease_code=joined("disease_code", np.int32),
+            state_code=np.zeros(n, dtype=np.int32),
+            start_day=joined("start_day", np.int32), report_day=joined("report_day", np.int32),
+            unique_id=np.array(ids, dtype="S") if ids else np.array([], dtype="S1"),
+            areas=list(self.areas), diseases=list(self.diseases), states=["Maharashtra"],
+        )
+
+
+def parse_size(text):
+    """'10k', '2.5M' or '1000000' -> rows"""
+    text = text.strip().lower().replace("_", "")
+    scale = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text[:-1] if scale > 1 else text) * scale)
+
+def write_csv(profile, n, path, seed=0):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        for lo in range(0, n, 100 * BLOCK_ROWS):
+            writer.writerows(profile.records(n, lo, lo + 100 * BLOCK_ROWS, seed))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic govdata dataset")
+    parser.add_argument("rows", type=parse_size, help="e.g. 10k, 1M, 10M")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--csv", help="write a govdata CSV (the shape samplegovcleaning.py reads)")
+    parser.add_argument("--snapshot-dir", help="write a HealthStore snapshot (the shape SNAPSHOT_DIR serves)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    profile = Profile.from_csv()
+    print(f"📐 Profile: {len(profile.areas)} areas, {len(profile.diseases)} diseases, "
+          f"{len(profile.years)} years")
+    if args.csv:
+        write_csv(profile, args.rows, args.csv, args.seed)
+        print(f"✅ {args.rows} rows written to {args.csv}")
+    if args.snapshot_dir:
+        import snapshot
+        version = snapshot.write(profile.store(args.rows, args.seed), args.snapshot_dir)
+        print(f"✅ {args.rows} rows saved as snapshot {version} in {args.snapshot_dir}/")
+    print(f"⏱️ {time.perf_counter() - started:.1f}s")
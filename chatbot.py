@@ -1,5 +1,32 @@
 import pandas as pd
 import os
+import sys
+
+def preprocess_store(store):
+    """
+    The chatbot DataFrame built from a HealthStore (a snapshot or the app's live data).
+    Types and dates are already clean, so only names are trimmed and derived columns added.
+    """
+    from cleaning import store_frame
+
+    df = store_frame(store)
+    df.dropna(subset=['Date of start', 'Date of reporting'], inplace=True)
+    df['Disease'] = df['Disease'].str.strip()
+    df['Area'] = df['Area'].str.strip()
+    df['Month'] = df['Date of start'].dt.month_name()
+    df['Response time'] = (df['Date of reporting'] - df['Date of start']).dt.days
+    return df.reset_index(drop=True)
+
+def load_snapshot_data(snapshot_dir):
+    """
+    Loads the cleaned, typed snapshot written by samplegovcleaning.py or app.py.
+    """
+    import snapshot
+
+    store = snapshot.load_current(snapshot_dir)
+    if store is None:
+        return f"Error: No snapshot found in {snapshot_dir}"
+    return preprocess_store(store)
 
 def load_and_preprocess_data(filepath):
     """
@@ -7,10 +34,14 @@ def load_and_preprocess_data(filepath):
     - Handles file not found errors.
     - Cleans and converts data types for numeric calculations.
     - Creates derived columns like 'Month' and 'Response time'.
+    A snapshot directory is loaded directly instead of a CSV.
     """
     if not os.path.exists(filepath):
         return f"Error: Data file not found at {filepath}"
 
+    if os.path.isdir(filepath):
+        return load_snapshot_data(filepath)
+
     try:
         df = pd.read_csv(filepath)
     except Exception as e:
@@ -152,8 +183,8 @@ def get_average_response_time(df, by='disease'):
 
 # --- Main execution block ---
 if __name__ == "__main__":
-    # Path to the data file within your project structure
-    data_path = 'static/data/govdata.csv'
+    # Path to the data file within your project structure (a CSV or a snapshot directory)
+    data_path = sys.argv[1] if len(sys.argv) > 1 else 'static/data/govdata.csv'
     
     # Load and preprocess the data
     df = load_and_preprocess_data(data_path)
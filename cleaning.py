@@ -0,0 +1,218 @@
+# cleaning.py
+"""Chunked, single-pass cleaning of govdata CSV extracts into a typed HealthStore.
+
+The CSV is streamed in bounded chunks. Each chunk is typed, canonicalized
+and dictionary-encoded once, and only compact NumPy columns are kept, so a
+multi-year state extract never sits in memory as a DataFrame of strings.
+The result is a HealthStore that ``snapshot.write`` persists and that
+app.py (via SNAPSHOT_DIR) and chatbot.py load directly.
+"""
+import datetime as dt
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from aliases import canonical_area, canonical_disease
+from datastore import (COLUMNS, DATE_FORMATS, MISSING_DAY, VALID_WEEKS, VALID_YEARS, HealthStore,
+                       _extend_vocabulary)
+
+CHUNK_ROWS = 100_000
+# Row hashes are spilled to this many files by hash and deduplicated one file
+# at a time, so duplicate counting holds ~8 bytes per row / HASH_BUCKETS in memory
+HASH_BUCKETS = 64
+# Values used for missing categorical fields (the rules samplegovcleaning.py applied)
+DEFAULTS = {"State": "Maharashtra", "Area": "Mumbai", "Disease": "Food Poisoning"}
+CANONICAL = {"Area": canonical_area, "Disease": canonical_disease, "State": lambda name: name}
+_EPOCH_ORDINAL = dt.date(1970, 1, 1).toordinal()
+
+
+class CleaningReport:
+    """Counts gathered while streaming: missing values, fills, duplicates, renames"""
+
+    def __init__(self):
+        self.rows = 0
+        self.chunks = 0
+        self.missing = dict.fromkeys(COLUMNS, 0)
+        self.unparsed_dates = {"Date of start": 0, "Date of reporting": 0}
+        self.both_dates_missing = 0
+        self.duplicates = 0
+        self.invalid_weeks = 0  # present but not a week number 1-53; stored as week 0
+        self.renamed = {}  # raw name -> canonical name, for names that changed
+        self.fill_values = {}
+        self._hash_dir = None  # per-bucket files of row hashes, counted by finish()
+
+    def count_duplicates(self, chunk):
+        """Spill the chunk's row hashes to their bucket files; finish() counts repeats"""
+        if self._hash_dir is None:
+            self._hash_dir = tempfile.mkdtemp(prefix="govdata-row-hashes-")
+        hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+        buckets = hashes % HASH_BUCKETS
+        order = np.argsort(buckets, kind="stable")
+        bounds = np.searchsorted(buckets[order], np.arange(HASH_BUCKETS + 1))
+        for bucket in np.flatnonzero(np.diff(bounds)):
+            with open(os.path.join(self._hash_dir, f"{bucket}.u64"), "ab") as f:
+                hashes[order[bounds[bucket]:bounds[bucket + 1]]].tofile(f)
+
+    def finish(self):
+        """Count duplicate rows one hash bucket at a time and remove the spill files"""
+        if self._hash_dir is None:
+            return
+        try:
+            for entry in os.scandir(self._hash_dir):
+                hashes = np.fromfile(entry.path, dtype=np.uint64)
+                self.duplicates += len(hashes) - len(np.unique(hashes))
+        finally:
+            shutil.rmtree(self._hash_dir, ignore_errors=True)
+            self._hash_dir = None
+
+    def print_summary(self):
+        print(f"Rows: {self.rows} in {self.chunks} chunks")
+        print("\nMissing Values per Column:")
+        for column, count in self.missing.items():
+            print(f"{column}: {count}")
+        print("\nUnparseable dates:", self.unparsed_dates)
+        print("Rows with BOTH dates null:", self.both_dates_missing)
+        print("Duplicate Rows Count:", self.duplicates)
+        print("Invalid weeks (stored as 0):", self.invalid_weeks)
+        print("Filled counts with:", self.fill_values)
+        if self.renamed:
+            print(f"\nCanonicalized {len(self.renamed)} Area/Disease spellings:")
+            for raw, name in sorted(self.renamed.items()):
+                print(f"  {raw!r} -> {name!r}")
+
+
+def read_chunks(path, chunksize=CHUNK_ROWS):
+    """Stream the known govdata columns as strings; index leftovers and extra columns are skipped"""
+    wanted = set(COLUMNS)
+    reader = pd.read_csv(path, chunksize=chunksize, dtype=str,
+                         usecols=lambda column: column.strip() in wanted)
+    for chunk in reader:
+        chunk.columns = chunk.columns.str.strip()
+        yield chunk.reindex(columns=COLUMNS)
+
+def _numbers(values):
+    return pd.to_numeric(values, errors="coerce")
+
+def _day_ordinals(values, report, column):
+    """Dates as day ordinals, trying each known format on what is still unparsed"""
+    parsed = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+    for fmt in DATE_FORMATS:
+        todo = parsed.isna() & values.notna()
+        if not todo.any():
+            break
+        parsed[todo] = pd.to_datetime(values[todo], format=fmt, errors="coerce")
+    report.unparsed_dates[column] += int((parsed.isna() & values.notna()).sum())
+    days = parsed.to_numpy(dtype="datetime64[D]").astype(np.int64) + _EPOCH_ORDINAL
+    return np.where(parsed.isna().to_numpy(), MISSING_DAY, days).astype(np.int32)
+
+def _encode_chunk(values, vocabulary, canonicalize, report):
+    """Codes into the shared vocabulary; each distinct raw value is canonicalized once"""
+    local_codes, uniques = pd.factorize(values)
+    names = []
+    for raw in uniques:
+        name = canonicalize(raw) or raw
+        if name != raw:
+            report.renamed[raw] = name
+        names.append(name)
+    mapping = _extend_vocabulary(vocabulary, names)
+    return mapping[local_codes] if len(mapping) else np.zeros(len(values), dtype=np.int32)
+
+def clean_chunk(chunk, vocabularies, report):
+    """Apply every type, date and null rule to one chunk; returns its NumPy columns"""
+    report.rows += len(chunk)
+    report.chunks += 1
+    report.count_duplicates(chunk)
+
+    text = {column: chunk[column].str.strip().replace("", np.nan) for column in COLUMNS}
+    for column, values in text.items():
+        report.missing[column] += int(values.isna().sum())
+
+    numbers = {column: _numbers(text[column]) for column in ("Year", "Week", "No of cases", "No of deaths")}
+    start = _day_ordinals(text["Date of start"], report, "Date of start")
+    reported = _day_ordinals(text["Date of reporting"], report, "Date of reporting")
+    report.both_dates_missing += int(((start == MISSING_DAY) & (reported == MISSING_DAY)).sum())
+
+    # Week 0 is the cube's slot for missing or invalid weeks; anything else would wrap in int8
+    week = numbers["Week"]
+    valid_week = week.between(*VALID_WEEKS) & (week % 1 == 0)
+    report.invalid_weeks += int((text["Week"].notna() & ~valid_week).sum())
+    year = numbers["Year"]
+    valid_year = year.between(*VALID_YEARS) & (year % 1 == 0)
+
+    columns = {
+        "year": year.where(valid_year, 0).to_numpy(dtype=np.int16),
+        "week": week.where(valid_week, 0).to_numpy(dtype=np.int8),
+        "start_day": start,
+        "report_day": reported,
+        "unique_id": text["Unique id"].fillna("").str.encode("utf-8").to_numpy(dtype="S"),
+    }
+    for column, field in (("No of cases", "cases"), ("No of deaths", "deaths")):
+        missing = numbers[column].isna().to_numpy()
+        columns[field] = numbers[column].fillna(0).to_numpy(dtype=np.int64)
+        columns[f"{field}_missing"] = missing
+    for column, (field, vocab) in (("State", ("state_code", "states")), ("Area", ("area_code", "areas")),
+                                   ("Disease", ("disease_code", "diseases"))):
+        values = text[column].fillna(DEFAULTS[column])
+        columns[field] = _encode_chunk(values, vocabularies[vocab], CANONICAL[column], report)
+    return columns
+
+def clean_csv(path, chunksize=CHUNK_ROWS):
+    """Clean a govdata CSV in one streaming pass; returns ``(HealthStore, CleaningReport)``.
+
+    Missing case/death counts are filled with the rounded absolute mean of
+    the whole file, which is only known at the end, so they are patched in
+    the compact arrays rather than by re-reading the CSV.
+    """
+    report = CleaningReport()
+    vocabularies = {"areas": [], "diseases": [], "states": []}
+    try:
+        parts = [clean_chunk(chunk, vocabularies, report) for chunk in read_chunks(path, chunksize)]
+    finally:
+        report.finish()
+
+    def joined(name, dtype=None):
+        if not parts:
+            return np.zeros(0, dtype=dtype or np.int32)
+        return np.concatenate([part[name] for part in parts])
+
+    counts = {}
+    for field in ("cases", "deaths"):
+        values, missing = joined(field, np.int64), joined(f"{field}_missing", bool)
+        present = values[~missing]
+        fill = int(round(abs(present.mean()))) if len(present) else 0
+        report.fill_values[field] = fill
+        counts[field] = np.where(missing, fill, values).astype(np.int32)
+
+    store = HealthStore(
+        year=joined("year", np.int16), week=joined("week", np.int8),
+        cases=counts["cases"], deaths=counts["deaths"],
+        area_code=joined("area_code"), disease_code=joined("disease_code"),
+        state_code=joined("state_code"),
+        start_day=joined("start_day"), report_day=joined("report_day"),
+        unique_id=joined("unique_id", "S1"),
+        areas=vocabularies["areas"], diseases=vocabularies["diseases"], states=vocabularies["states"],
+    )
+    return store, report
+
+def store_frame(store):
+    """One pandas row per report, with real dates, for the pandas-based tools"""
+    def dates(days):
+        days = np.asarray(days, dtype=np.int64)
+        values = (days - _EPOCH_ORDINAL).astype("datetime64[D]").astype("datetime64[ns]")
+        return pd.Series(np.where(days == MISSING_DAY, np.datetime64("NaT"), values))
+
+    return pd.DataFrame({
+        "Year": np.asarray(store.year, dtype=np.int64),
+        "Week": np.asarray(store.week, dtype=np.int64),
+        "Unique id": np.char.decode(np.asarray(store.unique_id), "utf-8"),
+        "State": np.asarray(store.states, dtype=object)[store.state_code],
+        "Area": np.asarray(store.areas, dtype=object)[store.area_code],
+        "Disease": np.asarray(store.diseases, dtype=object)[store.disease_code],
+        "No of cases": np.asarray(store.cases, dtype=np.int64),
+        "No of deaths": np.asarray(store.deaths, dtype=np.int64),
+        "Date of start": dates(store.start_day),
+        "Date of reporting": dates(store.report_day),
+    })
@@ -0,0 +1,619 @@
+# datastore.py
+"""Columnar, dictionary-encoded in-memory store for the govdata table."""
+import datetime as dt
+import hashlib
+import json
+import os
+
+import numpy as np
+
+# Column names as they come back from Supabase / govdata.csv
+COLUMNS = [
+    "Year", "Week", "Unique id", "State", "Area", "Disease",
+    "No of cases", "No of deaths", "Date of start", "Date of reporting",
+]
+
+DATE_FORMATS = ("%d-%m-%Y", "%Y-%m-%d", "%Y-%m-%dT%H:%M:%S")
+OUTPUT_DATE_FORMAT = "%d-%m-%Y"
+MISSING_DAY = -1  # day ordinal used when a date is missing or unparseable
+N_WEEKS = 54      # cube week slots 1..53; slot 0 holds rows with a missing/invalid week
+MEASURES = ("cases", "deaths", "rows")
+VALID_YEARS = (1900, 2999)  # anything else is stored as year 0, like a missing year
+VALID_WEEKS = (1, 53)       # anything else is stored as week 0 (see N_WEEKS)
+
+# Export column -> store attribute, grouped by how the column is encoded
+NUMERIC_COLUMNS = {"Year": "year", "Week": "week", "No of cases": "cases", "No of deaths": "deaths"}
+CODED_COLUMNS = {"State": ("state_code", "states"), "Area": ("area_code", "areas"),
+                 "Disease": ("disease_code", "diseases")}
+DATE_COLUMNS = {"Date of start": "start_day", "Date of reporting": "report_day"}
+
+# --------------------- HELPERS ---------------------
+def _to_int(value):
+    """Coerce Supabase values ("12", 12.0, None, "") to int, defaulting to 0"""
+    if value is None or value == "":
+        return 0
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        try:
+            return int(float(value))
+        except (TypeError, ValueError):
+            return 0
+
+def _in_range(value, bounds):
+    """Whole number within ``bounds`` (inclusive), else 0; keeps narrow dtypes from overflowing"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return 0
+    if not number.is_integer() or not bounds[0] <= number <= bounds[1]:
+        return 0
+    return int(number)
+
+def parse_day(value):
+    """Parse a date string into a proleptic Gregorian day ordinal"""
+    if not value:
+        return MISSING_DAY
+    text = str(value).strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return dt.datetime.strptime(text[:19], fmt).toordinal()
+        except ValueError:
+            continue
+    return MISSING_DAY
+
+def format_day(ordinal):
+    """Inverse of parse_day; returns None for missing dates"""
+    if ordinal == MISSING_DAY:
+        return None
+    return dt.date.fromordinal(int(ordinal)).strftime(OUTPUT_DATE_FORMAT)
+
+def _encode(values, vocabulary, lookup):
+    """Dictionary-encode strings, extending vocabulary/lookup in place"""
+    codes = np.empty(len(values), dtype=np.int32)
+    for i, value in enumerate(values):
+        key = "" if value is None else str(value)
+        code = lookup.get(key)
+        if code is None:
+            code = len(vocabulary)
+            vocabulary.append(key)
+            lookup[key] = code
+        codes[i] = code
+    return codes
+
+def _extend_vocabulary(vocabulary, additions):
+    """Append unseen names to vocabulary in place; return old->merged code map"""
+    lookup = {name: code for code, name in enumerate(vocabulary)}
+    mapping = np.empty(len(additions), dtype=np.int32)
+    for code, name in enumerate(additions):
+        if name not in lookup:
+            lookup[name] = len(vocabulary)
+            vocabulary.append(name)
+        mapping[code] = lookup[name]
+    return mapping
+
+def _row_multiset(records):
+    return sorted(repr(sorted(record.items())) for record in records)
+
+# --------------------- STORE ---------------------
+class HealthStore:
+    """One row per outbreak report, held as parallel NumPy columns.
+
+    Area, Disease and State are integer codes into the ``areas``,
+    ``diseases`` and ``states`` vocabularies; dates are day ordinals.
+    """
+
+    def __init__(self, year, week, cases, deaths, area_code, disease_code,
+                 state_code, start_day, report_day, unique_id,
+                 areas, diseases, states, cube=None, timeline=None):
+        self.year = year
+        self.week = week
+        self.cases = cases
+        self.deaths = deaths
+        self.area_code = area_code
+        self.disease_code = disease_code
+        self.state_code = state_code
+        self.start_day = start_day
+        self.report_day = report_day
+        self.unique_id = unique_id
+        self.areas = areas
+        self.diseases = diseases
+        self.states = states
+        self.cube = cube if cube is not None else AggregateCube.from_store(self)
+        self._timeline = timeline
+        self._version = None
+
+    def __len__(self):
+        return len(self.year)
+
+    @property
+    def version(self):
+        """Short content fingerprint; changes whenever the loaded data changes"""
+        if self._version is None:
+            digest = hashlib.sha1()
+            for column in (self.year, self.week, self.cases, self.deaths, self.area_code,
+                           self.disease_code, self.state_code, self.start_day,
+                           self.report_day, self.unique_id):
+                digest.update(np.ascontiguousarray(column).tobytes())
+            for vocabulary in (self.areas, self.diseases, self.states):
+                digest.update("\x00".join(vocabulary).encode("utf-8"))
+            self._version = digest.hexdigest()[:16]
+        return self._version
+
+    @property
+    def timeline(self):
+        """Reporting-date index, built on first use (merges carry it forward)"""
+        if self._timeline is None:
+            self._timeline = ReportTimeline.from_store(self)
+        return self._timeline
+
+    @classmethod
+    def empty(cls):
+        return cls.from_records([])
+
+    @classmethod
+    def from_records(cls, rows):
+        """Build the store from a list of Supabase row dicts"""
+        n = len(rows)
+        day_cache = {}
+
+        def days(column):
+            out = np.empty(n, dtype=np.int32)
+            for i, row in enumerate(rows):
+                raw = row.get(column)
+                day = day_cache.get(raw)
+                if day is None:
+                    day = day_cache[raw] = parse_day(raw)
+                out[i] = day
+            return out
+
+        areas, diseases, states = [], [], []
+        unique_ids = [str(row.get("Unique id") or "").encode("utf-8") for row in rows]
+
+        return cls(
+            year=np.fromiter((_in_range(r.get("Year"), VALID_YEARS) for r in rows), dtype=np.int16, count=n),
+            week=np.fromiter((_in_range(r.get("Week"), VALID_WEEKS) for r in rows), dtype=np.int8, count=n),
+            cases=np.fromiter((_to_int(r.get("No of cases")) for r in rows), dtype=np.int32, count=n),
+            deaths=np.fromiter((_to_int(r.get("No of deaths")) for r in rows), dtype=np.int32, count=n),
+            area_code=_encode([r.get("Area") for r in rows], areas, {}),
+            disease_code=_encode([r.get("Disease") for r in rows], diseases, {}),
+            state_code=_encode([r.get("State") for r in rows], states, {}),
+            start_day=days("Date of start"),
+            report_day=days("Date of reporting"),
+            unique_id=np.array(unique_ids, dtype="S") if n else np.array([], dtype="S1"),
+            areas=areas,
+            diseases=diseases,
+            states=states,
+        )
+
+    # ---------- persistence ----------
+    ARRAY_COLUMNS = ("year", "week", "cases", "deaths", "area_code", "disease_code",
+                     "state_code", "start_day", "report_day", "unique_id")
+
+    def save(self, directory):
+        """Write every column (and the cube) as .npy files plus a meta.json"""
+        os.makedirs(directory, exist_ok=True)
+        for name in self.ARRAY_COLUMNS:
+            np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(getattr(self, name)))
+        for name in AggregateCube.ARRAYS:
+            np.save(os.path.join(directory, f"cube_{name}.npy"), getattr(self.cube, name))
+        meta = {"version": self.version, "rows": len(self), "areas": self.areas,
+                "diseases": self.diseases, "states": self.states}
+        with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        """Open a saved store; with ``mmap`` the columns stay on disk until touched"""
+        mode = "r" if mmap else None
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+
+        def array(name):
+            return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mode)
+
+        # Snapshots written before the week digest existed get it rebuilt from the cells
+        digest = array("cube_digest") if os.path.exists(os.path.join(directory, "cube_digest.npy")) else None
+        cube = AggregateCube(*(array(f"cube_{name}") for name in ("years",) + MEASURES), digest=digest)
+        store = cls(**{name: array(name) for name in cls.ARRAY_COLUMNS},
+                    areas=meta["areas"], diseases=meta["diseases"], states=meta["states"],
+                    cube=cube)
+        store._version = meta["version"]
+        return store
+
+    # ---------- incremental sync ----------
+    def watermark(self):
+        """Latest (year, week) present, or None for an empty store"""
+        if not len(self):
+            return None
+        latest_year = int(self.year.max())
+        return latest_year, int(self.week[self.year == latest_year].max())
+
+    def sync_window(self, lookback_weeks=0):
+        """Start (year, week) of what an incremental sync re-reads.
+
+        The watermark moved back ``lookback_weeks`` calendar weeks, so late
+        or corrected rows for recent weeks are picked up too; None when empty.
+        """
+        latest = self.watermark()
+        if latest is None or not lookback_weeks or latest[0] < VALID_YEARS[0]:
+            return latest
+        year, week = latest
+        week = min(max(week, 1), dt.date(year, 12, 28).isocalendar()[1])
+        monday = dt.date.fromisocalendar(year, week, 1) - dt.timedelta(weeks=lookback_weeks)
+        iso = monday.isocalendar()
+        return iso[0], iso[1]
+
+    def since_mask(self, year, week):
+        """Rows at or after (year, week): the window an incremental sync re-reads"""
+        return (self.year > year) | ((self.year == year) & (self.week >= week))
+
+    def merge(self, delta, since):
+        """New store with the ``since`` (year, week) window replaced by ``delta``.
+
+        ``delta`` is everything upstream holds from ``since`` onwards, so every
+        stored row in that window is dropped and the delta appended. Rows are
+        not matched on Unique id, which govdata reuses across reports.
+        Vocabularies are extended, never reordered, so codes already handed
+        out stay valid. ``self`` is left untouched.
+        """
+        replaced = self.since_mask(*since)
+        keep = ~replaced
+
+        # A re-fetched window that hasn't changed keeps the same store (and version)
+        if int(replaced.sum()) == len(delta) and \
+                _row_multiset(self.to_records(np.flatnonzero(replaced))) == _row_multiset(delta.to_records()):
+            return self
+
+        areas, diseases, states = list(self.areas), list(self.diseases), list(self.states)
+        area_map = _extend_vocabulary(areas, delta.areas)
+        disease_map = _extend_vocabulary(diseases, delta.diseases)
+        state_map = _extend_vocabulary(states, delta.states)
+
+        area_code = area_map[delta.area_code]
+        disease_code = disease_map[delta.disease_code]
+
+        def rows(store, selector, area, disease):
+            return (store.year[selector], store.week[selector], area, disease,
+                    store.cases[selector], store.deaths[selector])
+
+        cube = self.cube.updated(
+            removed=rows(self, replaced, self.area_code[replaced], self.disease_code[replaced]),
+            added=rows(delta, slice(None), area_code, disease_code),
+            n_areas=len(areas), n_diseases=len(diseases),
+        )
+
+        timeline = None
+        if self._timeline is not None:
+            timeline = self._timeline.updated(
+                keep,
+                removed=(self.start_day[replaced], self.report_day[replaced],
+                         self.area_code[replaced], self.disease_code[replaced]),
+                added=(delta.start_day, delta.report_day, area_code, disease_code),
+                n_kept=int(keep.sum()), n_areas=len(areas), n_diseases=len(diseases),
+            )
+
+        def joined(name, delta_values=None):
+            theirs = getattr(delta, name) if delta_values is None else delta_values
+            return np.concatenate([getattr(self, name)[keep], theirs])
+
+        return HealthStore(
+            year=joined("year"), week=joined("week"), cases=joined("cases"),
+            deaths=joined("deaths"), area_code=joined("area_code", area_code),
+            disease_code=joined("disease_code", disease_code),
+            state_code=joined("state_code", state_map[delta.state_code]),
+            start_day=joined("start_day"), report_day=joined("report_day"),
+            unique_id=joined("unique_id"),
+            areas=areas, diseases=diseases, states=states, cube=cube, timeline=timeline,
+        )
+
+    # ---------- filtering ----------
+    @staticmethod
+    def codes_matching(vocabulary, terms):
+        """Codes whose lowercased name contains any of the (lowercase) terms"""
+        return np.array(
+            [code for code, name in enumerate(vocabulary)
+             if any(term in name.lower() for term in terms)],
+            dtype=np.int32,
+        )
+
+    def mask(self, year=None, week=None, area_codes=None, disease_codes=None):
+        """Vectorized row filter; ``None`` means no constraint on that column"""
+        mask = np.ones(len(self), dtype=bool)
+        if year is not None:
+            mask &= self.year == year
+        if week is not None:
+            mask &= self.week == week
+        if area_codes is not None:
+            mask &= np.isin(self.area_code, area_codes)
+        if disease_codes is not None:
+            mask &= np.isin(self.disease_code, disease_codes)
+        return mask
+
+    @staticmethod
+    def codes_named(vocabulary, names):
+        """Codes whose trimmed name equals one of ``names`` (case-insensitive)"""
+        wanted = {name.strip().lower() for name in names}
+        return np.array([code for code, name in enumerate(vocabulary)
+                         if name.strip().lower() in wanted], dtype=np.int32)
+
+    # ---------- export ----------
+    def columnar(self, index=None, fields=None):
+        """Project rows into per-column lists.
+
+        Area, Disease, State and the dates come back as small integer codes
+        into a per-response ``lookup`` table instead of repeated strings.
+        Returns ``(columns, lookup)``.
+        """
+        if index is None:
+            index = np.arange(len(self))
+        columns, lookup = {}, {}
+        for name in fields or COLUMNS:
+            if name in NUMERIC_COLUMNS:
+                columns[name] = getattr(self, NUMERIC_COLUMNS[name])[index].tolist()
+            elif name in CODED_COLUMNS:
+                attr, vocab_attr = CODED_COLUMNS[name]
+                vocabulary = getattr(self, vocab_attr)
+                used, codes = np.unique(getattr(self, attr)[index], return_inverse=True)
+                lookup[name] = [vocabulary[code] or None for code in used.tolist()]
+                columns[name] = codes.tolist()
+            elif name in DATE_COLUMNS:
+                used, codes = np.unique(getattr(self, DATE_COLUMNS[name])[index], return_inverse=True)
+                lookup[name] = [format_day(day) for day in used.tolist()]
+                columns[name] = codes.tolist()
+            elif name == "Unique id":
+                columns[name] = [uid.decode("utf-8") for uid in self.unique_id[index].tolist()]
+        return columns, lookup
+
+    def to_records(self, index=None, fields=None):
+        """Materialize rows back into Supabase-shaped dicts"""
+        fields = fields or COLUMNS
+        columns, lookup = self.columnar(index, fields)
+        for name, values in lookup.items():
+            columns[name] = [values[code] for code in columns[name]]
+        return [dict(zip(fields, row)) for row in zip(*(columns[name] for name in fields))]
+
+
+# --------------------- AGGREGATION CUBE ---------------------
+class AggregateCube:
+    """Dense (year, week, area, disease) totals of cases, deaths and row counts.
+
+    Built once per load so summaries, map totals and dashboard widgets read
+    a fixed-size array instead of rescanning rows. The all-weeks roll-up is
+    precomputed because most views ignore the week.
+    """
+
+    AXES = ("year", "week", "area", "disease")
+    ARRAYS = ("years",) + MEASURES + ("digest",)  # what a snapshot persists
+
+    def __init__(self, years, cases, deaths, rows, digest=None):
+        self.years = years
+        self.cases = cases
+        self.deaths = deaths
+        self.rows = rows
+        # Per (year, week) checksum of every pair's cases: comparing two weeks'
+        # digests tells whether any cell changed without reading the cells
+        self.digest = digest if digest is not None else self._cell_digest(cases)
+        self._year_index = {int(y): i for i, y in enumerate(years.tolist())}
+        self._weekless = {name: getattr(self, name).sum(axis=1) for name in MEASURES}
+
+    @staticmethod
+    def _flat_index(years, shape, year, week, area_code, disease_code):
+        """Position of each row's cell in the raveled cube"""
+        week = week.astype(np.int64)
+        week[(week < 0) | (week >= N_WEEKS)] = 0
+        flat = np.searchsorted(years, year).astype(np.int64)
+        flat = (flat * N_WEEKS + week) * shape[2] + area_code
+        return flat * shape[3] + disease_code
+
+    @staticmethod
+    def _digest_terms(area_code, disease_code, cases):
+        """Each row's contribution to its week's digest: cases times a pair weight.
+
+        Weights are a splitmix64 hash of the (area, disease) codes, and all
+        arithmetic wraps modulo 2**64, so digests add and subtract like sums.
+        """
+        with np.errstate(over="ignore"):
+            x = np.asarray(area_code, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+            x += np.asarray(disease_code, dtype=np.uint64) * np.uint64(0xC2B2AE3D27D4EB4F) + np.uint64(1)
+            x ^= x >> np.uint64(30)
+            x *= np.uint64(0xBF58476D1CE4E5B9)
+            x ^= x >> np.uint64(27)
+            x *= np.uint64(0x94D049BB133111EB)
+            x ^= x >> np.uint64(31)
+            return np.asarray(cases).astype(np.int64).astype(np.uint64) * x
+
+    @classmethod
+    def _cell_digest(cls, cases):
+        """Week digests from the cells themselves (for cubes saved without one)"""
+        area, disease = np.indices(cases.shape[2:])
+        terms = cls._digest_terms(area[None, None], disease[None, None], cases)
+        with np.errstate(over="ignore"):
+            return terms.sum(axis=(2, 3), dtype=np.uint64)
+
+    @staticmethod
+    def _add_digest(digest, flat, shape, terms, sign):
+        """Fold rows' digest terms into their (year, week) slots (``sign`` -1 removes)"""
+        slot = flat // max(shape[2] * shape[3], 1)
+        if sign < 0:
+            np.subtract.at(digest.reshape(-1), slot, terms)
+        else:
+            np.add.at(digest.reshape(-1), slot, terms)
+
+    @classmethod
+    def from_store(cls, store):
+        years = np.unique(store.year).astype(np.int16)
+        shape = (len(years), N_WEEKS, len(store.areas), len(store.diseases))
+        size = int(np.prod(shape))
+        flat = cls._flat_index(years, shape, store.year, store.week,
+                               store.area_code, store.disease_code)
+
+        def total(weights=None):
+            counts = np.bincount(flat, weights=weights, minlength=size)
+            return counts.astype(np.int32).reshape(shape)
+
+        digest = np.zeros(shape[:2], dtype=np.uint64)
+        cls._add_digest(digest, flat, shape,
+                        cls._digest_terms(store.area_code, store.disease_code, store.cases), 1)
+        return cls(years, total(store.cases), total(store.deaths), total(), digest=digest)
+
+    def updated(self, removed, added, n_areas, n_diseases):
+        """New cube with ``removed`` rows subtracted and ``added`` rows counted.
+
+        Both are ``(year, week, area_code, disease_code, cases, deaths)`` column
+        tuples already in the merged vocabularies, which only ever grow, so
+        existing cells keep their area/disease positions. Work is proportional
+        to the delta (plus one copy of the cube), not to the stored rows.
+        """
+        years = np.union1d(self.years, added[0]).astype(np.int16)
+        shape = (len(years), N_WEEKS, n_areas, n_diseases)
+        placement = np.searchsorted(years, self.years)
+        old_areas, old_diseases = self.cases.shape[2], self.cases.shape[3]
+
+        measures = {}
+        for name in MEASURES:
+            values = np.zeros(shape, dtype=np.int32)
+            values[placement, :, :old_areas, :old_diseases] = getattr(self, name)
+            measures[name] = values
+        digest = np.zeros(shape[:2], dtype=np.uint64)
+        digest[placement] = self.digest
+
+        for rows, sign in ((removed, -1), (added, 1)):
+            year, week, area_code, disease_code, cases, deaths = rows
+            if not len(year):
+                continue
+            flat = self._flat_index(years, shape, year, week, area_code, disease_code)
+            np.add.at(measures["cases"].reshape(-1), flat, sign * cases.astype(np.int32))
+            np.add.at(measures["deaths"].reshape(-1), flat, sign * deaths.astype(np.int32))
+            np.add.at(measures["rows"].reshape(-1), flat, sign)
+            self._add_digest(digest, flat, shape, self._digest_terms(area_code, disease_code, cases), sign)
+
+        # Drop year slots that no longer have any rows
+        live = measures["rows"].reshape(len(years), -1).any(axis=1)
+        return AggregateCube(years[live], *(measures[name][live] for name in MEASURES),
+                             digest=digest[live])
+
+    def year_index(self, year):
+        return self._year_index.get(int(year))
+
+    def rollup(self, keep=(), year=None, week=None, areas=None, diseases=None):
+        """Sum each measure down to the ``keep`` axes after applying selections.
+
+        ``year``/``week`` select a single slot, ``areas``/``diseases`` are code
+        arrays, ``None`` means all. Returns ``{measure: ndarray}`` whose axes
+        follow ``AXES`` order restricted to ``keep``.
+        """
+        use_weekless = week is None and "week" not in keep
+        axes = ("year", "area", "disease") if use_weekless else self.AXES
+
+        selections = {"area": areas, "disease": diseases}
+        if year is not None:
+            index = self.year_index(year)
+            selections["year"] = [] if index is None else [index]
+        if week is not None:
+            selections["week"] = [week] if 0 <= week < N_WEEKS else []
+
+        result = {}
+        for name in MEASURES:
+            values = self._weekless[name] if use_weekless else getattr(self, name)
+            for axis_no, axis in enumerate(axes):
+                chosen = selections.get(axis)
+                if chosen is not None:
+                    values = values.take(np.asarray(chosen, dtype=np.intp), axis=axis_no)
+            drop = tuple(i for i, axis in enumerate(axes) if axis not in keep)
+            result[name] = values.sum(axis=drop, dtype=np.int64)
+        return result
+
+    def totals(self, **selections):
+        """Grand totals for a selection, as plain ints"""
+        return {name: int(value) for name, value in self.rollup(**selections).items()}
+
+
+# --------------------- REPORTING-DATE INDEX ---------------------
+def _response_totals(start_day, report_day, area_code, disease_code, n_areas, n_diseases):
+    """Sum and count of (reporting - start) days per area and per disease"""
+    valid = (start_day != MISSING_DAY) & (report_day != MISSING_DAY)
+    days = (report_day[valid].astype(np.int64) - start_day[valid])
+    totals = {}
+    for key, codes, size in (("area", area_code[valid], n_areas), ("disease", disease_code[valid], n_diseases)):
+        totals[key] = (np.bincount(codes, weights=days, minlength=size).astype(np.int64),
+                       np.bincount(codes, minlength=size).astype(np.int64))
+    return totals
+
+class ReportTimeline:
+    """Rows ordered by reporting date, plus running response-time totals.
+
+    ``order`` holds the positions of rows that have a reporting date, sorted
+    by it, and ``days`` the matching day ordinals, so any date window is two
+    binary searches and touches only the rows inside it. Response-time sums
+    and counts per area and disease are kept alongside and updated with each
+    merge instead of being regrouped.
+    """
+
+    def __init__(self, order, days, response):
+        self.order = order
+        self.days = days
+        self.response = response  # {"area"|"disease": (sum of days, count)}
+
+    @classmethod
+    def from_store(cls, store):
+        dated = np.flatnonzero(store.report_day != MISSING_DAY)
+        days = store.report_day[dated]
+        by_day = np.argsort(days, kind="stable")
+        response = _response_totals(store.start_day, store.report_day, store.area_code,
+                                    store.disease_code, len(store.areas), len(store.diseases))
+        return cls(dated[by_day], days[by_day], response)
+
+    def updated(self, keep, removed, added, n_kept, n_areas, n_diseases):
+        """Timeline after a merge: kept rows move down, delta rows are slotted in.
+
+        ``keep`` masks the old rows that survive; ``removed``/``added`` are
+        ``(start_day, report_day, area_code, disease_code)`` tuples in the
+        merged vocabularies. Matches ``from_store`` on the merged store.
+        """
+        remap = np.cumsum(keep) - 1
+        kept = keep[self.order]
+        order, days = remap[self.order[kept]], self.days[kept]
+
+        dated = np.flatnonzero(added[1] != MISSING_DAY)
+        new_days = added[1][dated]
+        by_day = np.argsort(new_days, kind="stable")
+        slots = np.searchsorted(days, new_days[by_day], side="right")
+        order = np.insert(order, slots, n_kept + dated[by_day])
+        days = np.insert(days, slots, new_days[by_day])
+
+        minus = _response_totals(*removed, n_areas, n_diseases)
+        plus = _response_totals(*added, n_areas, n_diseases)
+        response = {}
+        for key, size in (("area", n_areas), ("disease", n_diseases)):
+            sums, counts = (np.pad(values, (0, size - len(values))) for values in self.response[key])
+            response[key] = (sums - minus[key][0] + plus[key][0], counts - minus[key][1] + plus[key][1])
+        return ReportTimeline(order, days, response)
+
+    @property
+    def latest_day(self):
+        return int(self.days[-1]) if len(self.days) else None
+
+    def window(self, start_day=None, end_day=None):
+        """Positions of rows reported between the two day ordinals (inclusive), oldest first"""
+        lo = 0 if start_day is None else np.searchsorted(self.days, start_day, side="left")
+        hi = len(self.days) if end_day is None else np.searchsorted(self.days, end_day, side="right")
+        return self.order[lo:hi]
+
+    def last_days(self, days):
+        """Rows reported in the ``days`` days up to the latest reporting date"""
+        latest = self.latest_day
+        if latest is None:
+            return self.order[:0]
+        return self.window(latest - days, latest)
+
+    def iso_week(self, year, week):
+        """Rows reported in ISO week ``week`` of ``year``"""
+        monday = dt.date.fromisocalendar(year, week, 1).toordinal()
+        return self.window(monday, monday + 6)
+
+    def mean_response_days(self, by):
+        """``(codes, mean days)`` for every area or disease with dated reports"""
+        sums, counts = self.response[by]
+        codes = np.flatnonzero(counts)
+        return codes, sums[codes] / counts[codes]
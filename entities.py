@@ -0,0 +1,144 @@
+# entities.py
+"""Area and disease mentions in chat questions, matched against the real vocabulary.
+
+A token trie is compiled from every Area and Disease name in the store plus
+the spelling aliases in aliases.py, and a query is scanned once, left to
+right, taking the longest phrase at each position. Matching cost depends on
+the query length, not on how many names the dataset holds.
+"""
+import numpy as np
+
+from aliases import DISEASE_ALIASES, DISEASE_TOKEN_VARIANTS, DISTRICT_ALIASES, normalize_name
+
+# Names that appear in govdata but never narrow a question: the state itself,
+# fragments of other states, placeholders and truncated labels
+STOP_TERMS = {"maharashtra", "pradesh", "nadu", "unknown", "acute", "suspected",
+              "mixed", "complicate", "pv"}
+# Tokens too generic to stand alone when they are only part of a longer name
+GENERIC_TOKENS = {"acute", "disease", "viral", "virus", "human", "suspected", "mixed",
+                  "forest", "nagar", "rash", "syndrome", "food"}
+
+_TERMINAL = None  # trie key holding a phrase's payload
+
+def _tokens(name):
+    return [DISEASE_TOKEN_VARIANTS.get(token, token) for token in normalize_name(name).split()]
+
+def _phrases(tokens):
+    """The full name plus every sub-phrase that is specific enough to match alone"""
+    full = tuple(tokens)
+    found = {full}
+    for start in range(len(tokens)):
+        for end in range(start + 1, len(tokens) + 1):
+            phrase = tuple(tokens[start:end])
+            if len(phrase) == 1 and phrase[0] in GENERIC_TOKENS:
+                continue
+            found.add(phrase)
+    return {p for p in found if _usable(p)}
+
+def _usable(phrase):
+    text = " ".join(phrase)
+    return len(text) > 1 and not text.isdigit() and text not in STOP_TERMS
+
+
+class EntityMatcher:
+    """Compiled matcher for one store's vocabularies; build a new one per dataset version."""
+
+    def __init__(self, areas, diseases, area_rows=None, disease_rows=None):
+        # phrase -> {"areas"|"diseases": set of codes}
+        index = {}
+        for kind, vocabulary in (("areas", areas), ("diseases", diseases)):
+            for code, name in enumerate(vocabulary):
+                tokens = _tokens(name)
+                if kind == "areas" and tokens:
+                    tokens = self._district_tokens(tokens)
+                for phrase in _phrases(tokens):
+                    index.setdefault(phrase, {}).setdefault(kind, set()).add(code)
+
+        # Aliases share the codes of the phrase they stand for
+        for variant, target in self._alias_pairs():
+            codes = index.get(target)
+            if codes:
+                merged = index.setdefault(variant, {})
+                for kind, found in codes.items():
+                    merged.setdefault(kind, set()).update(found)
+
+        # A phrase naming both an area and a disease (govdata has "Chikungunya"
+        # as an Area and "Raigad" as a Disease) goes to the kind with more rows
+        weights = {"areas": area_rows, "diseases": disease_rows}
+        self._trie = {}
+        for phrase, codes in index.items():
+            if len(codes) > 1:
+                kind = max(codes, key=lambda k: self._rows(weights[k], codes[k]))
+                codes = {kind: codes[kind]}
+            node = self._trie
+            for token in phrase:
+                node = node.setdefault(token, {})
+            kind, found = next(iter(codes.items()))
+            node[_TERMINAL] = (kind, np.array(sorted(found), dtype=np.int32))
+        self.size = len(index)
+
+    @classmethod
+    def from_store(cls, store):
+        return cls(store.areas, store.diseases,
+                   area_rows=np.bincount(store.area_code, minlength=len(store.areas)),
+                   disease_rows=np.bincount(store.disease_code, minlength=len(store.diseases)))
+
+    @staticmethod
+    def _district_tokens(tokens):
+        name = " ".join(tokens)
+        return DISTRICT_ALIASES.get(name, name).split()
+
+    @staticmethod
+    def _alias_pairs():
+        for variant, target in DISTRICT_ALIASES.items():
+            yield tuple(variant.split()), tuple(target.split())
+        for variant, target in DISEASE_ALIASES.items():
+            yield tuple(_tokens(variant)), tuple(_tokens(target))
+
+    @staticmethod
+    def _rows(weights, codes):
+        if weights is None:
+            return len(codes)
+        return int(sum(weights[code] for code in codes))
+
+    def match(self, query):
+        """Entities mentioned in ``query``.
+
+        Returns ``{"areas": [...], "diseases": [...], "area_codes": ...,
+        "disease_codes": ...}``: the matched words as the user wrote them
+        (normalized), and the union of their vocabulary codes, or None for a
+        kind that was not mentioned.
+        """
+        words = normalize_name(query).split()
+        tokens = [DISEASE_TOKEN_VARIANTS.get(word, word) for word in words]
+        terms = {"areas": [], "diseases": []}
+        codes = {"areas": [], "diseases": []}
+
+        position = 0
+        while position < len(tokens):
+            node, best = self._trie, None
+            for end in range(position, len(tokens)):
+                token = tokens[end]
+                child = node.get(token)
+                if child is None and token.endswith("s"):
+                    child = node.get(token[:-1])  # plural: "fevers", "districts"
+                if child is None:
+                    break
+                node = child
+                if _TERMINAL in node:
+                    best = (end + 1, node[_TERMINAL])
+            if best is None:
+                position += 1
+                continue
+            end, (kind, found) = best
+            term = " ".join(words[position:end])
+            if term not in terms[kind]:
+                terms[kind].append(term)
+                codes[kind].append(found)
+            position = end
+
+        def union(arrays):
+            return np.unique(np.concatenate(arrays)) if arrays else None
+
+        return {"areas": terms["areas"], "diseases": terms["diseases"],
+                "area_codes": union(codes["areas"]), "disease_codes": union(codes["diseases"])}
@@ -1,6 +1,17 @@
-import pandas as pd
+import argparse
+import hashlib
+import json
 import os
 
+import numpy as np
+import pandas as pd
+
+APP_ROOT = os.path.dirname(os.path.abspath(__file__))
+MEASURE_COLUMNS = ['No of cases', 'No of deaths']
+KEY_COLUMNS = ['Year', 'Area', 'Disease']
+# Bump when the sentence templates change so every partition is rewritten
+TEMPLATE_VERSION = "2"
+
 def load_and_clean_data(filepath):
     """
     Loads and cleans the health data from the CSV file.
@@ -9,27 +20,119 @@ def load_and_clean_data(filepath):
     try:
         df = pd.read_csv(filepath)
         df.columns = df.columns.str.strip()
-        
+
         # Convert necessary columns to numeric, handling potential errors
         for col in ['Year', 'No of cases', 'No of deaths']:
             df[col] = pd.to_numeric(df[col], errors='coerce')
-        
+
         # Remove rows where conversion failed
         df.dropna(subset=['Year', 'No of cases', 'No of deaths'], inplace=True)
-        
+
         # Convert to integers for clean output
         for col in ['Year', 'No of cases', 'No of deaths']:
             df[col] = df[col].astype(int)
-            
+
         # Clean string columns
         df['Disease'] = df['Disease'].str.strip()
         df['Area'] = df['Area'].str.strip()
-        
+
         return df
     except FileNotFoundError:
         print(f"Error: The file was not found at {filepath}")
         return None
 
+def store_to_frame(store):
+    """
+    (Year, Area, Disease) totals straight from a HealthStore's aggregate cube,
+    so snapshot and Supabase sources never materialize one row per report.
+    """
+    cube = store.cube.rollup(keep=("year", "area", "disease"))
+    year_idx, area_idx, disease_idx = np.nonzero(cube["rows"])
+    df = pd.DataFrame({
+        'Year': store.cube.years[year_idx].astype(int),
+        'Area': np.asarray(store.areas, dtype=object)[area_idx],
+        'Disease': np.asarray(store.diseases, dtype=object)[disease_idx],
+        'No of cases': cube["cases"][year_idx, area_idx, disease_idx],
+        'No of deaths': cube["deaths"][year_idx, area_idx, disease_idx],
+    })
+    # Year 0 holds reports with a missing year; the CSV path drops those too
+    df = df[df['Year'] > 0]
+    df['Disease'] = df['Disease'].str.strip()
+    df['Area'] = df['Area'].str.strip()
+    return df
+
+def load_from_snapshot(snapshot_dir):
+    import snapshot
+    store = snapshot.load_current(snapshot_dir)
+    if store is None:
+        print(f"Error: No snapshot found in {snapshot_dir}")
+        return None
+    return store_to_frame(store)
+
+def load_from_supabase():
+    from dotenv import load_dotenv
+    from datastore import HealthStore
+    from supabase_loader import SupabaseRestLoader
+
+    load_dotenv()
+    loader = SupabaseRestLoader(os.environ["SUPABASE_URL"], os.environ["SUPABASE_KEY"],
+                                workers=int(os.environ.get("SUPABASE_FETCH_WORKERS", 4)))
+    return store_to_frame(HealthStore.from_records(loader.fetch_all()))
+
+def aggregate(df):
+    """The single aggregation pass: cases and deaths per (Year, Area, Disease)"""
+    return df.groupby(KEY_COLUMNS, sort=True)[MEASURE_COLUMNS].sum().reset_index()
+
+def year_fingerprints(agg):
+    """Content hash of each year's aggregated rows"""
+    row_hashes = pd.util.hash_pandas_object(agg, index=False).to_numpy()
+    fingerprints = {}
+    for year, positions in agg.groupby('Year').indices.items():
+        digest = hashlib.sha1(TEMPLATE_VERSION.encode())
+        digest.update(row_hashes[positions].tobytes())
+        fingerprints[str(year)] = digest.hexdigest()[:16]
+    return fingerprints
+
+def yearly_insights(agg):
+    """
+    Insight types 1 and 2 for every year present in ``agg``, as {year: [sentences]}.
+    Both families are derived from the aggregated table with whole-column operations.
+    """
+    insights = {}
+
+    # Insight Type 1: Yearly Trends for Each Disease
+    trends = agg.groupby(['Year', 'Disease'], sort=True)[MEASURE_COLUMNS].sum().reset_index()
+    trend_text = ("For the year " + trends['Year'].astype(str) + ", the disease " + trends['Disease']
+                  + " had " + trends['No of cases'].astype(str) + " reported cases and "
+                  + trends['No of deaths'].astype(str) + " deaths in Maharashtra.")
+
+    # Insight Type 2: District Health Profiles for Each Year (top 3 diseases by cases;
+    # a stable sort keeps alphabetical order among ties, like nlargest did)
+    ranked = agg.sort_values(['Year', 'Area', 'No of cases', 'Disease'],
+                             ascending=[True, True, False, True], kind='mergesort')
+    top = ranked.groupby(['Year', 'Area'], sort=False).head(3)
+    labels = top['Disease'] + " (" + top['No of cases'].astype(str) + " cases)"
+    profiles = labels.groupby([top['Year'], top['Area']], sort=True).agg(", ".join).reset_index(name='list')
+    profile_text = ("In the district of " + profiles['Area'] + " during the year "
+                    + profiles['Year'].astype(str) + ", the most common diseases included: "
+                    + profiles['list'] + ".")
+
+    for year, texts in trend_text.groupby(trends['Year']):
+        insights.setdefault(str(year), []).extend(texts)
+    for year, texts in profile_text.groupby(profiles['Year']):
+        insights.setdefault(str(year), []).extend(texts)
+    return insights
+
+def overall_insights(agg):
+    """Insight Type 3: Overall Fatality Rates for Each Disease (spans all years)"""
+    totals = agg.groupby('Disease', sort=True)[MEASURE_COLUMNS].sum()
+    totals = totals[(totals['No of cases'] > 0) & (totals['No of deaths'] > 0)]
+    rates = totals['No of deaths'] / totals['No of cases'] * 100
+    return [
+        f"The overall case fatality rate for {disease} is {rate:.2f}%, based on {cases} cases and {deaths} deaths."
+        for disease, rate, cases, deaths in zip(totals.index, rates, totals['No of cases'], totals['No of deaths'])
+    ]
+
 def generate_text_insights(df):
     """
     Generates a list of plain-text sentences from the DataFrame.
@@ -37,34 +140,67 @@ def generate_text_insights(df):
     """
     if df is None:
         return []
+    agg = aggregate(df)
+    by_year = yearly_insights(agg)
+    return [text for year in sorted(by_year) for text in by_year[year]] + overall_insights(agg)
+
+def write_lines(path, lines):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        for line in lines:
+            f.write(line + '\n')
+    os.replace(tmp, path)
+
+def read_lines(path):
+    with open(path, encoding='utf-8') as f:
+        return [line.rstrip('\n') for line in f if line.strip()]
+
+def update_knowledge_base(df, output_filepath, partition_dir, full=False):
+    """
+    Regenerate only the year partitions whose aggregated data changed, then
+    reassemble ``output_filepath`` from the partition files.
+
+    ``partition_dir`` holds one ``<year>.txt`` per year, ``overall.txt`` and a
+    ``manifest.json`` of per-year fingerprints from the previous run.
+    """
+    os.makedirs(partition_dir, exist_ok=True)
+    manifest_path = os.path.join(partition_dir, 'manifest.json')
+    previous = {}
+    if not full and os.path.exists(manifest_path):
+        with open(manifest_path, encoding='utf-8') as f:
+            previous = json.load(f)
+
+    agg = aggregate(df)
+    fingerprints = year_fingerprints(agg)
+    changed = sorted(year for year, fp in fingerprints.items()
+                     if previous.get(year) != fp
+                     or not os.path.exists(os.path.join(partition_dir, f"{year}.txt")))
+    removed = sorted(set(previous) - set(fingerprints))
+
+    if changed:
+        fresh = yearly_insights(agg[agg['Year'].astype(str).isin(changed)])
+        for year in changed:
+            write_lines(os.path.join(partition_dir, f"{year}.txt"), fresh.get(year, []))
+    for year in removed:
+        try:
+            os.remove(os.path.join(partition_dir, f"{year}.txt"))
+        except FileNotFoundError:
+            pass
+    # Fatality rates span every year, so they follow any change
+    overall_path = os.path.join(partition_dir, 'overall.txt')
+    if changed or removed or not os.path.exists(overall_path):
+        write_lines(overall_path, overall_insights(agg))
 
     insights = []
+    for year in sorted(fingerprints):
+        insights.extend(read_lines(os.path.join(partition_dir, f"{year}.txt")))
+    insights.extend(read_lines(overall_path))
+    save_insights_to_file(insights, output_filepath)
 
-    # Insight Type 1: Yearly Trends for Each Disease
-    for (disease, year), group in df.groupby(['Disease', 'Year']):
-        total_cases = group['No of cases'].sum()
-        total_deaths = group['No of deaths'].sum()
-        text = f"For the year {year}, the disease {disease} had {total_cases} reported cases and {total_deaths} deaths in Maharashtra."
-        insights.append(text)
-
-    # Insight Type 2: District Health Profiles for Each Year
-    for (area, year), group in df.groupby(['Area', 'Year']):
-        # Find the top 3 most common diseases for that district and year
-        top_diseases = group.groupby('Disease')['No of cases'].sum().nlargest(3)
-        if not top_diseases.empty:
-            disease_list = ", ".join([f"{name} ({count} cases)" for name, count in top_diseases.items()])
-            text = f"In the district of {area} during the year {year}, the most common diseases included: {disease_list}."
-            insights.append(text)
-
-    # Insight Type 3: Overall Fatality Rates for Each Disease
-    for disease, group in df.groupby('Disease'):
-        total_cases = group['No of cases'].sum()
-        total_deaths = group['No of deaths'].sum()
-        if total_cases > 0 and total_deaths > 0:
-            fatality_rate = (total_deaths / total_cases) * 100
-            text = f"The overall case fatality rate for {disease} is {fatality_rate:.2f}%, based on {total_cases} cases and {total_deaths} deaths."
-            insights.append(text)
-            
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(fingerprints, f, indent=1, sort_keys=True)
+    print(f"🧩 Partitions: {len(changed)} regenerated {changed}, {len(removed)} removed, "
+          f"{len(fingerprints) - len(changed)} unchanged")
     return insights
 
 def save_insights_to_file(insights, output_filepath):
@@ -72,27 +208,30 @@ def save_insights_to_file(insights, output_filepath):
     Saves the list of insights to a text file, with each insight on a new line.
     """
     try:
-        with open(output_filepath, 'w', encoding='utf-8') as f:
-            for insight in insights:
-                f.write(insight + '\n')
+        write_lines(output_filepath, insights)
         print(f"✅ Successfully saved {len(insights)} insights to {output_filepath}")
     except IOError as e:
         print(f"Error: Could not write to file {output_filepath}. Reason: {e}")
 
 # --- Main Execution ---
 if __name__ == "__main__":
-    # Define file paths relative to the current script
-    APP_ROOT = os.path.dirname(os.path.abspath(__file__))
-    csv_input_path = os.path.join(APP_ROOT, 'static', 'data', 'govdata.csv')
-    text_output_path = os.path.join(APP_ROOT, 'knowledge_base.txt')
+    parser = argparse.ArgumentParser(description="Generate knowledge_base.txt for the vector index")
+    parser.add_argument("--source", choices=["csv", "snapshot", "supabase"], default="csv")
+    parser.add_argument("--csv", default=os.path.join(APP_ROOT, 'static', 'data', 'govdata.csv'))
+    parser.add_argument("--snapshot-dir", default=os.environ.get("SNAPSHOT_DIR", os.path.join(APP_ROOT, 'snapshot')))
+    parser.add_argument("--output", default=os.path.join(APP_ROOT, 'knowledge_base.txt'))
+    parser.add_argument("--partitions", default=os.path.join(APP_ROOT, 'knowledge_base'))
+    parser.add_argument("--full", action="store_true", help="regenerate every year partition")
+    args = parser.parse_args()
 
     # 1. Load the data
-    health_df = load_and_clean_data(csv_input_path)
+    if args.source == "csv":
+        health_df = load_and_clean_data(args.csv)
+    elif args.source == "snapshot":
+        health_df = load_from_snapshot(args.snapshot_dir)
+    else:
+        health_df = load_from_supabase()
 
-    # 2. Generate the text insights
+    # 2. Generate the changed partitions and 3. reassemble the knowledge base
     if health_df is not None:
-        text_insights = generate_text_insights(health_df)
-
-        # 3. Save the insights to a file
-        save_insights_to_file(text_insights, text_output_path)
-
+        update_knowledge_base(health_df, args.output, args.partitions, full=args.full)
@@ -0,0 +1,115 @@
+# geometry.py
+"""District map geometry, prepared once and served as immutable assets.
+
+The district GeoJSON never changes while the app runs, so it is reduced to
+what the map draws (a display name per feature and its geometry) and
+encoded once per resolution:
+
+  low     coordinates rounded to 0.01° (~1 km), lines simplified at that tolerance
+  medium  0.001° (~100 m)
+  high    0.00001° (~1 m), no simplification
+
+Lines and polygon rings are simplified with Douglas-Peucker; points are
+only rounded. Each body is addressed by a content digest, so its URL can
+be cached forever and a changed file gets a new URL. The per-year case
+counts are joined to the features by name in the browser.
+"""
+import hashlib
+import json
+
+import numpy as np
+
+# resolution -> (decimal places, simplification tolerance in degrees)
+RESOLUTIONS = {
+    "low": (2, 0.01),
+    "medium": (3, 0.001),
+    "high": (5, 0.0),
+}
+DEFAULT_RESOLUTION = "low"
+
+
+def display_name(feature):
+    """The district label the map shows and the per-year counts are keyed by"""
+    return str(feature.get("properties", {}).get("DTNAME", "")).strip().lower().title()
+
+def simplify_line(points, tolerance):
+    """Douglas-Peucker over an (n, 2) array; the end points are always kept"""
+    points = np.asarray(points, dtype=np.float64)
+    if tolerance <= 0 or len(points) <= 2:
+        return points
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        start, end = points[first], points[last]
+        segment = end - start
+        length = np.hypot(*segment)
+        offsets = points[first + 1:last] - start
+        if length == 0:
+            distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        else:
+            distances = np.abs(segment[0] * offsets[:, 1] - segment[1] * offsets[:, 0]) / length
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            split = first + 1 + farthest
+            keep[split] = True
+            stack.extend(((first, split), (split, last)))
+    return points[keep]
+
+def _ring(points, tolerance):
+    """A closed ring, simplified but never below the 4 positions a valid ring needs"""
+    simplified = simplify_line(points, tolerance)
+    return simplified if len(simplified) >= 4 else np.asarray(points, dtype=np.float64)
+
+def _reduce(coordinates, kind, places, tolerance):
+    def rounded(points):
+        return np.round(np.asarray(points, dtype=np.float64), places).tolist()
+
+    if kind in ("Point", "MultiPoint"):
+        return rounded(coordinates)
+    if kind == "LineString":
+        return rounded(simplify_line(coordinates, tolerance))
+    if kind == "MultiLineString":
+        return [rounded(simplify_line(line, tolerance)) for line in coordinates]
+    if kind == "Polygon":
+        return [rounded(_ring(ring, tolerance)) for ring in coordinates]
+    if kind == "MultiPolygon":
+        return [[rounded(_ring(ring, tolerance)) for ring in polygon] for polygon in coordinates]
+    return coordinates
+
+def reduce_geometry(geometry, places, tolerance):
+    if not geometry:
+        return geometry
+    if geometry.get("type") == "GeometryCollection":
+        return {"type": "GeometryCollection",
+                "geometries": [reduce_geometry(g, places, tolerance) for g in geometry.get("geometries", [])]}
+    return {"type": geometry["type"],
+            "coordinates": _reduce(geometry.get("coordinates"), geometry["type"], places, tolerance)}
+
+
+class MapGeometry:
+    """Reduced district GeoJSON bodies per resolution, with their digests"""
+
+    def __init__(self, geojson):
+        features = geojson.get("features", [])
+        self.names = [display_name(feature) for feature in features]
+        self.bodies = {}
+        self.digests = {}
+        for resolution, (places, tolerance) in RESOLUTIONS.items():
+            reduced = {"type": "FeatureCollection", "features": [
+                {"type": "Feature", "properties": {"name": name},
+                 "geometry": reduce_geometry(feature.get("geometry"), places, tolerance)}
+                for name, feature in zip(self.names, features)
+            ]}
+            body = json.dumps(reduced, separators=(",", ":")).encode("utf-8")
+            self.bodies[resolution] = body
+            self.digests[resolution] = hashlib.sha1(body).hexdigest()[:12]
+
+    def path(self, resolution):
+        return f"/map_geometry/{resolution}.{self.digests[resolution]}.json"
+
+    def paths(self):
+        return {resolution: self.path(resolution) for resolution in self.bodies}
@@ -0,0 +1,35 @@
+# gunicorn.conf.py
+"""Production serving: several workers over one shared, memory-mapped dataset.
+
+The app is imported once in the master (``preload_app``), which maps the
+snapshot, loads the GeoJSON and runs the Supabase sync. Workers are forked
+from it and share those pages copy-on-write; each one follows the snapshot's
+CURRENT stamp, so a refresh done anywhere reaches every worker.
+
+Background syncing (the startup reconcile and SYNC_INTERVAL_SECONDS) is
+master-only: its threads start at import and are not copied into workers,
+and the master holds the sync lock for its lifetime. Workers sync only when
+asked to through /refresh-data.
+"""
+import gc
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 4))  # SSE chat streams hold a thread each
+preload_app = True
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+accesslog = "-"
+
+
+def pre_fork(server, worker):
+    # Move everything imported so far out of the collector's reach, so GC
+    # passes in the workers don't touch (and copy) the shared pages
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    import app
+    app.after_fork()
@@ -0,0 +1,151 @@
+# httpcache.py
+"""Validators, conditional GETs and pre-compressed bodies for versioned responses.
+
+A response body is wrapped in a ``Body`` once: its gzip encoding is made
+the first time a client accepts it and then reused, so a body is
+compressed at most once however often it is served. ``respond`` answers
+a request from a Body with a strong ETag per encoding, ``304 Not
+Modified`` when the client's If-None-Match matches, and ``Vary:
+Accept-Encoding``.
+
+``StaticAssets`` does the same for files under the static folder and
+gives each one a content digest, used both as its ETag and as the
+``?v=`` fingerprint in asset URLs so fingerprinted URLs can be cached
+for good.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+
+from flask import Response
+
+# Bodies smaller than this gain little from gzip and cost a header either way
+MIN_COMPRESS_BYTES = 512
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/geo+json", "application/javascript",
+                      "application/xml", "image/svg+xml")
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"  # may be stored, but revalidated with the ETag before every use
+
+
+def etag_for(*parts):
+    """Strong ETag value (without quotes) for the given identifying parts"""
+    digest = hashlib.sha1("\x00".join(str(part) for part in parts).encode("utf-8"))
+    return digest.hexdigest()[:20]
+
+def accepts_gzip(request):
+    for coding in request.headers.get("Accept-Encoding", "").split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            quality = params.strip().lower()
+            try:
+                return float(quality[2:]) > 0 if quality.startswith("q=") else True
+            except ValueError:
+                return True
+    return False
+
+
+class Body:
+    """A response body with its gzip encoding, compressed on first use"""
+
+    def __init__(self, data, mimetype="application/json"):
+        self.data = data
+        self.mimetype = mimetype
+        self._gzip = None
+        self._lock = threading.Lock()
+
+    @property
+    def compressible(self):
+        return len(self.data) >= MIN_COMPRESS_BYTES and self.mimetype.startswith(COMPRESSIBLE_TYPES)
+
+    @property
+    def gzipped(self):
+        if self._gzip is None:
+            with self._lock:
+                if self._gzip is None:
+                    # mtime=0 keeps the encoding byte-identical, so its ETag stays valid
+                    self._gzip = gzip.compress(self.data, compresslevel=6, mtime=0)
+        return self._gzip
+
+    def __len__(self):
+        return len(self.data)
+
+
+def not_modified(request, etag):
+    return etag is not None and request.if_none_match.contains_weak(etag)
+
+def not_modified_response(request, etag, cache_control=REVALIDATE, headers=None):
+    """A 304 when the client holds either encoding of ``etag``, before any body is built; else None"""
+    for tag in (etag, f"{etag}-gz"):
+        if not_modified(request, tag):
+            response = Response(status=304, headers={"Cache-Control": cache_control,
+                                                     "Vary": "Accept-Encoding", **(headers or {})})
+            response.set_etag(tag)
+            return response
+    return None
+
+def respond(request, body, etag, cache_control=REVALIDATE, headers=None):
+    """Serve ``body`` (a Body) for ``request`` with conditional and gzip handling.
+
+    ``etag`` identifies the uncompressed body; the gzip encoding gets its
+    own ETag, as a different representation.
+    """
+    encoded = body.compressible and accepts_gzip(request)
+    tag = f"{etag}-gz" if encoded else etag
+    common = {"Cache-Control": cache_control, **(headers or {})}
+    if body.compressible:
+        common["Vary"] = "Accept-Encoding"
+
+    if not_modified(request, tag):
+        response = Response(status=304, headers=common)
+    else:
+        response = Response(body.gzipped if encoded else body.data, mimetype=body.mimetype, headers=common)
+        if encoded:
+            response.headers["Content-Encoding"] = "gzip"
+    response.set_etag(tag)
+    return response
+
+
+class StaticAssets:
+    """Static files read once per modification, with digests and gzip encodings"""
+
+    def __init__(self, folder, max_bytes=5 * 1024 * 1024):
+        self.folder = os.path.abspath(folder)
+        self.max_bytes = max_bytes
+        self._assets = {}  # filename -> ((mtime_ns, size), Body, digest)
+        self._lock = threading.Lock()
+
+    def _path(self, filename):
+        path = os.path.abspath(os.path.join(self.folder, filename))
+        if not path.startswith(self.folder + os.sep) or not os.path.isfile(path):
+            return None
+        return path
+
+    def get(self, filename):
+        """``(Body, digest)`` for a servable file, or None (missing, outside the folder, too large)"""
+        path = self._path(filename)
+        if path is None:
+            return None
+        stat = os.stat(path)
+        if stat.st_size > self.max_bytes:
+            return None
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        cached = self._assets.get(filename)
+        if cached is not None and cached[0] == stamp:
+            return cached[1], cached[2]
+
+        with open(path, "rb") as f:
+            data = f.read()
+        mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        if filename.endswith(".geojson"):
+            mimetype = "application/geo+json"
+        body = Body(data, mimetype)
+        digest = hashlib.sha1(data).hexdigest()[:12]
+        with self._lock:
+            self._assets[filename] = (stamp, body, digest)
+        return body, digest
+
+    def digest(self, filename):
+        asset = self.get(filename)
+        return asset[1] if asset else None
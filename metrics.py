@@ -0,0 +1,237 @@
+# metrics.py
+"""In-process counters, gauges and latency histograms in the Prometheus text format.
+
+Metrics are registered once at import and updated from the request path
+with a lock per metric, so recording a value costs a dictionary lookup and
+a few additions. ``Registry.render`` produces what a Prometheus scrape of
+``/metrics`` expects. Values can also be read at scrape time from a
+function (``track``), for statistics other objects already keep.
+
+Each gunicorn worker has its own registry: a scrape answers for the worker
+that served it, and the ``pid`` label on ``process_start_time_seconds``
+tells them apart. Sum the series across workers in queries.
+
+``EventLog`` replaces per-request prints with one structured JSON line for a
+sampled fraction of requests, plus every error.
+"""
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+
+# Seconds; from sub-millisecond cache hits to slow LLM answers and full loads
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                   0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _escape(value):
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r'\"')
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._functions = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} takes labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def track(self, function, **labels):
+        """Report ``function()`` as this series' value at every scrape"""
+        self._functions[self._key(labels)] = function
+
+    def _samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, function in self._functions.items():
+            try:
+                values[key] = float(function())
+            except Exception:
+                continue  # a failing source drops out of the scrape instead of failing it
+        return values
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, value in sorted(self._samples().items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._samples().get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram of observed values (seconds for latencies)"""
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def time(self, **labels):
+        """Context manager observing the seconds spent in its block"""
+        return _Timer(self, labels)
+
+    def snapshot(self, **labels):
+        """``(per-bucket counts, sum, count)`` for one series"""
+        with self._lock:
+            series = self._values.get(self._key(labels))
+            return (list(series[0]), series[1], series[2]) if series else ([0] * len(self.buckets), 0.0, 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            series = {key: (list(counts), total, count) for key, (counts, total, count) in self._values.items()}
+        for key, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.label_names, key, [("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labels=()):
+        return self._register(Counter(name, documentation, labels))
+
+    def gauge(self, name, documentation, labels=()):
+        return self._register(Gauge(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def render(self):
+        """Every metric in the Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+REGISTRY = Registry()
+
+PROCESS_START = REGISTRY.gauge("process_start_time_seconds",
+                               "Unix time the process started", labels=("pid",))
+PROCESS_START.set(time.time(), pid=os.getpid())
+
+def reset_process_start():
+    """Call in a forked worker so it reports its own pid and start time"""
+    with PROCESS_START._lock:
+        PROCESS_START._values.clear()
+    PROCESS_START.set(time.time(), pid=os.getpid())
+
+
+class EventLog:
+    """One JSON line per event for a ``sample_rate`` fraction of events.
+
+    Errors (``always=True``) are written regardless of sampling. Lines carry
+    the event name, a Unix timestamp and the fields given.
+    """
+
+    def __init__(self, sample_rate=0.01, stream=None):
+        self.sample_rate = sample_rate
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def sampled(self):
+        """Decide up front, so callers can skip building fields for dropped events"""
+        return self.sample_rate >= 1 or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    def write(self, event, **fields):
+        line = json.dumps({"event": event, "ts": round(time.time(), 3), **fields}, default=str)
+        stream = self.stream or sys.stdout
+        with self._lock:
+            stream.write(line + "\n")
+            stream.flush()
+
+    def log(self, event, always=False, **fields):
+        if always or self.sampled():
+            self.write(event, **fields)
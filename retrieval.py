@@ -0,0 +1,142 @@
+# retrieval.py
+"""Top-k retrieval from the Chroma ``health_insights`` collection for chat context.
+
+The collection is built by vectordb.py. chromadb (and the sentence-transformers
+model behind it) is optional: without it, or without a built ``db/``,
+retrieval is switched off and chat falls back to the structured summary alone.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import chromadb
+    from chromadb.utils import embedding_functions
+except ImportError:
+    chromadb = None
+
+PERSIST_DIRECTORY = "db"
+COLLECTION_NAME = "health_insights"
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token for English prose)"""
+    return len(text) // 4 + 1
+
+def merge_context(summary_lines, passages, budget_tokens):
+    """Structured summary first, then retrieved passages in rank order while they fit.
+
+    The summary is always kept whole: it holds the exact figures. Passages
+    that repeat a summary line are skipped.
+    """
+    lines = list(summary_lines)
+    used = sum(estimate_tokens(line) for line in lines)
+    seen = {line.strip().lower() for line in lines}
+    added = []
+    for passage in passages:
+        key = passage.strip().lower()
+        cost = estimate_tokens(passage)
+        if not key or key in seen or used + cost > budget_tokens:
+            continue
+        seen.add(key)
+        added.append(passage)
+        used += cost
+    if added:
+        lines += ["", "RELATED INSIGHTS:"] + added
+    return lines
+
+
+class InsightRetriever:
+    """Embed a query and search the persisted collection, loading the model once.
+
+    The embedder and collection are opened on first use (or by ``warm``) and
+    shared by all threads of the process. Query embeddings are kept in an LRU
+    so repeated questions skip the model entirely.
+    """
+
+    def __init__(self, persist_directory=PERSIST_DIRECTORY, collection_name=COLLECTION_NAME,
+                 model_name=EMBEDDING_MODEL, top_k=4, cache_size=512):
+        self.persist_directory = persist_directory
+        self.collection_name = collection_name
+        self.model_name = model_name
+        self.top_k = top_k
+        self.cache_size = cache_size
+        self._embedder = None
+        self._collection = None
+        self._disabled = chromadb is None
+        self._embeddings = OrderedDict()  # normalized query -> embedding
+        self._lock = threading.Lock()
+        self.stats = {"embed_hit": 0, "embed_miss": 0}
+
+    @property
+    def enabled(self):
+        return not self._disabled
+
+    def _open(self):
+        """Load the embedding model and collection; False if retrieval is unavailable"""
+        if self._collection is not None or self._disabled:
+            return not self._disabled
+        with self._lock:
+            if self._collection is None and not self._disabled:
+                started = time.perf_counter()
+                try:
+                    embedder = embedding_functions.SentenceTransformerEmbeddingFunction(
+                        model_name=self.model_name)
+                    client = chromadb.PersistentClient(path=self.persist_directory)
+                    self._collection = client.get_collection(self.collection_name)
+                    self._embedder = embedder
+                    print(f"🧠 Retriever ready: {self._collection.count()} insights, "
+                          f"{self.model_name} loaded in {time.perf_counter() - started:.2f}s")
+                except Exception as e:
+                    self._disabled = True
+                    print(f"⚠️ Vector retrieval disabled: {e}")
+        return not self._disabled
+
+    def warm(self):
+        """Load the model now rather than on the first chat request"""
+        return self._open()
+
+    def warm_in_background(self):
+        if not self.enabled:
+            return None
+        thread = threading.Thread(target=self.warm, name="retriever-warm", daemon=True)
+        thread.start()
+        return thread
+
+    def embed(self, query):
+        key = " ".join(query.lower().split())
+        with self._lock:
+            embedding = self._embeddings.get(key)
+            if embedding is not None:
+                self._embeddings.move_to_end(key)
+                self.stats["embed_hit"] += 1
+                return embedding
+            self.stats["embed_miss"] += 1
+
+        embedding = list(self._embedder([key])[0])
+        with self._lock:
+            self._embeddings[key] = embedding
+            while len(self._embeddings) > self.cache_size:
+                self._embeddings.popitem(last=False)
+        return embedding
+
+    def search(self, query, k=None, timings=None):
+        """Top-k insight passages for ``query``; [] when retrieval is unavailable.
+
+        Milliseconds spent embedding and searching are added to ``timings``.
+        """
+        timings = {} if timings is None else timings
+        if not self._open():
+            return []
+
+        started = time.perf_counter()
+        embedding = self.embed(query)
+        embedded = time.perf_counter()
+        result = self._collection.query(query_embeddings=[embedding], n_results=k or self.top_k,
+                                        include=["documents"])
+        finished = time.perf_counter()
+
+        timings["embed"] = round((embedded - started) * 1000, 2)
+        timings["search"] = round((finished - embedded) * 1000, 2)
+        documents = result.get("documents") or [[]]
+        return [doc for doc in documents[0] if doc]
@@ -0,0 +1,118 @@
+# snapshot.py
+"""Versioned on-disk snapshots of the HealthStore for fast startup.
+
+Layout::
+
+    <root>/<version>/*.npy, meta.json   one directory per dataset version
+    <root>/CURRENT                      newest complete version [+ sync time [+ full sync time]]
+    <root>/sync.lock                    held by the one process that syncs
+
+A snapshot directory is fully written before CURRENT is switched to it with
+an atomic rename, so readers never see a half-written dataset. CURRENT is
+also the version stamp that every serving worker polls to follow refreshes.
+"""
+import os
+import shutil
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, every process may sync
+    fcntl = None
+
+from datastore import HealthStore
+
+KEEP_VERSIONS = 3  # older directories are pruned after each write
+
+def read_current(root):
+    """``(version, synced_at, full_synced_at)`` from CURRENT; all None when no snapshot exists yet"""
+    try:
+        with open(os.path.join(root, "CURRENT"), encoding="utf-8") as f:
+            fields = f.read().split()
+    except FileNotFoundError:
+        return None, None, None
+    if not fields:
+        return None, None, None
+    stamps = [float(field) for field in fields[1:3]] + [None, None]
+    return fields[0], stamps[0], stamps[1]
+
+def current_version(root):
+    """Version named in CURRENT, or None when no snapshot exists yet"""
+    return read_current(root)[0]
+
+def load_current(root, mmap=True):
+    """Memory-map the current snapshot; returns None if there isn't a usable one"""
+    version = current_version(root)
+    if version is None:
+        return None
+    try:
+        return HealthStore.load(os.path.join(root, version), mmap=mmap)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"⚠️ Snapshot {version} unreadable, ignoring it: {e}")
+        return None
+
+def write(store, root, synced_at=None, full_synced_at=None):
+    """Persist ``store`` under its version and point CURRENT at it.
+
+    ``synced_at`` (epoch seconds) is stamped into CURRENT so other processes
+    can tell how fresh the data is, and ``full_synced_at`` when the whole
+    table was last re-read; rewriting an existing version only refreshes
+    those stamps.
+    """
+    version = store.version
+    target = os.path.join(root, version)
+    if not os.path.exists(os.path.join(target, "meta.json")):
+        staging = os.path.join(root, f".{version}.{os.getpid()}.tmp")
+        shutil.rmtree(staging, ignore_errors=True)
+        store.save(staging)
+        shutil.rmtree(target, ignore_errors=True)
+        os.replace(staging, target)
+
+    pointer = os.path.join(root, f".CURRENT.{os.getpid()}.tmp")
+    with open(pointer, "w", encoding="utf-8") as f:
+        stamps = [] if synced_at is None else [synced_at] + ([] if full_synced_at is None else [full_synced_at])
+        f.write("\n".join([version, *map(str, stamps)]) + "\n")
+    os.replace(pointer, os.path.join(root, "CURRENT"))
+    _prune(root, keep=version)
+    return version
+
+def _prune(root, keep):
+    """Drop all but the newest KEEP_VERSIONS snapshot directories.
+
+    Processes that still have an older snapshot mapped keep reading it: the
+    files stay alive until their mappings are closed.
+    """
+    versions = [
+        entry for entry in os.scandir(root)
+        if entry.is_dir() and not entry.name.startswith(".") and entry.name != keep
+    ]
+    versions.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in versions[KEEP_VERSIONS - 1:]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+
+# ---------- sync leadership ----------
+_leader_fd = None
+
+def claim_sync_leader(root):
+    """True in exactly one process per snapshot root; kept until that process exits.
+
+    The others only follow CURRENT, so N workers do one Supabase sync, not N.
+    """
+    global _leader_fd
+    if _leader_fd is not None or fcntl is None:
+        return True
+    os.makedirs(root, exist_ok=True)
+    fd = os.open(os.path.join(root, "sync.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return False
+    _leader_fd = fd
+    return True
+
+def forget_sync_leader():
+    """Drop a lock descriptor inherited over fork; the parent keeps leadership"""
+    global _leader_fd
+    if _leader_fd is not None:
+        os.close(_leader_fd)
+        _leader_fd = None
@@ -1,5 +1,4 @@
-// --- Global State and Data Storage ---
-let allData = [];
+// --- Global State ---
 let selectedRegion = 'all';
 let selectedYear = null;
 let selectedWeek = null;
@@ -12,6 +11,8 @@ let diseaseTrendChart;
 let regionalChart;
 let map;
 let geojsonLayer;
+let mapYearData = null;        // last /map_data/<year> response: cases by district + geometry URLs
+const mapGeometryCache = {};   // geometry URL -> promise of its GeoJSON (fetched once per page)
 
 // --- Main Initialization ---
 document.addEventListener("DOMContentLoaded", function () {
@@ -308,7 +309,7 @@ function closeChatPopup() {
   }
 }
 
-// ✅ Send Message Function
+// ✅ Send Message Function (streams the reply from /chat/stream)
 function sendMessage() {
   const chatInput = document.getElementById('cp-input');
   const chatBody = document.getElementById('cp-body');
@@ -318,7 +319,7 @@ function sendMessage() {
   const message = chatInput.value.trim();
   if (!message) return;
   
-  console.log('📤 Sending message to Flask /chat endpoint:', message);
+  console.log('📤 Sending message to Flask /chat/stream endpoint:', message);
   
   // Add user message to chat
   addMessageToChat('user', message);
@@ -328,39 +329,80 @@ function sendMessage() {
   const sendBtn = document.getElementById('cp-send');
   if (sendBtn) sendBtn.disabled = true;
   
-  // Show typing indicator
+  // Show typing indicator until the first token arrives
   showTypingIndicator();
+
+  let bubble = null;
+  let streamed = '';
+  const appendText = (text) => {
+    if (!bubble) {
+      removeTypingIndicator();
+      bubble = addMessageToChat('bot', '');
+    }
+    streamed += text;
+    bubble.textContent = streamed;
+    chatBody.scrollTop = chatBody.scrollHeight;
+  };
+
+  // One SSE block: optional "event:" line plus a JSON "data:" line
+  const handleEvent = (block) => {
+    let eventName = 'message';
+    let payload = '';
+    block.split('\n').forEach(line => {
+      if (line.startsWith('event:')) eventName = line.slice(6).trim();
+      else if (line.startsWith('data:')) payload += line.slice(5).trim();
+    });
+    if (!payload) return;
+    const data = JSON.parse(payload);
+    if (eventName === 'message' && data.delta) {
+      appendText(data.delta);
+    } else if (eventName === 'done') {
+      console.log(`📥 Reply complete (source: ${data.source})`);
+      if (!bubble) appendText(data.response || '');
+    } else if (eventName === 'error') {
+      throw new Error(data.response || 'Chat stream error');
+    }
+  };
   
-  // Send to Flask backend - matches your app.py /chat route exactly
-  fetch('/chat', {
+  // Send to Flask backend and read the event stream as it arrives
+  fetch('/chat/stream', {
     method: 'POST',
     headers: {
       'Content-Type': 'application/json',
-      'Accept': 'application/json'
+      'Accept': 'text/event-stream'
     },
     body: JSON.stringify({ message: message })
   })
-  .then(response => {
+  .then(async response => {
     console.log('📡 Flask response status:', response.status, response.statusText);
     if (!response.ok) {
       throw new Error(`HTTP ${response.status}: ${response.statusText}`);
     }
-    return response.json();
+
+    // Browsers without streaming bodies still get the whole reply at the end
+    if (!response.body || !window.TextDecoder) {
+      (await response.text()).split('\n\n').forEach(handleEvent);
+      return;
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      const blocks = buffer.split('\n\n');
+      buffer = blocks.pop();
+      blocks.forEach(handleEvent);
+    }
+    if (buffer.trim()) handleEvent(buffer);
   })
-  .then(data => {
-    console.log('📥 Flask response data:', data);
-    
-    // Remove typing indicator
+  .then(() => {
     removeTypingIndicator();
-    
-    // Re-enable send button
     if (sendBtn) sendBtn.disabled = false;
-    
-    // Add bot response - your Flask app returns { "response": "..." }
-    if (data && data.response) {
-      addMessageToChat('bot', data.response);
-    } else {
-      console.error('❌ Unexpected response format:', data);
+    if (!bubble) {
+      console.error('❌ Stream ended without a reply');
       addMessageToChat('bot', 'Sorry, I received an unexpected response format.');
     }
   })
@@ -401,6 +443,7 @@ function addMessageToChat(sender, message) {
   chatBody.scrollTop = chatBody.scrollHeight;
   
   console.log(`✅ Added ${sender} message:`, message);
+  return bubbleDiv;
 }
 
 // ✅ Show Typing Indicator
@@ -448,36 +491,20 @@ document.addEventListener("DOMContentLoaded", function () {
 console.log("✅ Bot chat functionality loaded");
 
 // --- Data Loading and Processing ---
-function loadDataAndInitialize() {
-  fetch("/data")
-    .then(response => {
-      if (!response.ok) throw new Error("Could not fetch data from /data");
-      return response.json();
-    })
-    .then(data => {
-      console.log("Raw data from Supabase:", data.slice(0, 3));
-      
-      allData = data.map(d => ({
-        year: parseInt(d.Year, 10),
-        week: parseInt(d.Week, 10),
-        area: d.Area?.trim() || "Unknown",
-        disease: d.Disease?.trim() || "Unknown",
-        cases: parseInt(d["No of cases"], 10) || 0,
-        deaths: parseInt(d["No of deaths"], 10) || 0,
-        uniqueId: d["Unique id"] || "",
-        state: d.State || "",
-        dateStart: d["Date of start"] || "",
-        dateReporting: d["Date of reporting"] || ""
-      }));
+// The server does the aggregation; each widget asks only for what it draws.
+function fetchJSON(url) {
+  return fetch(url).then(response => {
+    if (!response.ok) throw new Error(`Could not fetch ${url} (HTTP ${response.status})`);
+    return response.json();
+  });
+}
 
-      console.log("Processed data:", allData.slice(0, 3));
-      console.log(`Total records loaded: ${allData.length}`);
-      
-      // Debug: Show unique areas for map matching
-      const uniqueAreas = [...new Set(allData.map(d => d.area))].filter(a => a !== "Unknown");
-      console.log("🗺️ Unique areas in data:", uniqueAreas.slice(0, 10));
+function loadDataAndInitialize() {
+  fetchJSON("/api/filters")
+    .then(options => {
+      console.log(`Filter options: ${options.years.length} years, ${options.weeks.length} weeks, ${options.regions.length} regions`);
 
-      populateFilters();
+      populateFilters(options);
       initializeEventListeners();
       initMap();
       
@@ -492,8 +519,8 @@ function loadDataAndInitialize() {
 }
 
 // --- Populating UI Elements (Fixed for year sync) ---
-function populateFilters() {
-  const uniqueYears = [...new Set(allData.map(d => d.year))].filter(y => !isNaN(y)).sort((a, b) => b - a);
+function populateFilters(options) {
+  const uniqueYears = options.years;
   console.log("Available years:", uniqueYears);
 
   const yearSelects = [
@@ -516,8 +543,8 @@ function populateFilters() {
     });
   });
 
-  // ✅ FIXED: Sync all year selects to same value and update visualizations
- if (uniqueYears.length > 0) {
+  // ✅ FIXED: Sync all year selects to same value
+  if (uniqueYears.length > 0) {
     const defaultYear = uniqueYears[0];
     selectedYear = defaultYear;
     selectedChartYear = defaultYear;
@@ -529,14 +556,9 @@ function populateFilters() {
     });
 
     console.log(`🎯 Default year set to: ${defaultYear}`);
-
-    // Immediately update all visualizations with default year
-    updateKeyIndicators();
-    updateDiseaseChart();
-    updateRegionalChart();
-    updateMap();
   }
-  const uniqueWeeks = [...new Set(allData.map(d => d.week))].filter(w => !isNaN(w) && w > 0).sort((a, b) => a - b);
+
+  const uniqueWeeks = options.weeks;
   const weekSelect = document.getElementById("weekSelect");
   if (weekSelect && uniqueWeeks.length > 0) {
     weekSelect.innerHTML = "";
@@ -550,11 +572,10 @@ function populateFilters() {
     weekSelect.value = selectedWeek;
   }
 
-  const uniqueAreas = [...new Set(allData.map(d => d.area))].filter(a => a && a !== "Unknown").sort();
   const regionSelect = document.getElementById("regionSelect");
   if (regionSelect) {
     regionSelect.innerHTML = '<option value="all">All Regions</option>';
-    uniqueAreas.forEach(area => {
+    options.regions.forEach(area => {
       const option = document.createElement("option");
       option.value = area;
       option.textContent = area;
@@ -609,62 +630,41 @@ function initializeEventListeners() {
   });
 }
 
-// --- Key Indicator Update (Year-specific) ---
 // --- Key Indicator Update (Year and Week specific) ---
 function updateKeyIndicators() {
-  if (!selectedYear || allData.length === 0) return;
-  
-  console.log(`📊 Calculating totals for year: ${selectedYear}, week: ${selectedWeek}, region: ${selectedRegion}`);
+  if (!selectedYear) return;
   
-  const filteredData = allData.filter(d =>
-    d.year === selectedYear &&
-    (selectedWeek === null || d.week === selectedWeek) &&  // ✅ ADDED: Week filter
-    (selectedRegion === 'all' || d.area === selectedRegion)
-  );
-
-  console.log(`📊 Filtered data: ${filteredData.length} rows for year ${selectedYear}, week ${selectedWeek}`);
-
-  const totalCases = filteredData.reduce((sum, item) => sum + (item.cases || 0), 0);
-  const totalCasesEl = document.querySelector('[data-id="total-cases"]');
-  if (totalCasesEl) totalCasesEl.textContent = formatNumber(totalCases);
+  console.log(`📊 Fetching totals for year: ${selectedYear}, week: ${selectedWeek}, region: ${selectedRegion}`);
 
-  const totalDeaths = filteredData.reduce((sum, item) => sum + (item.deaths || 0), 0);
-  const totalDeathsEl = document.querySelector('[data-id="total-deaths"]');
-  if (totalDeathsEl) totalDeathsEl.textContent = formatNumber(totalDeaths);
+  const params = new URLSearchParams({ year: selectedYear, region: selectedRegion });
+  if (selectedWeek !== null) params.set('week', selectedWeek);
 
-  console.log(`📊 Calculated totals: ${totalCases} cases, ${totalDeaths} deaths`);
-
-  // Calculate top city by cases (for the selected year/week combination)
-  const areaTotals = filteredData.reduce((acc, item) => {
-    if (item.area && item.area !== "Unknown") {
-      acc[item.area] = (acc[item.area] || 0) + item.cases;
-    }
-    return acc;
-  }, {});
-
-  let topCity = '–';
-  let topCases = 0;
-  for (const [area, cases] of Object.entries(areaTotals)) {
-    if (cases > topCases) {
-      topCity = area;
-      topCases = cases;
-    }
-  }
-  const topCityEl = document.querySelector('[data-id="top-city"]');
-  if (topCityEl) {
-    const displayText = topCity !== '–' ? 
-      `${topCity} (${formatNumber(topCases)})` : 
-      '–';
-    topCityEl.textContent = displayText;
-    
-    // ✅ ADDED: Update title to show current filters
-    const titleEl = document.querySelector('.key-indicators h3, .analytics-controls h3');
-    if (titleEl) {
-      const weekText = selectedWeek ? ` - Week ${selectedWeek}` : '';
-      const regionText = selectedRegion !== 'all' ? ` - ${selectedRegion}` : '';
-      titleEl.textContent = `Key Indicators ${selectedYear}${weekText}${regionText}`;
-    }
-  }
+  fetchJSON(`/api/indicators?${params}`)
+    .then(data => {
+      const totalCasesEl = document.querySelector('[data-id="total-cases"]');
+      if (totalCasesEl) totalCasesEl.textContent = formatNumber(data.total_cases);
+
+      const totalDeathsEl = document.querySelector('[data-id="total-deaths"]');
+      if (totalDeathsEl) totalDeathsEl.textContent = formatNumber(data.total_deaths);
+
+      console.log(`📊 Totals: ${data.total_cases} cases, ${data.total_deaths} deaths (${data.rows} rows)`);
+
+      const topCityEl = document.querySelector('[data-id="top-city"]');
+      if (topCityEl) {
+        topCityEl.textContent = data.top_city ?
+          `${data.top_city.name} (${formatNumber(data.top_city.cases)})` :
+          '–';
+        
+        // ✅ ADDED: Update title to show current filters
+        const titleEl = document.querySelector('.key-indicators h3, .analytics-controls h3');
+        if (titleEl) {
+          const weekText = selectedWeek ? ` - Week ${selectedWeek}` : '';
+          const regionText = selectedRegion !== 'all' ? ` - ${selectedRegion}` : '';
+          titleEl.textContent = `Key Indicators ${selectedYear}${weekText}${regionText}`;
+        }
+      }
+    })
+    .catch(error => console.error("❌ Key indicator error:", error));
 }
 // --- Number Formatting Helper ---
 function formatNumber(num) {
@@ -677,193 +677,150 @@ function formatNumber(num) {
 function updateDiseaseChart() {
   console.log(`📈 Updating disease chart for year: ${selectedChartYear}`);
   
-  if (!selectedChartYear || allData.length === 0) return;
+  if (!selectedChartYear) return;
 
   const ctx = document.getElementById('diseaseTrendChart');
   if (!ctx) return;
 
-  if (diseaseTrendChart) {
-    diseaseTrendChart.destroy();
-    diseaseTrendChart = null;
-  }
+  const year = selectedChartYear;
+  fetchJSON(`/api/disease-trend?year=${year}&top=5`)
+    .then(trend => {
+      if (diseaseTrendChart) {
+        diseaseTrendChart.destroy();
+        diseaseTrendChart = null;
+      }
 
-  const yearData = allData.filter(d => d.year === selectedChartYear);
-  console.log(`📊 Chart data for ${selectedChartYear}: ${yearData.length} rows`);
-
-  if (yearData.length === 0) {
-    diseaseTrendChart = new Chart(ctx, {
-      type: 'line',
-      data: { labels: [], datasets: [] },
-      options: {
-        responsive: true,
-        maintainAspectRatio: false,
-        plugins: {
-          title: {
-            display: true,
-            text: `No data for ${selectedChartYear}`
+      if (trend.datasets.length === 0) {
+        diseaseTrendChart = new Chart(ctx, {
+          type: 'line',
+          data: { labels: [], datasets: [] },
+          options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            plugins: {
+              title: {
+                display: true,
+                text: `No data for ${year}`
+              }
+            }
           }
-        }
+        });
+        return;
       }
-    });
-    return;
-  }
-
-  // Get top 5 diseases by total cases
-  const diseaseCount = {};
-  yearData.forEach(item => {
-    if (item.disease && item.disease !== "Unknown") {
-      diseaseCount[item.disease] = (diseaseCount[item.disease] || 0) + item.cases;
-    }
-  });
-
-  const diseases = Object.entries(diseaseCount)
-    .sort(([,a], [,b]) => b - a)
-    .slice(0, 5)
-    .map(([disease]) => disease);
-
-  console.log(`📊 Top diseases for ${selectedChartYear}:`, diseases);
-
-  // Aggregate to monthly data
-  const monthlyData = {};
-  const monthNames = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'];
-  monthNames.forEach((month, index) => monthlyData[month] = {});
 
-  yearData.forEach(item => {
-    // Approximate month from week (1-4=Jan, 5-8=Feb, etc.)
-    const monthIndex = Math.min(11, Math.floor((item.week - 1) / 4));
-    const monthName = monthNames[monthIndex];
-    if (diseases.includes(item.disease)) {
-      monthlyData[monthName][item.disease] = (monthlyData[monthName][item.disease] || 0) + item.cases;
-    }
-  });
-
-  console.log(`📊 Monthly aggregated data:`, monthlyData);
-
-  const datasets = diseases.map((disease, index) => ({
-    label: disease,
-    data: monthNames.map(month => monthlyData[month][disease] || 0),
-    borderColor: `hsl(${index * 72}, 60%, 40%)`,
-    backgroundColor: `hsla(${index * 72}, 70%, 50%, 0.1)`,
-    tension: 0,  // ✅ Straight lines (no waves)
-    fill: false  // ✅ No fill under lines
-  }));
+      console.log(`📊 Top diseases for ${year}:`, trend.datasets.map(d => d.label));
 
-  console.log(`📊 Creating chart with ${datasets.length} datasets`);
+      const datasets = trend.datasets.map((series, index) => ({
+        label: series.label,
+        data: series.data,
+        borderColor: `hsl(${index * 72}, 60%, 40%)`,
+        backgroundColor: `hsla(${index * 72}, 70%, 50%, 0.1)`,
+        tension: 0,  // ✅ Straight lines (no waves)
+        fill: false  // ✅ No fill under lines
+      }));
 
-  diseaseTrendChart = new Chart(ctx, {
-    type: 'line',
-    data: {
-      labels: monthNames,
-      datasets: datasets
-    },
-    options: {
-      responsive: true,
-      maintainAspectRatio: false,
-      plugins: {
-        title: {
-          display: true,
-          text: `Disease Trends ${selectedChartYear}`
+      diseaseTrendChart = new Chart(ctx, {
+        type: 'line',
+        data: {
+          labels: trend.labels,
+          datasets: datasets
         },
-        legend: {
-          position: 'top'
-        }
-      },
-      scales: {
-        y: {
-          beginAtZero: true,
-          ticks: {
-            callback: formatNumber  // ✅ Format huge numbers
+        options: {
+          responsive: true,
+          maintainAspectRatio: false,
+          plugins: {
+            title: {
+              display: true,
+              text: `Disease Trends ${year}`
+            },
+            legend: {
+              position: 'top'
+            }
+          },
+          scales: {
+            y: {
+              beginAtZero: true,
+              ticks: {
+                callback: formatNumber  // ✅ Format huge numbers
+              }
+            }
           }
         }
-      }
-    }
-  });
+      });
 
-  console.log("✅ Disease chart updated");
+      console.log("✅ Disease chart updated");
+    })
+    .catch(error => console.error("❌ Disease chart error:", error));
 }
 
 // --- Regional Chart (Year-specific, formatted) ---
 function updateRegionalChart() {
   console.log(`📈 Updating regional chart for year: ${selectedRegionalYear}`);
   
-  if (!selectedRegionalYear || allData.length === 0) return;
+  if (!selectedRegionalYear) return;
 
   const ctx = document.getElementById('regionalChart');
   if (!ctx) return;
 
-  if (regionalChart) {
-    regionalChart.destroy();
-    regionalChart = null;
-  }
+  const year = selectedRegionalYear;
+  fetchJSON(`/api/regional?year=${year}&top=5`)
+    .then(regional => {
+      if (regionalChart) {
+        regionalChart.destroy();
+        regionalChart = null;
+      }
 
-  const yearData = allData.filter(d => d.year === selectedRegionalYear);
-  console.log(`📊 Regional data for ${selectedRegionalYear}: ${yearData.length} rows`);
-
-  if (yearData.length === 0) {
-    regionalChart = new Chart(ctx, {
-      type: 'bar',
-      data: { labels: [], datasets: [] },
-      options: {
-        responsive: true,
-        maintainAspectRatio: false,
-        plugins: {
-          title: {
-            display: true,
-            text: `No data for ${selectedRegionalYear}`
+      if (regional.labels.length === 0) {
+        regionalChart = new Chart(ctx, {
+          type: 'bar',
+          data: { labels: [], datasets: [] },
+          options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            plugins: {
+              title: {
+                display: true,
+                text: `No data for ${year}`
+              }
+            }
           }
-        }
+        });
+        return;
       }
-    });
-    return;
-  }
-
-  // Group by area and sum cases
-  const areaTotals = {};
-  yearData.forEach(item => {
-    if (item.area && item.area !== "Unknown") {
-      areaTotals[item.area] = (areaTotals[item.area] || 0) + item.cases;
-    }
-  });
 
-  // Get top 5 areas
-  const sortedAreas = Object.entries(areaTotals)
-    .sort(([,a], [,b]) => b - a)
-    .slice(0, 5);
-
-  const labels = sortedAreas.map(([area]) => area);
-  const data = sortedAreas.map(([, cases]) => cases);
-
-  regionalChart = new Chart(ctx, {
-    type: 'bar',
-    data: {
-      labels: labels,
-      datasets: [{
-        label: 'Total Cases',
-        data: data,
-        backgroundColor: 'rgba(52, 152, 219, 0.8)',
-        borderColor: 'rgba(52, 152, 219, 1)',
-        borderWidth: 1
-      }]
-    },
-    options: {
-      responsive: true,
-      maintainAspectRatio: false,
-      plugins: {
-        title: {
-          display: true,
-          text: `Top 5 Districts by Cases ${selectedRegionalYear}`
-        }
-      },
-      scales: {
-        y: {
-          beginAtZero: true,
-          ticks: {
-            callback: formatNumber  // ✅ Format huge numbers
+      regionalChart = new Chart(ctx, {
+        type: 'bar',
+        data: {
+          labels: regional.labels,
+          datasets: [{
+            label: 'Total Cases',
+            data: regional.data,
+            backgroundColor: 'rgba(52, 152, 219, 0.8)',
+            borderColor: 'rgba(52, 152, 219, 1)',
+            borderWidth: 1
+          }]
+        },
+        options: {
+          responsive: true,
+          maintainAspectRatio: false,
+          plugins: {
+            title: {
+              display: true,
+              text: `Top 5 Districts by Cases ${year}`
+            }
+          },
+          scales: {
+            y: {
+              beginAtZero: true,
+              ticks: {
+                callback: formatNumber  // ✅ Format huge numbers
+              }
+            }
           }
         }
-      }
-    }
-  });
+      });
+    })
+    .catch(error => console.error("❌ Regional chart error:", error));
 }
 
 // --- Map Functions (Fixed with point plotting) ---
@@ -876,12 +833,38 @@ function initMap() {
     L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
       attribution: '© OpenStreetMap contributors'
     }).addTo(map);
+    // Finer geometry only once the user zooms in far enough to see it
+    let shownResolution = geometryResolution();
+    map.on('zoomend', () => {
+      if (geometryResolution() !== shownResolution) {
+        shownResolution = geometryResolution();
+        drawMap().catch(error => console.error("❌ Map geometry error:", error));
+      }
+    });
     console.log("✅ Map initialized successfully");
   } catch (error) {
     console.error("❌ Map initialization error:", error);
   }
 }
 
+function geometryResolution() {
+  const zoom = map ? map.getZoom() : 7;
+  return zoom <= 8 ? 'low' : zoom <= 11 ? 'medium' : 'high';
+}
+
+// Geometry URLs carry a content digest and are cached by the browser for good;
+// each one is also fetched at most once per page
+function loadGeometry(url) {
+  if (!mapGeometryCache[url]) {
+    mapGeometryCache[url] = fetchJSON(url).catch(error => {
+      delete mapGeometryCache[url];
+      throw error;
+    });
+  }
+  return mapGeometryCache[url];
+}
+
+// Year switches only fetch the compact district -> cases map
 function updateMap() {
   if (!map || !selectedHeatYear) {
     console.log("❌ Map or selectedHeatYear not available");
@@ -890,81 +873,76 @@ function updateMap() {
   
   console.log(`🗺️ Updating map for year: ${selectedHeatYear}`);
   
-  fetch(`/map_data/${selectedHeatYear}`)
-    .then(response => {
-      console.log(`🗺️ Map data response status: ${response.status}`);
-      return response.json();
-    })
-    .then(mapData => {
-      console.log("🗺️ Map data received:", mapData);
-      
-      if (geojsonLayer) {
-        map.removeLayer(geojsonLayer);
-        geojsonLayer = null;
-      }
-
-      if (mapData.error) {
-        console.error("❌ Map data error:", mapData.error);
-        return;
-      }
-
-      if (!mapData.features || mapData.features.length === 0) {
-        console.error("❌ No features in map data");
+  fetchJSON(`/map_data/${selectedHeatYear}`)
+    .then(data => {
+      if (data.error) {
+        console.error("❌ Map data error:", data.error);
         return;
       }
-
-      // Debug: Show what cases data we have
-      const casesData = mapData.features.map(f => ({
-        name: f.properties.district_display,
-        cases: f.properties.cases
-      }));
-      console.log("🗺️ Cases by district:", casesData.slice(0, 10));
-
-      const maxCases = Math.max(...mapData.features.map(f => f.properties.cases || 0));
-      console.log(`🗺️ Max cases: ${maxCases}`);
-
-      geojsonLayer = L.geoJSON(mapData, {
-        // ✅ FIXED: Add pointToLayer for plotting points as circle markers
-        pointToLayer: function (feature, latlng) {
-          const cases = feature.properties.cases || 0;
-          return L.circleMarker(latlng, {
-            radius: Math.max(5, Math.min(20, cases / 100)),  // Size based on cases
-            fillColor: cases > 0 ? 'red' : '#cccccc',
-            color: 'white',
-            weight: 1,
-            opacity: 1,
-            fillOpacity: 0.8
-          });
-        },
-        style: function (feature) {
-          // For polygons (if any)
-          const cases = feature.properties.cases || 0;
-          const intensity = maxCases > 0 ? cases / maxCases : 0;
-          return {
-            fillColor: cases > 0 ? `hsl(${120 - intensity * 120}, 70%, 50%)` : '#cccccc',
-            weight: 2,
-            opacity: 1,
-            color: 'white',
-            fillOpacity: 0.7
-          };
-        },
-        onEachFeature: (feature, layer) => {
-          const props = feature.properties;
-          layer.bindPopup(`
-            <strong>${props.district_display || 'Unknown'}</strong><br>
-            Cases: ${(props.cases || 0).toLocaleString()}<br>
-            Year: ${selectedHeatYear}
-          `);
-        }
-      }).addTo(map);
-
-      console.log("✅ Map updated successfully");
+      mapYearData = data;
+      return drawMap();
     })
     .catch(error => {
       console.error("❌ Map data error:", error);
     });
 }
 
+// Join the cached geometry with the current year's cases and redraw the layer
+function drawMap() {
+  if (!map || !mapYearData) return Promise.resolve();
+  const yearData = mapYearData;
+  const url = yearData.geometry[geometryResolution()];
+
+  return loadGeometry(url).then(geometry => {
+    if (yearData !== mapYearData) return;  // a newer year arrived meanwhile
+
+    if (geojsonLayer) {
+      map.removeLayer(geojsonLayer);
+      geojsonLayer = null;
+    }
+
+    const casesFor = feature => yearData.cases[feature.properties.name] || 0;
+    const maxCases = Math.max(0, ...Object.values(yearData.cases));
+    console.log(`🗺️ ${Object.keys(yearData.cases).length} districts with cases in ${yearData.year}, max ${maxCases}`);
+
+    geojsonLayer = L.geoJSON(geometry, {
+      // Districts are points, plotted as circle markers sized by cases
+      pointToLayer: function (feature, latlng) {
+        const cases = casesFor(feature);
+        return L.circleMarker(latlng, {
+          radius: Math.max(5, Math.min(20, cases / 100)),  // Size based on cases
+          fillColor: cases > 0 ? 'red' : '#cccccc',
+          color: 'white',
+          weight: 1,
+          opacity: 1,
+          fillOpacity: 0.8
+        });
+      },
+      style: function (feature) {
+        // For polygons (if any)
+        const cases = casesFor(feature);
+        const intensity = maxCases > 0 ? cases / maxCases : 0;
+        return {
+          fillColor: cases > 0 ? `hsl(${120 - intensity * 120}, 70%, 50%)` : '#cccccc',
+          weight: 2,
+          opacity: 1,
+          color: 'white',
+          fillOpacity: 0.7
+        };
+      },
+      onEachFeature: (feature, layer) => {
+        layer.bindPopup(`
+          <strong>${feature.properties.name || 'Unknown'}</strong><br>
+          Cases: ${casesFor(feature).toLocaleString()}<br>
+          Year: ${yearData.year}
+        `);
+      }
+    }).addTo(map);
+
+    console.log("✅ Map updated successfully");
+  });
+}
+
 // --- Rest of your code (chat, export, refresh) remains unchanged ---
 
 // Add this to the bottom if needed
@@ -0,0 +1,71 @@
+# tests/conftest.py
+"""Shared fixtures: the bundled govdata extract and app.py wired to the bench stand-ins.
+
+    python -m pytest tests
+
+No network or API keys are needed: Supabase and Gemini are the local
+stand-ins from bench/standins.py.
+"""
+import csv
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from datastore import HealthStore  # noqa: E402
+
+GOVDATA_CSV = os.path.join(REPO_ROOT, "static", "data", "govdata.csv")
+
+
+@pytest.fixture(scope="session")
+def govdata_records():
+    """Rows of static/data/govdata.csv shaped like Supabase returns them"""
+    with open(GOVDATA_CSV, newline="", encoding="utf-8") as f:
+        return [{key.strip(): value for key, value in row.items() if key}
+                for row in csv.DictReader(f)]
+
+@pytest.fixture
+def govdata_store(govdata_records):
+    return HealthStore.from_records(govdata_records)
+
+@pytest.fixture(scope="session")
+def supabase_standin():
+    """PostgREST-shaped govdata table of synthetic rows (empty until resized)"""
+    from bench.standins import SyntheticSupabase
+
+    supabase = SyntheticSupabase()
+    yield supabase
+    supabase.close()
+
+@pytest.fixture(scope="session")
+def standins(supabase_standin):
+    """``(app module, FakeGemini)``: app.py on the Supabase stand-in and a fake Gemini"""
+    from bench.standins import import_app
+
+    return import_app(supabase_standin)
+
+@pytest.fixture(scope="session")
+def app_module(standins):
+    return standins[0]
+
+@pytest.fixture
+def fake_gemini(standins):
+    return standins[1]
+
+@pytest.fixture
+def serve(app_module, monkeypatch):
+    """``serve(store)`` makes ``store`` the dataset app.py answers from for one test"""
+    def install(store):
+        monkeypatch.setattr(app_module, "HEALTH_STORE", store)
+        app_module.RESPONSE_CACHE.clear()
+        return store
+    yield install
+    app_module.RESPONSE_CACHE.clear()
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
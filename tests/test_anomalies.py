@@ -0,0 +1,58 @@
+# tests/test_anomalies.py
+"""Weekly spike detection on sparse count series."""
+import numpy as np
+
+from anomalies import AnomalyDetector
+from datastore import HealthStore
+from entities import STOP_TERMS
+
+
+def weekly(area, disease, counts, year=2024):
+    """One report per week with the given case counts (zeros are weeks without reports)"""
+    return [{"Year": year, "Week": week, "Unique id": f"{area}/{disease}/{week}", "State": "Maharashtra",
+             "Area": area, "Disease": disease, "No of cases": cases, "No of deaths": 0}
+            for week, cases in enumerate(counts, start=1) if cases]
+
+def flagged(records):
+    detector = AnomalyDetector()
+    detector.update(HealthStore.from_records(records))
+    return {(a["area"], a["disease"]) for a in detector.current["anomalies"]}
+
+def test_spike_over_a_steady_series_is_flagged():
+    assert flagged(weekly("Pune", "Dengue", [3, 4, 2, 3, 5, 3, 4, 2, 3, 4, 3, 40])) == {("Pune", "Dengue")}
+
+def test_series_needs_weeks_with_cases_before_it_is_scored():
+    # The first report in a long run of empty weeks is not an anomaly on its own
+    records = weekly("Pune", "Dengue", [3] + [0] * 20 + [12])
+    records += weekly("Thane", "Malaria", [2, 0, 3, 0, 2, 0, 2] + [0] * 14 + [12])
+    assert flagged(records) == {("Thane", "Malaria")}
+
+def test_counts_within_poisson_noise_are_not_flagged():
+    assert flagged(weekly("Pune", "Dengue", [20] * 15 + [30])) == set()
+
+def test_stop_terms_are_never_flagged():
+    history = [2, 0, 3, 0, 2, 0, 2, 1, 0, 0, 25]
+    records = weekly("Nanded", "Acute", history) + weekly("Dharashiv", "Suspected", history)
+    records += weekly("Nanded", "Cholera", history)
+    assert flagged(records) == {("Nanded", "Cholera")}
+
+def test_bundled_data_flags_only_named_diseases(govdata_store):
+    detector = AnomalyDetector()
+    detector.update(govdata_store)
+    assert all(a["disease"].lower() not in STOP_TERMS for a in detector.current["anomalies"])
+
+def test_rewritten_committed_week_replays_from_a_checkpoint(govdata_store, govdata_records):
+    detector = AnomalyDetector()
+    detector.update(govdata_store)
+    since = govdata_store.sync_window(4)
+    delta = [dict(row, **{"No of cases": str(int(row["No of cases"]) + 7)}) for row in govdata_records
+             if (int(row["Year"]), int(row["Week"])) >= since]
+    merged = govdata_store.merge(HealthStore.from_records(delta), since=since)
+
+    assert detector._first_changed(merged, merged.watermark()) == since
+    assert detector.update(merged) == 4  # the rewritten weeks, not the whole history
+    fresh = AnomalyDetector()
+    fresh.update(merged)
+    assert detector.current == fresh.current
+    np.testing.assert_allclose(detector.mean, fresh.mean)
+    np.testing.assert_allclose(detector.var, fresh.var)
@@ -0,0 +1,88 @@
+# tests/test_answer_cache.py
+"""AnswerCache expiry, eviction, coalescing and the counters /metrics exports."""
+import threading
+import time
+
+import pytest
+
+from answer_cache import AnswerCache, WaitTimeout
+
+
+def test_get_counts_hits_and_misses():
+    cache = AnswerCache(maxsize=4, ttl=60)
+    assert cache.get("q") is None
+    cache.put("q", "answer")
+    assert cache.get("q") == "answer"
+    assert cache.get("other") is None
+    assert cache.stats["hit"] == 1
+    assert cache.stats["miss"] == 2
+
+def test_entries_expire_after_ttl():
+    cache = AnswerCache(maxsize=4, ttl=0.05)
+    cache.put("q", "answer")
+    time.sleep(0.1)
+    assert cache.get("q") is None
+    assert cache.get_or_compute("q", lambda: "fresh") == ("fresh", "miss")
+
+def test_least_recently_used_entry_is_evicted():
+    cache = AnswerCache(maxsize=2, ttl=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats["evicted"] == 1
+
+def test_concurrent_misses_share_one_computation():
+    cache = AnswerCache(maxsize=4, ttl=60)
+    release, calls, results = threading.Event(), [], []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return "answer"
+
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("q", compute)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    while cache.stats["miss"] + cache.stats["coalesced"] < 5:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(status for _, status in results) == ["coalesced"] * 4 + ["miss"]
+    assert {value for value, _ in results} == {"answer"}
+
+def test_failed_computation_is_not_cached():
+    cache = AnswerCache(maxsize=4, ttl=60)
+
+    def fail():
+        raise RuntimeError("LLM unavailable")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute("q", fail)
+    assert cache.get_or_compute("q", lambda: "answer") == ("answer", "miss")
+
+def test_waiting_on_a_hung_computation_times_out():
+    cache = AnswerCache(maxsize=4, ttl=60, wait_timeout=0.05)
+    assert cache.begin("q") == (None, "miss")  # the leader never finishes
+    with pytest.raises(WaitTimeout):
+        cache.begin("q")
+    assert cache.stats["wait_timeout"] == 1
+
+    cache.finish("q", "late answer")
+    assert cache.begin("q") == ("late answer", "hit")
+
+def test_insight_cache_counters_are_exported_before_the_engine_is_built(app_module, client, monkeypatch):
+    monkeypatch.delitem(app_module._DERIVED, "insight engine", raising=False)
+    body = client.get("/metrics").get_data(as_text=True)
+    assert 'cache_lookups_total{cache="insights",result="miss"} 0' in body
+
+    client.get("/api/insights/seasonality?disease=Dengue")
+    client.get("/api/insights/seasonality?disease=Dengue")
+    body = client.get("/metrics").get_data(as_text=True)
+    assert 'cache_lookups_total{cache="insights",result="miss"} 1' in body
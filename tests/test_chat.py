@@ -0,0 +1,76 @@
+# tests/test_chat.py
+"""Chat questions answered from templates must agree with summarize_data."""
+import json
+import re
+import threading
+
+import pytest
+
+TEMPLATED = [
+    ("How many dengue cases in Pune in 2024?", "cases"),
+    ("Malaria deaths in Gadchiroli", "deaths"),
+    ("How many dengue cases and deaths in Pune in 2024?", "both"),
+    ("Total cholera cases and deaths in 2024", "both"),
+]
+
+
+def numbers(text):
+    return [int(n.replace(",", "")) for n in re.findall(r"\d[\d,]*", text)]
+
+def ask(client, message):
+    response = client.post("/chat", json={"message": message})
+    assert response.status_code == 200
+    return response.get_json()
+
+@pytest.mark.parametrize("question,metric", TEMPLATED)
+def test_templated_answer_matches_the_summary(app_module, client, serve, govdata_store, question, metric):
+    serve(govdata_store)
+    intent = app_module.parse_intent(question, govdata_store)
+    assert intent["metric"] == metric
+
+    summary = app_module.summarize_data(intent, govdata_store)
+    reply = ask(client, question)
+    assert reply["source"] == "template"
+
+    # The summary headline's totals lead the templated reply, in the same order
+    expected = [n for n in numbers(summary[0]) if n != intent["year"]]
+    assert numbers(reply["response"])[:len(expected)] == expected
+
+def test_cases_and_deaths_question_reports_both(client, serve, govdata_store):
+    serve(govdata_store)
+    reply = ask(client, "How many dengue cases and deaths in Pune in 2024?")["response"]
+    assert "cases" in reply and "deaths" in reply
+
+def test_open_ended_question_goes_to_the_llm(client, serve, govdata_store):
+    serve(govdata_store)
+    reply = ask(client, "Why do dengue cases spike in Pune during the monsoon?")
+    assert reply["source"] in ("llm", "cache")
+
+def stream(client, message):
+    """``(source of the done event, full text of the delta events)``"""
+    body = client.post("/chat/stream", json={"message": message}).get_data(as_text=True)
+    events = [block for block in body.split("\n\n") if block]
+    deltas = "".join(json.loads(block[len("data: "):])["delta"] for block in events
+                     if block.startswith("data: "))
+    done = json.loads(events[-1].split("data: ", 1)[1])
+    return done["source"], deltas
+
+def test_identical_streams_in_flight_share_one_llm_call(app_module, client, serve, govdata_store,
+                                                        fake_gemini, monkeypatch):
+    serve(govdata_store)
+    app_module.ANSWER_CACHE.clear()
+    monkeypatch.setattr(fake_gemini, "latency", 0.4)
+    calls = fake_gemini.calls
+    question = "What should Pune prepare for in the coming weeks?"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(stream(client, question)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert fake_gemini.calls - calls == 1
+    assert sorted(source for source, _ in results) == ["cache"] * 3 + ["llm"]
+    assert len({text for _, text in results}) == 1
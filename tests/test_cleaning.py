@@ -0,0 +1,35 @@
+# tests/test_cleaning.py
+"""Chunked CSV cleaning: duplicates across chunks and week validation."""
+import os
+
+import numpy as np
+
+from cleaning import clean_csv
+from datastore import COLUMNS
+
+ROW = "2024,{week},MH/PNE/2024/{week}/{n},Maharashtra,Pune,Dengue,{cases},0,01-01-2024,02-01-2024"
+
+
+def write_csv(path, rows):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(",".join(COLUMNS) + "\n")
+        f.write("\n".join(rows) + "\n")
+    return str(path)
+
+def test_duplicates_are_counted_across_chunks(tmp_path):
+    rows = [ROW.format(week=w, n=n, cases=n) for n, w in enumerate(range(1, 41))]
+    path = write_csv(tmp_path / "govdata.csv", rows + rows[:7] + rows[3:5])
+
+    store, report = clean_csv(path, chunksize=6)
+    assert len(store) == 49
+    assert report.duplicates == 9
+    assert report._hash_dir is None
+    assert not any(name.startswith("govdata-row-hashes-") for name in os.listdir(tmp_path))
+
+def test_weeks_outside_1_to_53_become_week_zero(tmp_path):
+    rows = [ROW.format(week=week, n=n, cases=1) for n, week in enumerate(["1", "53", "54", "200", "-3", "2.5", "x", ""])]
+    store, report = clean_csv(write_csv(tmp_path / "govdata.csv", rows))
+
+    np.testing.assert_array_equal(store.week, [1, 53, 0, 0, 0, 0, 0, 0])
+    assert report.invalid_weeks == 5
+    assert report.missing["Week"] == 1
@@ -0,0 +1,110 @@
+# tests/test_datastore.py
+"""HealthStore incremental merges against a full rebuild."""
+import numpy as np
+import pytest
+
+from datastore import MEASURES, AggregateCube, HealthStore
+
+
+def window(records, since):
+    year, week = since
+    return [row for row in records
+            if (int(row["Year"]), int(row["Week"])) >= (year, week)]
+
+def watermarks(store):
+    return sorted({(int(y), int(w)) for y, w in zip(store.year.tolist(), store.week.tolist())})
+
+def assert_cube_matches_rebuild(store):
+    rebuilt = AggregateCube.from_store(store)
+    np.testing.assert_array_equal(store.cube.years, rebuilt.years)
+    for name in MEASURES + ("digest",):
+        np.testing.assert_array_equal(getattr(store.cube, name), getattr(rebuilt, name))
+
+def test_noop_resync_keeps_every_row(govdata_store, govdata_records):
+    # (2018, 15) re-reads ids that 2016 week 15 also uses
+    for since in watermarks(govdata_store)[::10] + [(2018, 15)]:
+        merged = govdata_store.merge(HealthStore.from_records(window(govdata_records, since)), since=since)
+        assert len(merged) == len(govdata_store), since
+        assert merged.version == govdata_store.version
+
+def test_resync_keeps_rows_that_share_an_id_with_the_window(govdata_store, govdata_records):
+    since = govdata_store.watermark()
+    delta = window(govdata_records, since)
+    ids = {row["Unique id"] for row in delta}
+    reused = [row for row in govdata_records if row["Unique id"] in ids and row not in delta]
+
+    changed = [dict(row, **{"No of cases": str(int(row["No of cases"]) + 1)}) for row in delta]
+    merged = govdata_store.merge(HealthStore.from_records(changed), since=since)
+
+    assert len(merged) == len(govdata_store)
+    assert merged.cube.totals()["cases"] == govdata_store.cube.totals()["cases"] + len(delta)
+    kept = {repr(sorted(row.items())) for row in merged.to_records()}
+    assert all(repr(sorted(row.items())) in kept for row in HealthStore.from_records(reused).to_records())
+
+@pytest.mark.parametrize("since", [(2024, 30), (2025, 1)])
+def test_merged_cube_matches_a_rebuild(govdata_store, govdata_records, since):
+    govdata_store.timeline  # built before the merge, so it is carried forward
+    delta = window(govdata_records, since)[::2]  # half the window disappears upstream
+    delta.append(dict(delta[0], **{"Area": "Newtown", "Disease": "Newpox", "Year": "2026", "Week": "1"}))
+    merged = govdata_store.merge(HealthStore.from_records(delta), since=since)
+
+    assert len(merged) == int((~govdata_store.since_mask(*since)).sum()) + len(delta)
+    assert_cube_matches_rebuild(merged)
+    rebuilt = HealthStore.from_records(merged.to_records())
+    np.testing.assert_array_equal(merged.timeline.days, rebuilt.timeline.days)
+    for by in ("area", "disease"):
+        codes, means = merged.timeline.mean_response_days(by)
+        names = [merged.areas[c] if by == "area" else merged.diseases[c] for c in codes]
+        codes2, means2 = rebuilt.timeline.mean_response_days(by)
+        names2 = [rebuilt.areas[c] if by == "area" else rebuilt.diseases[c] for c in codes2]
+        assert dict(zip(names, means.round(9))) == dict(zip(names2, means2.round(9)))
+
+def test_cube_rollups_match_row_sums(govdata_store):
+    store = govdata_store
+    pune = store.codes_named(store.areas, ["Pune"])
+    dengue = store.codes_named(store.diseases, ["Dengue"])
+    for selection in ({}, {"year": 2024}, {"year": 2024, "week": 35}, {"areas": pune},
+                      {"year": 2023, "areas": pune, "diseases": dengue}):
+        mask = store.mask(year=selection.get("year"), week=selection.get("week"),
+                          area_codes=selection.get("areas"), disease_codes=selection.get("diseases"))
+        assert store.cube.totals(**selection) == {
+            "cases": int(store.cases[mask].sum()), "deaths": int(store.deaths[mask].sum()),
+            "rows": int(mask.sum())}, selection
+
+def test_timeline_window_matches_a_scan(govdata_store):
+    store = govdata_store
+    timeline = store.timeline
+    start, end = timeline.latest_day - 60, timeline.latest_day - 20
+    expected = np.flatnonzero((store.report_day >= start) & (store.report_day <= end))
+    window = timeline.window(start, end)
+    assert sorted(window.tolist()) == expected.tolist()
+    assert np.all(np.diff(store.report_day[window]) >= 0)
+
+def test_snapshot_round_trip_keeps_version_and_cube(govdata_store, tmp_path):
+    govdata_store.save(str(tmp_path))
+    loaded = HealthStore.load(str(tmp_path))
+    assert loaded.version == govdata_store.version
+    assert loaded.to_records() == govdata_store.to_records()
+    assert_cube_matches_rebuild(loaded)
+
+def test_week_digest_is_rebuilt_for_snapshots_saved_without_one(govdata_store, tmp_path):
+    govdata_store.save(str(tmp_path))
+    (tmp_path / "cube_digest.npy").unlink()
+    np.testing.assert_array_equal(HealthStore.load(str(tmp_path)).cube.digest, govdata_store.cube.digest)
+
+def test_malformed_years_and_weeks_are_stored_as_zero(govdata_records):
+    good = dict(govdata_records[0], Year="2024", Week="10")
+    bad = [dict(good, Week=week) for week in ("200", "60", "-3", "2.5", "x", "")]
+    bad += [dict(good, Year=year) for year in ("70000", "-1", "abc")]
+    store = HealthStore.from_records([good] + bad)
+
+    assert store.week.tolist() == [10, 0, 0, 0, 0, 0, 0, 10, 10, 10]
+    assert store.year.tolist() == [2024] + [2024] * 6 + [0, 0, 0]
+    # An invalid week never becomes the incremental sync's watermark
+    assert store.watermark() == (2024, 10)
+
+def test_sync_window_steps_back_across_years(govdata_records):
+    store = HealthStore.from_records([dict(govdata_records[0], Year="2025", Week="2")])
+    assert store.sync_window(0) == (2025, 2)
+    assert store.sync_window(4) == (2024, 50)
+    assert HealthStore.empty().sync_window(4) is None
@@ -0,0 +1,42 @@
+# tests/test_entities.py
+"""EntityMatcher over a store's vocabularies."""
+import pytest
+
+from entities import EntityMatcher
+
+AREAS = ["Pune", "Beed", "Mumbai Suburban", "Maharashtra"]
+DISEASES = ["Dengue", "Food Poisoning", "Acute", "Chickenpox", "AES"]
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return EntityMatcher(AREAS, DISEASES)
+
+def names(codes, vocabulary):
+    return None if codes is None else [vocabulary[code] for code in codes]
+
+def test_names_map_to_their_codes(matcher):
+    found = matcher.match("How many dengue cases in Pune?")
+    assert found["areas"] == ["pune"] and found["diseases"] == ["dengue"]
+    assert names(found["area_codes"], AREAS) == ["Pune"]
+    assert names(found["disease_codes"], DISEASES) == ["Dengue"]
+
+def test_longest_phrase_wins(matcher):
+    found = matcher.match("food poisoning in mumbai suburban")
+    assert found["diseases"] == ["food poisoning"]
+    assert names(found["area_codes"], AREAS) == ["Mumbai Suburban"]
+
+def test_aliases_and_plurals_share_codes(matcher):
+    assert names(matcher.match("chicken pox in bid")["disease_codes"], DISEASES) == ["Chickenpox"]
+    assert names(matcher.match("brain fever")["disease_codes"], DISEASES) == ["AES"]
+    assert names(matcher.match("dengues")["disease_codes"], DISEASES) == ["Dengue"]
+
+def test_stop_terms_and_unmentioned_kinds_match_nothing(matcher):
+    found = matcher.match("acute outbreaks across maharashtra")
+    assert found == {"areas": [], "diseases": [], "area_codes": None, "disease_codes": None}
+
+def test_every_bundled_disease_name_matches_itself(govdata_store):
+    matcher = EntityMatcher.from_store(govdata_store)
+    for code in (govdata_store.codes_named(govdata_store.diseases, ["Dengue", "Malaria", "Cholera"])):
+        found = matcher.match(f"{govdata_store.diseases[code]} cases")
+        assert code in found["disease_codes"]
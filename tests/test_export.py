@@ -0,0 +1,72 @@
+# tests/test_export.py
+"""/data filters, pagination cursors and formats."""
+import base64
+import json
+
+import numpy as np
+
+
+def page(client, **params):
+    response = client.get("/data", query_string=params)
+    return response.status_code, response.get_json()
+
+def test_cursor_pages_cover_every_row_once(client, serve, govdata_store):
+    serve(govdata_store)
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 400, "fields": "Unique id"}
+        if cursor:
+            params["cursor"] = cursor
+        status, body = page(client, **params)
+        assert status == 200
+        seen.extend(row["Unique id"] for row in body["data"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    expected = [uid.decode() for uid in govdata_store.unique_id.tolist()]
+    assert seen == expected
+
+def test_cursor_from_an_older_dataset_is_rejected(client, serve, govdata_store, govdata_records):
+    serve(govdata_store)
+    _, first = page(client, limit=10)
+
+    changed = [dict(row) for row in govdata_records]
+    changed[0]["No of cases"] = str(int(changed[0]["No of cases"]) + 1)
+    serve(govdata_store.__class__.from_records(changed))
+    status, body = page(client, limit=10, cursor=first["next_cursor"])
+    assert status == 409
+    assert body["version"] != govdata_store.version
+
+def test_malformed_and_negative_cursors_are_bad_requests(client, serve, govdata_store):
+    serve(govdata_store)
+    negative = base64.urlsafe_b64encode(
+        json.dumps({"row": -5, "v": govdata_store.version}).encode()).decode()
+    for cursor in ("not-a-cursor", negative):
+        status, _ = page(client, limit=10, cursor=cursor)
+        assert status == 400
+
+def test_columnar_format_decodes_to_the_row_format(client, serve, govdata_store):
+    serve(govdata_store)
+    _, rows = page(client, year=2024, limit=50)
+    _, columnar = page(client, year=2024, limit=50, format="columnar")
+    columns, lookup = columnar["columns"], columnar["lookup"]
+    decoded = [
+        {name: lookup[name][values[i]] if name in lookup else values[i] for name, values in columns.items()}
+        for i in range(columnar["count"])
+    ]
+    assert decoded == rows["data"]
+    assert np.all(np.array([row["Year"] for row in decoded]) == 2024)
+
+def test_unparseable_numbers_are_rejected(client, serve, govdata_store):
+    serve(govdata_store)
+    for url in ("/data?year=abc", "/data?week=x&limit=5", "/data?limit=ten",
+                "/api/indicators?year=20x4", "/api/regional?year=2024&top=many",
+                "/api/recent-outbreaks?limit=all", "/api/anomalies?limit=-"):
+        response = client.get(url)
+        assert response.status_code == 400, url
+        assert "must be an integer" in response.get_json()["error"]
+
+def test_empty_numbers_mean_no_filter(client, serve, govdata_store):
+    serve(govdata_store)
+    status, body = page(client, year="", limit=5)
+    assert status == 200 and body["count"] == 5
@@ -0,0 +1,75 @@
+# tests/test_http_cache.py
+"""Dataset-versioned responses: ETags, 304s and the shared body cache."""
+import gzip
+
+import pytest
+
+import httpcache
+
+
+@pytest.fixture
+def published(app_module, monkeypatch):
+    """``publish(store)`` through the app's own swap; state is put back after the test"""
+    monkeypatch.setattr(app_module, "HEALTH_STORE", app_module.HEALTH_STORE)
+    monkeypatch.setattr(app_module.ANOMALY_DETECTOR, "current", app_module.ANOMALY_DETECTOR.current)
+    yield app_module.publish_store
+    app_module.RESPONSE_CACHE.clear()
+
+def test_request_during_a_swap_does_not_cache_stale_anomalies(app_module, client, published,
+                                                               govdata_store, govdata_records, monkeypatch):
+    published(govdata_store)
+    client.get("/api/anomalies")
+
+    changed = [dict(row) for row in govdata_records]
+    changed[0]["No of cases"] = str(int(changed[0]["No of cases"]) + 1)
+    new_store = govdata_store.__class__.from_records(changed)
+
+    update = app_module.ANOMALY_DETECTOR.update
+    def update_with_request_in_flight(store):
+        client.get("/api/anomalies")  # arrives while derived views are being rebuilt
+        return update(store)
+    monkeypatch.setattr(app_module.ANOMALY_DETECTOR, "update", update_with_request_in_flight)
+    published(new_store)
+
+    body = client.get("/api/anomalies").get_json()
+    assert body["version"] == new_store.version
+
+def test_matching_etag_gets_304_until_the_data_changes(app_module, client, published,
+                                                       govdata_store, govdata_records):
+    published(govdata_store)
+    first = client.get("/api/regional?year=2024")
+    assert first.status_code == 200
+    assert first.headers["X-Dataset-Version"] == govdata_store.version
+    etag = first.headers["ETag"]
+
+    assert client.get("/api/regional?year=2024", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/api/regional?year=2023", headers={"If-None-Match": etag}).status_code == 200
+
+    changed = [dict(row) for row in govdata_records]
+    changed[0]["No of cases"] = str(int(changed[0]["No of cases"]) + 1)
+    published(govdata_store.__class__.from_records(changed))
+    again = client.get("/api/regional?year=2024", headers={"If-None-Match": etag})
+    assert again.status_code == 200
+    assert again.headers["ETag"] != etag
+
+def test_gzip_is_a_separate_representation(client, published, govdata_store):
+    published(govdata_store)
+    plain = client.get("/data?year=2024&limit=200")
+    zipped = client.get("/data?year=2024&limit=200", headers={"Accept-Encoding": "gzip"})
+    assert zipped.headers["Content-Encoding"] == "gzip"
+    assert zipped.headers["ETag"] != plain.headers["ETag"]
+    assert gzip.decompress(zipped.get_data()) == plain.get_data()
+
+    revalidated = client.get("/data?year=2024&limit=200", headers={
+        "Accept-Encoding": "gzip", "If-None-Match": zipped.headers["ETag"]})
+    assert revalidated.status_code == 304
+
+def test_fingerprinted_static_assets_are_immutable(app_module, client):
+    with app_module.app.test_request_context():
+        url = app_module.asset_url("script.js")
+    assert "?v=" in url
+    fingerprinted = client.get(url)
+    assert fingerprinted.headers["Cache-Control"] == httpcache.IMMUTABLE
+    bare = client.get("/static/script.js")
+    assert bare.headers["Cache-Control"] == httpcache.REVALIDATE
+    assert client.get("/static/script.js", headers={"If-None-Match": bare.headers["ETag"]}).status_code == 304
@@ -0,0 +1,48 @@
+# tests/test_supabase_loader.py
+"""Paged Supabase reads: ordering and short or overlapping loads."""
+import types
+
+import pytest
+
+from supabase_loader import GOVDATA_ORDER, LoadError, SupabaseRestLoader
+
+
+class FakeSession:
+    """Serves ``rows`` like PostgREST, recording the query of every request"""
+
+    def __init__(self, rows, lose=0):
+        self.rows = rows
+        self.lose = lose  # rows missing from the first page, as if the table changed mid-load
+        self.headers = {}
+        self.params = []
+
+    def mount(self, *args):
+        pass
+
+    def get(self, url, params, headers, timeout):
+        self.params.append(params)
+        lo, hi = (int(part) for part in headers["Range"].split("-"))
+        page = self.rows[lo:hi + 1]
+        if lo == 0 and "Prefer" not in headers:
+            page = page[self.lose:]
+        return types.SimpleNamespace(
+            status_code=206, raise_for_status=lambda: None, json=lambda: page,
+            headers={"Content-Range": f"{lo}-{hi}/{len(self.rows)}"})
+
+def loader(session):
+    return SupabaseRestLoader("http://supabase.test", "key", page_size=10, workers=3, session=session)
+
+def test_every_page_is_requested_in_a_total_order():
+    session = FakeSession([{"n": i} for i in range(35)])
+    assert loader(session).fetch_all() == session.rows
+    assert {params["order"] for params in session.params} == {GOVDATA_ORDER}
+    assert '"Unique id"' in GOVDATA_ORDER
+
+def test_short_load_fails_instead_of_returning_partial_rows():
+    session = FakeSession([{"n": i} for i in range(35)], lose=2)
+    with pytest.raises(LoadError, match="expected 35 rows but received 33"):
+        loader(session).fetch_all()
+
+def test_loader_refuses_to_page_without_an_order():
+    with pytest.raises(ValueError):
+        SupabaseRestLoader("http://supabase.test", "key", order_by=None, session=FakeSession([]))
@@ -0,0 +1,76 @@
+# tests/test_sync.py
+"""Supabase loads, snapshot publishing and readiness."""
+import pytest
+
+import snapshot
+
+
+@pytest.fixture
+def syncing(app_module, supabase_standin, monkeypatch, tmp_path):
+    """A fresh snapshot root and served state that are put back after the test"""
+    monkeypatch.setattr(app_module, "HEALTH_STORE", app_module.HEALTH_STORE)
+    monkeypatch.setattr(app_module, "SNAPSHOT_DIR", str(tmp_path))
+    monkeypatch.setattr(app_module, "SNAPSHOT_RETRY_DELAY", 0)
+    for key, value in app_module.DATA_STATUS.items():
+        monkeypatch.setitem(app_module.DATA_STATUS, key, value)
+    monkeypatch.setitem(app_module.DATA_STATUS, "snapshot_version", None)
+    rows = supabase_standin.rows
+    supabase_standin.resize(300)
+    yield app_module
+    supabase_standin.resize(rows)
+    app_module.RESPONSE_CACHE.clear()
+
+def test_failed_snapshot_write_fails_the_sync(syncing, client, monkeypatch):
+    previous = syncing.HEALTH_STORE
+    attempts = []
+
+    def unwritable(*args, **kwargs):
+        attempts.append(1)
+        raise OSError("disk full")
+
+    monkeypatch.setattr(snapshot, "write", unwritable)
+    assert syncing.load_health_data("full") is False
+    assert len(attempts) == syncing.SNAPSHOT_WRITE_ATTEMPTS
+    assert syncing.HEALTH_STORE is previous
+    assert "disk full" in syncing.DATA_STATUS["error"]
+    assert client.get("/ready").status_code == 503
+
+def test_ready_once_the_snapshot_is_published(syncing, client):
+    assert syncing.load_health_data("full") is True
+    assert len(syncing.HEALTH_STORE) == 300
+    assert snapshot.current_version(syncing.SNAPSHOT_DIR) == syncing.HEALTH_STORE.version
+
+    status = client.get("/ready")
+    assert status.status_code == 200
+    assert status.get_json()["snapshot_version"] == syncing.HEALTH_STORE.version
+
+class WindowLoader:
+    """Stand-in loader answering fetch_since from a list of records"""
+
+    def __init__(self, records):
+        self.records = records
+        self.since = None
+
+    def fetch_since(self, year, week):
+        self.since = (year, week)
+        return [row for row in self.records if (int(row["Year"]), int(row["Week"])) >= (year, week)]
+
+def test_incremental_sync_picks_up_late_rows_in_the_lookback(syncing, client, monkeypatch,
+                                                             govdata_store, govdata_records):
+    monkeypatch.setattr(syncing, "HEALTH_STORE", govdata_store)
+    latest = govdata_store.watermark()
+    since = govdata_store.sync_window(syncing.INCREMENTAL_LOOKBACK_WEEKS)
+    assert since < latest
+
+    late = dict(govdata_records[0], Year=str(since[0]), Week=str(since[1]), **{"Unique id": "MH/LATE/1"})
+    loader = WindowLoader(govdata_records + [late])
+    monkeypatch.setattr(syncing, "govdata_loader", loader)
+
+    assert syncing.load_health_data("incremental") is True
+    assert loader.since == since
+    assert len(syncing.HEALTH_STORE) == len(govdata_store) + 1
+
+    body = client.get("/ready").get_json()
+    assert body["incremental_window"] == {"year": since[0], "week": since[1]}
+    assert "full reload" in body["note"]
+    assert "last_full_sync" in body
@@ -1,15 +1,63 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+
 import chromadb
 from chromadb.utils import embedding_functions
-import os
 
 # --- Configuration ---
 KNOWLEDGE_BASE_FILE = "knowledge_base.txt"
 PERSIST_DIRECTORY = "db"  # The folder where the database will be stored
 COLLECTION_NAME = "health_insights" # A name for your collection of insights
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+MANIFEST_FILE = os.path.join(PERSIST_DIRECTORY, "manifest.json")  # ids already indexed
+BATCH_SIZE = 256  # insights embedded and upserted per call
+
+def insight_id(text):
+    """Content-addressed ID: the same sentence always maps to the same ID"""
+    return "insight_" + hashlib.sha1(text.encode("utf-8")).hexdigest()[:20]
+
+def read_insights(path):
+    """{id: text} for every non-empty line, in file order, duplicates dropped"""
+    with open(path, "r", encoding="utf-8") as f:
+        documents = [line.strip() for line in f if line.strip()]
+    return {insight_id(text): text for text in documents}
+
+def load_manifest(path=MANIFEST_FILE):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+def save_manifest(ids, path=MANIFEST_FILE):
+    """Atomically record what the collection now holds"""
+    manifest = {"collection": COLLECTION_NAME, "model": EMBEDDING_MODEL,
+                "count": len(ids), "updated_at": time.time(), "ids": sorted(ids)}
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp, path)
 
-def main():
+def indexed_ids(collection, manifest):
+    """IDs currently in the collection; the manifest avoids listing it when it agrees"""
+    if (manifest and manifest.get("collection") == COLLECTION_NAME
+            and manifest.get("model") == EMBEDDING_MODEL
+            and manifest.get("count") == collection.count()):
+        return set(manifest["ids"])
+    # No usable manifest (first run, model change, or an older positional-ID build)
+    return set(collection.get(include=[])["ids"])
+
+def batches(items, size=BATCH_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def main(full=False):
     """
-    Main function to create and populate the vector database.
+    Bring the vector database in line with knowledge_base.txt.
+    Only new or changed insights are embedded; removed ones are deleted.
     """
     # 1. Check if the knowledge base file exists
     if not os.path.exists(KNOWLEDGE_BASE_FILE):
@@ -22,10 +70,9 @@ def main():
     client = chromadb.PersistentClient(path=PERSIST_DIRECTORY)
 
     # 3. Set up the embedding function using a pre-trained model
-    # ChromaDB will automatically download and use this model
     # 'all-MiniLM-L6-v2' is a great, lightweight default model [102]
     sentence_transformer_ef = embedding_functions.SentenceTransformerEmbeddingFunction(
-        model_name="all-MiniLM-L6-v2"
+        model_name=EMBEDDING_MODEL
     )
 
     # 4. Create or get the collection
@@ -35,34 +82,40 @@ def main():
         embedding_function=sentence_transformer_ef
     )
 
-    # 5. Read the insights from your text file
-    with open(KNOWLEDGE_BASE_FILE, "r", encoding="utf-8") as f:
-        # Read all lines, stripping out any whitespace
-        documents = [line.strip() for line in f.readlines() if line.strip()]
-
-    # 6. Generate unique IDs for each document
-    # This is important for managing data in the collection
-    ids = [f"insight_{i}" for i in range(len(documents))]
-
-    # 7. Add the documents to the collection
-    # ChromaDB will automatically handle the process of creating embeddings
-    # because we specified the embedding_function when creating the collection.
-    # Note: If you run this script again, it will add duplicates unless you
-    # clear the collection first. For simplicity, we are assuming a fresh start.
-    collection.add(
-        documents=documents,
-        ids=ids
-    )
+    # 5. Work out what changed since the last build
+    # An edited insight hashes to a new ID, so it shows up as one add + one delete
+    insights = read_insights(KNOWLEDGE_BASE_FILE)
+    existing = set() if full else indexed_ids(collection, load_manifest())
+    to_add = [i for i in insights if i not in existing]
+    to_delete = sorted(existing - insights.keys())
+    if full:
+        to_delete = sorted(set(collection.get(include=[])["ids"]) - insights.keys())
+
+    # 6. Embed and upsert only the new insights, in batches
+    started = time.perf_counter()
+    for batch in batches(to_add):
+        collection.upsert(ids=batch, documents=[insights[i] for i in batch])
+    embed_seconds = time.perf_counter() - started
+
+    # 7. Drop insights that are no longer in the knowledge base
+    for batch in batches(to_delete):
+        collection.delete(ids=batch)
+
+    save_manifest(insights.keys())
 
     print("-" * 50)
     print(f"✅ Success! Vector database has been created/updated.")
     print(f"   - Stored in: '{PERSIST_DIRECTORY}/' directory")
     print(f"   - Collection: '{COLLECTION_NAME}'")
+    print(f"   - Embedded: {len(to_add)} new, {len(to_delete)} removed, "
+          f"{len(insights) - len(to_add)} unchanged ({embed_seconds:.1f}s)")
     print(f"   - Total insights indexed: {collection.count()}")
     print("-" * 50)
 
 
 # --- Run the main function ---
 if __name__ == "__main__":
-    main()
-
+    parser = argparse.ArgumentParser(description="Build or update the health_insights vector index")
+    parser.add_argument("--full", action="store_true",
+                        help="re-embed every insight instead of only new ones")
+    main(full=parser.parse_args().full)